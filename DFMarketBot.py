@@ -1,10 +1,11 @@
 import sys
+import time
 import ctypes
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import QObject, pyqtSignal, Qt, QThread
 from GUI.AppGUI import Ui_MainWindow
 from backend.BuyBot import BuyBot
-from backend.utils import get_mouse_position, mouse_click
+from backend.worker import Worker
 import keyboard
 from config import DefaultConfig
 from monitors import set_console_window_position, set_window_position, get_monitor_counts
@@ -23,152 +24,35 @@ def is_admin():
 class KeyMonitor(QObject):
     key_pressed = pyqtSignal(int)
 
+    # 只注册用到的按键，其他按键不触发回调
+    HOTKEYS = {'f8': 0, 'f9': 1, 'f7': 2, 'f10': 3}
+    MESSAGES = {0: '开始循环', 1: '停止循环'}
+
     def __init__(self):
         super().__init__()
-        keyboard.on_press(self.handle_key)
-
-    def handle_key(self, event):
-        if event.name == 'f8':
-            self.key_pressed.emit(0)
-            print('开始循环')
-        elif event.name == 'f9':
-            self.key_pressed.emit(1)
-            print('停止循环')
+        for key, code in self.HOTKEYS.items():
+            keyboard.add_hotkey(key, self.handle_key, args=(code,))
 
+    def handle_key(self, code):
+        self.key_pressed.emit(code)
+        if code in self.MESSAGES:
+            print(self.MESSAGES[code])
 
-class Worker(QThread):
-    update_signal = pyqtSignal(int)
-    param_update = pyqtSignal(int)  # 新增参数更新信号
 
-    def __init__(self, buybot: BuyBot):
+class WorkerThread(QThread):
+    """在Qt线程中运行 Worker 的循环，循环本身不依赖Qt"""
+    def __init__(self, worker: Worker):
         super().__init__()
-        self.buybot: BuyBot = buybot
-        self._is_running = False
-        self.lock = QtCore.QMutex()
-        self.ideal_price = 0
-        self.unacceptable_price = 0
-        self.loop_gap = 0
-        self.is_convertible = True
-        self.is_key_mode = False
-        self.is_half_coin_mode = False
-        self.mouse_position = []
-        self.mouse_position_lock = QtCore.QMutex()
-        self.param_lock = QtCore.QMutex()  # 参数专用锁
-
-    def record_mouse_position(self):
-        """记录鼠标位置"""
-        self.mouse_position_lock.lock()
-        self.mouse_position = get_mouse_position()
-        self.mouse_position_lock.unlock()
+        self.worker = worker
 
     def run(self):
-        first_loop = True
-        buy_number = 0
-        while True:
-            # 获取运行状态
-            self.lock.lock()
-            running = self._is_running
-            self.lock.unlock()
-            if first_loop == False:
-                first_loop = True
-            if running:
-                try:
-                    # 获取当前参数值
-                    self.param_lock.lock()
-                    current_ideal = self.ideal_price
-                    current_unacceptable = self.unacceptable_price
-                    current_convertible = self.is_convertible
-                    current_key_mode = self.is_key_mode
-                    current_half_coin_mode = self.is_half_coin_mode
-                    self.param_lock.unlock()
-                    
-                    # 进入商品页面
-                    mouse_click(self.mouse_position, num = 1)
-                    # self.msleep(375)
-                    
-                    # 获取商品价格 
-                    if current_half_coin_mode and (not first_loop) and (buy_number != 0):
-                        # 使用哈夫币余额差值计算价格
-                        try:
-                            previous_balance_half_coin = self.buybot.balance_half_coin
-                            current_balance_half_coin = self.buybot.detect_balance_half_coin()
-                            lowest_price = (previous_balance_half_coin - current_balance_half_coin)/buy_number
-                            if lowest_price == 0:
-                                # 直接看市场底价
-                                lowest_price = self.buybot.detect_price(is_convertible=current_convertible, debug_mode=False)
-                                print("上一次购买失败，直接看市场底价:", lowest_price, end=" ")
-                            else:
-                                print("哈夫币余额差值计算价格:", lowest_price, end=" ")
-                        except:
-                            # 直接看市场底价
-                            lowest_price = self.buybot.detect_price(is_convertible=current_convertible, debug_mode=False)
-                            print("余额计算出现异常，直接看市场底价:", lowest_price, end=" ")
-                    else:
-                        # 直接看市场底价
-                        lowest_price = self.buybot.detect_price(is_convertible=current_convertible, debug_mode=False)
-                        print("直接看市场底价:", lowest_price, end=" ")
-                    
-                    if current_key_mode:
-                        # 钥匙卡模式
-                        if lowest_price > current_ideal:
-                            print('当前价格：', lowest_price, '高于理想价格', current_ideal, ' 免费刷新价格')
-                            self.buybot.freerefresh(good_postion=self.mouse_position)
-                        else:
-                            print('当前价格：', lowest_price, '低于理想价格', current_ideal, ' 购买一张后循环结束')
-                            self.buybot.refresh(is_convertible=False)
-                            self.set_running(False)
-                            print('停止循环')
-                    else:
-                        # 正常模式
-                        if lowest_price > current_unacceptable:
-                            print('高于最高价格', current_unacceptable, ' 免费刷新价格')
-                            self.buybot.freerefresh(good_postion=self.mouse_position)
-                            buy_number = 0
-                        elif lowest_price > current_ideal:
-                            print('高于理想价格', current_ideal, ' 刷新价格')
-                            self.buybot.refresh(is_convertible=current_convertible)
-                            buy_number = 31 #原始值为 购买子弹价格/1 ，修改为 购买子弹价格/31
-                            # self.msleep(2500)
-                        else:
-                            print('低于理想价格', current_ideal, ' 开始购买')
-                            self.buybot.buy(is_convertible=current_convertible)
-                            buy_number = 200
-
-                    # 标记为非第一次循环
-                    if first_loop == True:
-                        first_loop = False
-                except Exception as e:
-                    if str(e) == '识别失败':  # 识别失败, 建议检查物品是否可兑换
-                        self.msleep(self.loop_gap)
-                        self.buybot.freerefresh(good_postion=self.mouse_position)
-                    else:
-                        print(f"操作失败: {str(e)}")
-                if self.loop_gap > 0:
-                    self.msleep(self.loop_gap)
-            else:
-                self.msleep(100)
-                # 标记为第一次循环
-                if first_loop == False:
-                    first_loop = True
-                    buy_number = 0
-
-    def update_params(self, ideal, unacceptable, convertible, key_mode, half_coin_mode, loop_gap):
-        """线程安全更新参数"""
-        self.param_lock.lock()
-        self.ideal_price = ideal
-        self.unacceptable_price = unacceptable
-        self.loop_gap = loop_gap
-        self.is_convertible = convertible
-        self.is_key_mode = key_mode
-        self.is_half_coin_mode = half_coin_mode
-        self.param_lock.unlock()
-    def set_running(self, state):
-        """线程安全更新运行状态"""
-        self.lock.lock()
-        self._is_running = state
-        self.lock.unlock()
-        
-        
+        self.worker.run()
+
+
+class EngineMonitor(QObject):
+    """把后台线程中的OCR加载结果转发到Qt主线程"""
+    ready = pyqtSignal(bool)
+
 
 def runApp():
     app = QtWidgets.QApplication([])
@@ -191,15 +75,57 @@ def runApp():
     except ValueError as e:
         print(f"设置窗口位置失败: {e}")
 
+    # OCR引擎在后台加载，加载完成前不响应F8
+    engine_monitor = EngineMonitor()
+
+    def handle_engine_ready(ok):
+        if ok:
+            mainWindow.statusbar.showMessage("OCR引擎已就绪")
+            print('初始化完成')
+        else:
+            mainWindow.statusbar.showMessage("OCR引擎加载失败，请查看命令行输出")
+
+    engine_monitor.ready.connect(handle_engine_ready)
+    mainWindow.statusbar.showMessage("OCR引擎加载中...")
+
     # 创建监控线程
     key_monitor = KeyMonitor()
-    buyBot = BuyBot()
+    buyBot = BuyBot(on_ocr_ready=engine_monitor.ready.emit)
     worker = Worker(buyBot)
     buyBot.set_worker(worker)
+    worker_thread = WorkerThread(worker)
+
+    # 显示器变化时重新换算按钮和识别区域坐标
+    def handle_display_change(*args):
+        # 坐标由工作线程换算，使用的布局记录在会话日志中
+        worker.refresh_layout()
+        mainWindow.statusbar.showMessage("显示器发生变化，正在重新换算布局")
+
+    def handle_screen_added(screen):
+        screen.geometryChanged.connect(handle_display_change)
+        handle_display_change()
+
+    for screen in app.screens():
+        screen.geometryChanged.connect(handle_display_change)
+    app.screenAdded.connect(handle_screen_added)
+    app.screenRemoved.connect(handle_display_change)
 
     # 信号连接
     def handle_key_event(x):
+        if x == 3:
+            # 把最近的识别截图写入 debug_frames/
+            if buyBot.frames.flush('hotkey'):
+                mainWindow.statusbar.showMessage(f"最近的识别截图正在写入 {DefaultConfig.FRAME_RECORDER_DIR}")
+            return
+        if x == 2:
+            # 把鼠标所在商品以当前参数加入监视列表
+            item = worker.pin_mouse_position()
+            mainWindow.statusbar.showMessage(f"已加入监视列表: {item.key}，共{len(worker.watchlist)}个商品")
+            return
         if x == 0:
+            if not buyBot.ocr.is_ready():
+                print('OCR引擎尚未就绪，请稍后再按F8')
+                return
             worker.record_mouse_position()
         worker.set_running(x == 0)
 
@@ -225,8 +151,56 @@ def runApp():
     # 确保前端数据与后端同步
     handle_text_change()
 
+    # 每秒刷新一次实际循环间隔和耗时统计
+    def update_stats():
+        lines = []
+        if DefaultConfig.PACING_ENABLED:
+            lines.append(f"当前循环间隔: {worker.loop_gap}ms")
+        if DefaultConfig.TIMING_ENABLED:
+            lines.append(buyBot.timing.format_summary())
+        mainWindow.label_stats.setText('\n'.join(lines))
+
+    stats_timer = QtCore.QTimer(window)
+    stats_timer.timeout.connect(update_stats)
+    if DefaultConfig.TIMING_ENABLED or DefaultConfig.PACING_ENABLED:
+        stats_timer.start(1000)
+
+    def export_timing():
+        path = time.strftime('timing_%Y%m%d_%H%M%S')
+        buyBot.timing.export_csv(path + '.csv')
+        buyBot.timing.export_json(path + '.json')
+        mainWindow.statusbar.showMessage(f"耗时统计已导出到 {path}.csv / {path}.json")
+
+    mainWindow.pushButton_export_timing.clicked.connect(export_timing)
+
+    # 根据最近的价格分布填入理想价格和最高价格
+    def suggest_price():
+        suggestion = buyBot.price_history.suggest_prices(
+            ideal_percentile=DefaultConfig.HISTORY_IDEAL_PERCENTILE,
+            unacceptable_percentile=DefaultConfig.HISTORY_UNACCEPTABLE_PERCENTILE)
+        if suggestion is None:
+            mainWindow.statusbar.showMessage("最近没有价格记录，无法建议价格")
+            return
+        ideal, unacceptable = suggestion
+        mainWindow.textEdit_ideal_price.setText(str(ideal))
+        mainWindow.textEdit_unacceptable_price.setText(str(unacceptable))
+        stats = buyBot.price_history.stats()
+        mainWindow.statusbar.showMessage(f"根据最近{stats['count']}次价格建议，最低 {stats['min']:.0f}，平均 {stats['mean']:.0f}")
+
+    mainWindow.pushButton_suggest_price.clicked.connect(suggest_price)
+
+    # 退出时写完日志并关闭OCR工作进程，释放共享内存
+    def handle_quit():
+        buyBot.session_log.close()
+        buyBot.price_history.close()
+        buyBot.frames.close()
+        if hasattr(buyBot.ocr, 'close'):
+            buyBot.ocr.close()
+
+    app.aboutToQuit.connect(handle_quit)
+
     window.show()
-    worker.start()
+    worker_thread.start()
     app.exec_()
 
 def main():
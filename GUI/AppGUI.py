@@ -14,7 +14,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         MainWindow.setObjectName("MainWindow")
-        MainWindow.resize(449, 218)
+        MainWindow.resize(449, 390)
         self.centralwidget = QtWidgets.QWidget(MainWindow)
         self.centralwidget.setObjectName("centralwidget")
         self.label_ideal_price = QtWidgets.QLabel(self.centralwidget)
@@ -111,6 +111,29 @@ class Ui_MainWindow(object):
         font.setWeight(75)
         self.is_half_coin_mode.setFont(font)
         self.is_half_coin_mode.setObjectName("is_half_coin_mode")
+        self.pushButton_export_timing = QtWidgets.QPushButton(self.centralwidget)
+        self.pushButton_export_timing.setGeometry(QtCore.QRect(310, 170, 121, 31))
+        font = QtGui.QFont()
+        font.setFamily("微软雅黑")
+        font.setPointSize(9)
+        self.pushButton_export_timing.setFont(font)
+        self.pushButton_export_timing.setObjectName("pushButton_export_timing")
+        self.pushButton_suggest_price = QtWidgets.QPushButton(self.centralwidget)
+        self.pushButton_suggest_price.setGeometry(QtCore.QRect(310, 210, 121, 31))
+        font = QtGui.QFont()
+        font.setFamily("微软雅黑")
+        font.setPointSize(9)
+        self.pushButton_suggest_price.setFont(font)
+        self.pushButton_suggest_price.setObjectName("pushButton_suggest_price")
+        self.label_stats = QtWidgets.QLabel(self.centralwidget)
+        self.label_stats.setGeometry(QtCore.QRect(20, 210, 281, 150))
+        font = QtGui.QFont()
+        font.setFamily("微软雅黑")
+        font.setPointSize(9)
+        self.label_stats.setFont(font)
+        self.label_stats.setText("")
+        self.label_stats.setAlignment(QtCore.Qt.AlignLeading|QtCore.Qt.AlignLeft|QtCore.Qt.AlignTop)
+        self.label_stats.setObjectName("label_stats")
         MainWindow.setCentralWidget(self.centralwidget)
         self.statusbar = QtWidgets.QStatusBar(MainWindow)
         self.statusbar.setObjectName("statusbar")
@@ -133,6 +156,8 @@ class Ui_MainWindow(object):
         self.is_key_mode.setText(_translate("MainWindow", "钥匙卡模式"))
         self.label_loop_gap.setText(_translate("MainWindow", "循环间隔"))
         self.is_half_coin_mode.setText(_translate("MainWindow", "使用哈夫币余额计算价格"))
+        self.pushButton_export_timing.setText(_translate("MainWindow", "导出耗时统计"))
+        self.pushButton_suggest_price.setText(_translate("MainWindow", "按历史建议价格"))
 
     # 自动格式化输入为带逗号的千位格式
     def format_price_input(self, textEdit: QtWidgets.QTextEdit):
@@ -2,74 +2,430 @@
 
 if __name__ == '__main__':
     from utils import *
+    from digit_recognizer import DigitTemplateRecognizer
+    from ocr_engine import create_ocr_engine
+    from ocr_service import OcrService
+    from ocr_cache import RecognitionCache
+    from capture import create_capture_backend, REDRAWN
+    from input_engine import InputEngine, create_input_backend, click, press
+    from timing import SpanRecorder
+    from session_log import SessionLogger
+    from price_history import PriceHistory
+    from layout import LayoutResolver, monitor_rect
+    from frame_recorder import FrameRecorder
+    from verification import plausible, vote
+    from outcome import OutcomeDetector
 else:
     from backend.utils import *
+    from backend.digit_recognizer import DigitTemplateRecognizer
+    from backend.ocr_engine import create_ocr_engine
+    from backend.ocr_service import OcrService
+    from backend.ocr_cache import RecognitionCache
+    from backend.capture import create_capture_backend, REDRAWN
+    from backend.input_engine import InputEngine, create_input_backend, click, press
+    from backend.timing import SpanRecorder
+    from backend.session_log import SessionLogger
+    from backend.price_history import PriceHistory
+    from backend.layout import LayoutResolver, monitor_rect
+    from backend.frame_recorder import FrameRecorder
+    from backend.verification import plausible, vote
+    from backend.outcome import OutcomeDetector
 import time
-import easyocr
+import threading
 import numpy as np
-from PyQt5.QtCore import QThread
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING
 from config import DefaultConfig
 
+if TYPE_CHECKING:
+    from backend.worker import Worker
+
 
 class BuyBot:
-    def __init__(self):
-        self.reader = easyocr.Reader(['en'], gpu=True)
-        self.range_isconvertible_lowest_price = [2179/2560, 1078/1440, 2308/2560, 1102/1440]
-        self.range_notconvertible_lowest_price = [2179/2560, 1156/1440, 2308/2560, 1178/1440]
-        self.postion_isconvertible_max_shopping_number = [0.9085, 0.7222]
-        self.postion_isconvertible_min_shopping_number = [0.8095, 0.7222]  #"将Buybot.py中的"self.postion_isconvertible_min_shopping_number"临时改为[0.8095, 0.7222], 该值原本为[0.7921, 0.7222]"
-        self.postion_notconvertiable_max_shopping_number = [2329/2560, 1112/1440]
-        self.postion_notconvertiable_min_shopping_number = [2059/2560, 1112/1440] #"将Buybot.py中的"self.postion_notconvertiable_min_shopping_number"临时改为[2059/2560, 1112/1440], 该值原本为[2028/2560, 1112/1440]"
-        self.postion_isconvertible_buy_button = [2189/2560, 0.7979]
-        self.postion_notconvertiable_buy_button = [2186/2560, 1225/1440]
-        self.postion_balance = [2200/2560, 70/1440]
-        self.postion_balance_half_coin = [1930/2560, 363/1440, 2324/2560, 387/1440]
+    def __init__(self, on_ocr_ready = None, capture = None, input_backend = None, ocr = None,
+                 session_log = None, price_history = None, frames = None):
+        '''
+        capture / input_backend / ocr / session_log / price_history / frames：
+        为None时按 DefaultConfig 创建，回放和测试时传入替代对象，不加载OCR模型，也不写真实的日志和截图目录
+        '''
+        # 各阶段耗时
+        self.timing = SpanRecorder(capacity=DefaultConfig.TIMING_CAPACITY, enabled=DefaultConfig.TIMING_ENABLED)
+        # 循环中的输出只入队，由后台线程写控制台和日志文件
+        if session_log is None:
+            session_log = SessionLogger(directory=DefaultConfig.LOG_DIR,
+                                        max_bytes=DefaultConfig.LOG_MAX_BYTES,
+                                        backup_count=DefaultConfig.LOG_BACKUP_COUNT,
+                                        console=DefaultConfig.LOG_CONSOLE)
+        self.session_log = session_log
+        # 每次观察到的价格，用于滚动统计和建议价格
+        if price_history is None:
+            price_history = PriceHistory(path=DefaultConfig.HISTORY_PATH or None,
+                                         windows_s=DefaultConfig.HISTORY_WINDOWS_S)
+        self.price_history = price_history
+        # OCR模型在后台加载，用 self.ocr.is_ready() 查询是否就绪
+        if ocr is not None:
+            self.ocr = ocr
+        elif DefaultConfig.OCR_BACKEND == 'process':
+            # 在独立进程中推理，不和界面、热键线程争抢GIL
+            self.ocr = OcrService(pool_size=DefaultConfig.OCR_SERVICE_POOL_SIZE,
+                                  use_gpu=DefaultConfig.OCR_USE_GPU,
+                                  torch_threads=DefaultConfig.OCR_TORCH_THREADS,
+                                  min_confidence=DefaultConfig.OCR_MIN_CONFIDENCE,
+                                  timeout_s=DefaultConfig.OCR_SERVICE_TIMEOUT_S,
+                                  model=DefaultConfig.OCR_MODEL,
+                                  onnx_path=DefaultConfig.OCR_ONNX_PATH,
+                                  on_ready=on_ocr_ready)
+        else:
+            self.ocr = create_ocr_engine(DefaultConfig.OCR_MODEL,
+                                         use_gpu=DefaultConfig.OCR_USE_GPU,
+                                         torch_threads=DefaultConfig.OCR_TORCH_THREADS,
+                                         min_confidence=DefaultConfig.OCR_MIN_CONFIDENCE,
+                                         onnx_path=DefaultConfig.OCR_ONNX_PATH,
+                                         on_ready=on_ocr_ready)
+        self.ocr.start()
+        # 常驻截图后端，返回numpy数组
+        self.capture = capture if capture is not None else create_capture_backend(DefaultConfig.CAPTURE_BACKEND)
+        # 点击序列作为组合动作执行，没有pyautogui的固定暂停
+        if input_backend is None:
+            input_backend = create_input_backend(DefaultConfig.INPUT_BACKEND)
+        self.input = InputEngine(input_backend,
+                                 step_delay_ms=DefaultConfig.INPUT_STEP_DELAY_MS,
+                                 click_hold_ms=DefaultConfig.INPUT_CLICK_HOLD_MS,
+                                 failsafe=DefaultConfig.INPUT_FAILSAFE)
+        self.digit_recognizer = DigitTemplateRecognizer.load(DefaultConfig.DIGIT_TEMPLATE_PATH)
+        if self.digit_recognizer is None:
+            print('未找到数字模板，只使用OCR识别')
+        # 相同像素的截图直接复用上次的识别结果
+        self.ocr_cache = RecognitionCache(max_size=DefaultConfig.OCR_CACHE_SIZE,
+                                          perceptual=DefaultConfig.OCR_CACHE_PERCEPTUAL)
+        # 数字模板和OCR引擎可能被多个线程调用（循环线程、界面线程的调试识别），识别时加锁
+        self._recognize_lock = threading.RLock()
+        # 最近的识别截图，识别失败或按F10时在后台写入 debug_frames/
+        if frames is None:
+            frames = FrameRecorder(capacity=DefaultConfig.FRAME_RECORDER_CAPACITY,
+                                   directory=DefaultConfig.FRAME_RECORDER_DIR,
+                                   min_interval_s=DefaultConfig.FRAME_RECORDER_MIN_INTERVAL_S,
+                                   enabled=DefaultConfig.FRAME_RECORDER_ENABLED)
+        self.frames = frames
+        # 按钮和识别区域的像素坐标，按游戏所在显示器的分辨率从 layouts/ 中的布局换算一次
+        if capture is None:
+            geometry = lambda: monitor_rect(DefaultConfig.GAME_MONITOR, self.capture.screen_size)
+        else:
+            geometry = lambda: (0, 0) + tuple(self.capture.screen_size())
+        self.layout = LayoutResolver(DefaultConfig.LAYOUT_DIR, geometry)
+        self.apply_layout()
+        # 购买结果提示的缩略图，没有录制时为None，只能通过下一轮的余额差值判断是否买到
+        self.outcomes = OutcomeDetector.load(DefaultConfig.OUTCOME_SIGNATURE_PATH,
+                                             threshold=DefaultConfig.OUTCOME_MATCH_THRESHOLD)
         self.lowest_price = None
         self.balance_half_coin = None
-        print('初始化完成')
+        # 最近一次截图识别前等待价格重绘的结果
+        self.redraw_state = REDRAWN
+        # 本次运行中每个物品采用过的最近价格，verify_price 用其中位数检查读数是否合理；
+        # 不用历史文件，重启后同一位置换了物品也不会沿用旧的价格
+        self.recent_prices = defaultdict(lambda: deque(maxlen=DefaultConfig.VERIFY_RECENT_COUNT))
+        # 最近一次价格截图及其区域，低置信度时 verify_price 在同一区域补截
+        self._verify_crop = None
+        self._verify_range = None
     
-    def set_worker(self, worker: QThread):
+    def apply_layout(self):
+        '''
+        把布局中的坐标设置为同名属性，例如 self.postion_balance
+
+        range_purchase_result 需要用户自己加到布局中，没有时为None，不检测购买结果
+        '''
+        self.range_purchase_result = None
+        for name, value in self.layout.resolve().items():
+            setattr(self, name, value)
+
+    def invalidate_layout(self):
+        '''
+        显示器分辨率或排列变化后调用，重新换算坐标；
+        循环读取坐标时不加锁，只能在工作线程中调用，其他线程用 Worker.refresh_layout()
+        '''
+        self.layout.invalidate()
+        self.capture.invalidate()
+        self.input.invalidate()
+        self.apply_layout()
+
+    def set_worker(self, worker: 'Worker'):
         self.worker = worker
     
     def identify_number(self, img, debug_mode = False):
-        try:
-            text = self.reader.readtext(np.array(img))
-            text = text[-1][1]
-            text = text.replace(',', '')
-            text = text.replace('.', '')
-            text = text.replace(' ', '')
-        except:
-            text = None
+        return self.identify_reading(img, debug_mode)[0]
+
+    def identify_reading(self, img, debug_mode = False) -> tuple:
+        '''
+        返回 (数字, 置信度)，识别失败时为 (None, 0.0)
+        '''
+        with self.timing.span('cache'):
+            key = self.ocr_cache.key(img)
+            hit, reading = self.ocr_cache.get(key, img)
+        if not hit:
+            with self.timing.span('ocr'), self._recognize_lock:
+                reading = self._identify_reading(img)
+            # 识别失败不缓存，下次仍然重新识别
+            if reading[0] is not None:
+                self.ocr_cache.put(key, reading, img)
         if debug_mode == True:
-            print(text)
-        return int(text) if text else None
+            print(reading, self.ocr_cache)
+        return reading
 
-    def detect_price(self,  is_convertible: bool, debug_mode = False, wait_ms: int = DefaultConfig.SCREENSHOT_DELAY_MS):
-        if wait_ms > 0:
-            self.worker.msleep(wait_ms)
+    def identify_numbers(self, imgs: list) -> list:
+        return [number for number, confidence in self.identify_readings(imgs)]
+
+    def identify_readings(self, imgs: list) -> list:
+        '''
+        同一帧中的多块截图：缓存和模板逐块处理，剩下的一次交给OCR批量识别
+        '''
+        readings = [(None, 0.0)] * len(imgs)
+        keys = [None] * len(imgs)
+        pending = []
+        with self.timing.span('cache'):
+            for i, img in enumerate(imgs):
+                keys[i] = self.ocr_cache.key(img)
+                hit, reading = self.ocr_cache.get(keys[i], img)
+                if hit:
+                    readings[i] = reading
+                else:
+                    pending.append(i)
+        if pending:
+            with self.timing.span('ocr'), self._recognize_lock:
+                remaining = []
+                for i in pending:
+                    reading = self._identify_template(imgs[i])
+                    if reading is None:
+                        remaining.append(i)
+                    else:
+                        readings[i] = reading
+                if remaining:
+                    results = self.ocr.recognize_numbers([imgs[i] for i in remaining])
+                    for i, reading in zip(remaining, results):
+                        readings[i] = tuple(reading)
+            for i in pending:
+                if readings[i][0] is not None:
+                    self.ocr_cache.put(keys[i], readings[i], imgs[i])
+        return readings
+
+    def _identify_reading(self, img) -> tuple:
+        reading = self._identify_template(img)
+        if reading is None:
+            reading = tuple(self.ocr.recognize_number(img))
+        return reading
+
+    def _identify_template(self, img):
+        '''
+        固定字体的数字先用模板匹配，返回 (数字, 匹配得分)，得分不够时返回None
+        '''
+        if self.digit_recognizer is not None:
+            text, score = self.digit_recognizer.recognize(img)
+            if text is not None and score >= DefaultConfig.DIGIT_TEMPLATE_MIN_SCORE:
+                return int(text), float(score)
+        return None
+
+    def price_range(self, is_convertible: bool) -> list:
         if is_convertible:
-            self._screenshot = get_windowshot(self.range_isconvertible_lowest_price, debug_mode=debug_mode)
-        else:
-            self._screenshot = get_windowshot(self.range_notconvertible_lowest_price, debug_mode=debug_mode)
+            return self.range_isconvertible_lowest_price
+        return self.range_notconvertible_lowest_price
+
+    def price_thumbnail(self, is_convertible: bool):
+        '''
+        点击前记录价格区域的缩略图，之后用 wait_price_redraw 等待画面变化
+        '''
+        return self.capture.thumbnail(self.price_range(is_convertible))
+
+    def wait_price_redraw(self, is_convertible: bool, reference, timeout_ms: int = None, unchanged_ms: int = None) -> str:
+        '''
+        等待价格区域相对 reference 发生变化并稳定，最多等待 timeout_ms（默认 WAIT_CHANGE_TIMEOUT_MS）
+
+        unchanged_ms：画面保持不变达到该时长时提前返回 UNCHANGED，截图识别前不要传入，否则可能读到旧的价格
+
+        返回 REDRAWN、UNCHANGED 或 TIMEOUT，见 CaptureBackend.wait_until_changed
+        '''
+        if timeout_ms is None:
+            timeout_ms = DefaultConfig.WAIT_CHANGE_TIMEOUT_MS
+        with self.timing.span('wait'):
+            return self.capture.wait_until_changed(self.price_range(is_convertible), reference,
+                                                   timeout_ms=timeout_ms,
+                                                   settle_ms=DefaultConfig.WAIT_SETTLE_MS,
+                                                   poll_ms=DefaultConfig.WAIT_POLL_MS,
+                                                   unchanged_ms=unchanged_ms)
+
+    def detect_price(self,  is_convertible: bool, debug_mode = False, wait_ms: int = DefaultConfig.SCREENSHOT_DELAY_MS, reference = None, item = None):
+        '''
+        reference：点击前的价格区域缩略图，传入时等到价格区域重绘完成再截图，不再固定等待 wait_ms；
+        超时仍没有变化时照常截图（价格确实没变），结果记在 redraw_state
+
+        item：物品编号，用于和最近的价格比较，见 verify_price
+        '''
+        self.redraw_state = REDRAWN
+        if reference is not None:
+            self.redraw_state = self.wait_price_redraw(is_convertible, reference)
+        elif wait_ms > 0:
+            self.worker.msleep(wait_ms)
+        self._verify_range = self.price_range(is_convertible)
+        with self.timing.span('capture'):
+            self._screenshot = self.capture.grab(self._verify_range)
+        self._verify_crop = self._screenshot
+        seq = self.frames.record(self._screenshot, 'price')
         # 识别最低价格
-        self.lowest_price = self.identify_number(self._screenshot)
+        reading = self.identify_reading(self._screenshot)
+        self._annotate_frames([seq], [reading[0]])
+        if debug_mode:
+            self.frames.flush('debug')
+        self.lowest_price = self.verify_price(reading, item)
+        return self.check_price(self.lowest_price)
 
-        if self.lowest_price == None:
-            print('识别失败, 建议检查物品是否可兑换')
+    def verify_price(self, reading: tuple, item = None):
+        '''
+        置信度不低于 VERIFY_MIN_CONFIDENCE 且与该物品最近价格的中位数相差不超过 VERIFY_MAX_JUMP 的读数直接采用，
+        否则对同一区域再截最多 VERIFY_MAX_FRAMES 帧投票，两票一致并且价格合理时采用，否则返回None
+
+        只有独立的读数才计票：来自与之前不同的截图，或者同一截图换用另一种识别方式（数字模板/OCR）；
+        同一截图用同一种方式识别的结果是确定的，重复计票没有意义。
+        与最近价格相差过大的读数需要 VERIFY_OVERRIDE_VOTES 票一致才采用，说明价格确实大幅变化，
+        此时丢弃该物品之前的价格，从新的价格重新开始
+        '''
+        number, confidence = reading
+        if not DefaultConfig.VERIFY_ENABLED or self._verify_crop is None:
+            return number
+        reference = self.recent_price(item)
+        if confidence >= DefaultConfig.VERIFY_MIN_CONFIDENCE and plausible(number, reference, DefaultConfig.VERIFY_MAX_JUMP):
+            return self._accept_price(item, number)
+        readings = [reading]
+        # 每张截图已经用过的识别方式，第一次读数来自数字模板或者（模板不可用时）OCR
+        with self._recognize_lock:
+            first_method = 'template' if self._identify_template(self._verify_crop) is not None else 'ocr'
+        methods = {self.ocr_cache.key(self._verify_crop): {first_method}}
+        with self.timing.span('verify'):
+            for _ in range(DefaultConfig.VERIFY_MAX_FRAMES):
+                time.sleep(DefaultConfig.VERIFY_INTERVAL_MS / 1000)
+                img = self.capture.grab(self._verify_range)
+                used = methods.setdefault(self.ocr_cache.key(img), set())
+                reading = self._independent_reading(img, used)
+                if reading is None:
+                    continue
+                readings.append(reading)
+                self.frames.annotate(self.frames.record(img, 'verify'), reading[0])
+                winner, votes, total = vote(readings)
+                if votes >= 2 and plausible(winner, reference, DefaultConfig.VERIFY_MAX_JUMP):
+                    if winner != number:
+                        self.session_log.log('verification_corrected', first=number, price=winner, readings=readings)
+                    return self._accept_price(item, winner)
+                if votes >= DefaultConfig.VERIFY_OVERRIDE_VOTES and plausible(winner):
+                    self.session_log.log('verification_override', price=winner, reference=reference, readings=readings)
+                    self.forget_prices(item)
+                    return self._accept_price(item, winner)
+        self.session_log.log('verification_failed', readings=readings, reference=reference)
+        return None
+
+    def _independent_reading(self, img, used: set):
+        '''
+        用该截图还没用过的识别方式识别，优先数字模板，返回 (数字, 置信度)；
+        两种方式都用过时返回None。used 会加入本次使用的方式
+        '''
+        with self._recognize_lock:
+            if 'template' not in used and self.digit_recognizer is not None:
+                used.add('template')
+                reading = self._identify_template(img)
+                if reading is not None:
+                    return reading
+            if 'ocr' not in used:
+                used.add('ocr')
+                try:
+                    return tuple(self.ocr.recognize_number(img))
+                except RuntimeError:
+                    return None, 0.0
+        return None
+
+    def recent_price(self, item):
+        '''
+        本次运行中该物品最近 VERIFY_RECENT_COUNT 个采用过的价格的中位数，少于 VERIFY_MIN_HISTORY 个时返回None
+        '''
+        prices = self.recent_prices.get(item) if item is not None else None
+        if prices is None or len(prices) < DefaultConfig.VERIFY_MIN_HISTORY:
+            return None
+        return float(np.median(prices))
+
+    def forget_prices(self, item = None):
+        '''
+        丢弃该物品（为None时所有物品）最近采用过的价格，例如同一位置换了物品之后
+        '''
+        if item is None:
+            self.recent_prices.clear()
+        else:
+            self.recent_prices.pop(item, None)
+
+    def _accept_price(self, item, price):
+        if item is not None:
+            self.recent_prices[item].append(price)
+        return price
+
+    def _annotate_frames(self, seqs: list, values: list):
+        '''
+        给记录到调试缓冲区的截图补上识别结果，有识别失败的截图时写入 debug_frames/
+        '''
+        for seq, value in zip(seqs, values):
+            self.frames.annotate(seq, value)
+        if None in values:
+            self.frames.flush('recognition_failed', force=False)
+
+    def check_price(self, price) -> int:
+        if price == None:
+            self.session_log.log('recognition_failed')
             raise Exception('识别失败')
-        return int(self.lowest_price)
+        return int(price)
+
+    def detect_price_and_balance(self, is_convertible: bool, reference = None, item = None) -> tuple:
+        '''
+        在同一帧中截取价格和哈夫币余额，一次识别，返回 (市场底价, 哈夫币余额)，识别失败的一项为None
+        '''
+        balance_range = self.postion_balance_half_coin
+        balance_reference = self.capture.thumbnail(balance_range)
+        self.input.move(self.postion_balance)
+        self.redraw_state = REDRAWN
+        if reference is not None:
+            self.redraw_state = self.wait_price_redraw(is_convertible, reference)
+        # 等待余额提示框出现
+        with self.timing.span('wait'):
+            self.capture.wait_until_changed(balance_range, balance_reference,
+                                            timeout_ms=DefaultConfig.WAIT_CHANGE_TIMEOUT_MS,
+                                            settle_ms=DefaultConfig.WAIT_SETTLE_MS,
+                                            poll_ms=DefaultConfig.WAIT_POLL_MS)
+        with self.timing.span('capture'):
+            crops = self.capture.grab_regions({'price': self.price_range(is_convertible), 'balance': balance_range})
+        self._verify_range = self.price_range(is_convertible)
+        self._verify_crop = crops['price']
+        seqs = [self.frames.record(crops['price'], 'price'), self.frames.record(crops['balance'], 'balance')]
+        price, balance = self.identify_readings([crops['price'], crops['balance']])
+        self._annotate_frames(seqs, [price[0], balance[0]])
+        self.lowest_price = self.verify_price(price, item)
+        self.balance_half_coin = balance[0]
+        if self.balance_half_coin == None:
+            self.session_log.log('balance_failed')
+        return self.lowest_price, self.balance_half_coin
 
     def detect_balance_half_coin(self, wait_ms: int = DefaultConfig.SCREENSHOT_DELAY_MS, debug_mode = False):
+        reference = self.capture.thumbnail(self.postion_balance_half_coin)
         # 先把鼠标移到余额位置
-        mouse_move(self.postion_balance)
+        self.input.move(self.postion_balance)
+        # 等待余额提示框出现，最多等待 max(wait_ms, WAIT_CHANGE_TIMEOUT_MS)
+        with self.timing.span('wait'):
+            self.capture.wait_until_changed(self.postion_balance_half_coin, reference,
+                                            timeout_ms=max(wait_ms, DefaultConfig.WAIT_CHANGE_TIMEOUT_MS),
+                                            settle_ms=DefaultConfig.WAIT_SETTLE_MS,
+                                            poll_ms=DefaultConfig.WAIT_POLL_MS)
         # 对哈夫币余额范围进行截图然后识别
-        if wait_ms > 0:
-            self.worker.msleep(wait_ms)
-        self._screenshot = get_windowshot(self.postion_balance_half_coin, debug_mode=debug_mode)
-        self.balance_half_coin = self.identify_number(self._screenshot)
+        with self.timing.span('capture'):
+            self._screenshot = self.capture.grab(self.postion_balance_half_coin)
+        seq = self.frames.record(self._screenshot, 'balance')
+        self.balance_half_coin = self.identify_reading(self._screenshot)[0]
+        self._annotate_frames([seq], [self.balance_half_coin])
+        if debug_mode:
+            self.frames.flush('debug')
 
         if self.balance_half_coin == None:
-            print('哈夫币余额检测识别失败或不稳定，建议关闭余额识别相关功能')
+            self.session_log.log('balance_failed')
         return self.balance_half_coin
     
     def get_half_coin_diff(self, wait_ms: int = DefaultConfig.SCREENSHOT_DELAY_MS):
@@ -77,30 +433,77 @@ class BuyBot:
         self.detect_balance_half_coin(wait_ms)
         return self.balance_half_coin - previous_balance_half_coin
 
+    def _click(self, sequence: list):
+        '''
+        执行点击序列，点击耗时记为 click
+        '''
+        with self.timing.span('click'):
+            self.input.run(sequence)
+
+    def open_item(self, good_postion):
+        # 进入商品页面
+        self._click([click(good_postion)])
+
     def buy(self, is_convertible):
         if is_convertible:
-            mouse_click(self.postion_isconvertible_max_shopping_number)
-            mouse_click(self.postion_isconvertible_buy_button)
+            self._click([click(self.postion_isconvertible_max_shopping_number),
+                         click(self.postion_isconvertible_buy_button)])
         else:
-            mouse_click(self.postion_notconvertiable_max_shopping_number)
-            mouse_click(self.postion_notconvertiable_buy_button)
+            self._click([click(self.postion_notconvertiable_max_shopping_number),
+                         click(self.postion_notconvertiable_buy_button)])
             
     def refresh(self, is_convertible):
         if is_convertible:
-            mouse_click(self.postion_isconvertible_min_shopping_number)
-            mouse_click(self.postion_isconvertible_buy_button)
+            self._click([click(self.postion_isconvertible_min_shopping_number),
+                         click(self.postion_isconvertible_buy_button)])
         else:
-            mouse_click(self.postion_notconvertiable_min_shopping_number)
-            mouse_click(self.postion_notconvertiable_buy_button)
+            self._click([click(self.postion_notconvertiable_min_shopping_number),
+                         click(self.postion_notconvertiable_buy_button)])
 
-    def freerefresh(self, good_postion):
+    def detects_outcome(self) -> bool:
+        '''
+        是否检测购买结果：需要录制的缩略图和布局中的 range_purchase_result
+        '''
+        return self.outcomes is not None and self.range_purchase_result is not None
+
+    def outcome_reference(self):
+        '''
+        点击前记录购买结果区域的缩略图，传给 purchase_outcome；不检测购买结果时返回None
+        '''
+        if not self.detects_outcome():
+            return None
+        return self.capture.thumbnail(self.range_purchase_result)
+
+    def purchase_outcome(self, reference, timeout_ms: int = None):
+        '''
+        点击购买后轮询 range_purchase_result 区域，区域相对点击前的 reference 变化并且和某个购买结果的缩略图匹配时，
+        返回 SUCCESS/FAILED/INSUFFICIENT；超时或 reference 为None时返回None
+
+        上一次的提示还在屏幕上、这次又是同样的结果时区域不会变化，只能返回None（未知）
+        '''
+        if reference is None or not self.detects_outcome():
+            return None
+        if timeout_ms is None:
+            timeout_ms = DefaultConfig.OUTCOME_TIMEOUT_MS
+        deadline = time.perf_counter() + timeout_ms / 1000
+        with self.timing.span('wait'):
+            while True:
+                outcome = self.outcomes.classify(self.capture.thumbnail(self.range_purchase_result), reference)
+                if outcome is not None or time.perf_counter() >= deadline:
+                    return outcome
+                time.sleep(DefaultConfig.WAIT_POLL_MS / 1000)
+
+    def back_to_shop(self):
         # esc回到商店页面
-        pyautogui.press('esc')
-        # 点击回到商品页面
-        mouse_click(good_postion)
+        self._click([press('esc')])
+
+    def freerefresh(self, good_postion):
+        # esc回到商店页面，再点击回到商品页面
+        self._click([press('esc'), click(good_postion)])
 
 def main():
     bot = BuyBot()
+    bot.ocr.wait_ready()
     print(bot.detect_price(is_convertible=True,debug_mode=True))
     print(bot.detect_balance_half_coin(debug_mode=True)) 
 
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+'''
+策略回测
+
+用记录的价格序列一次评估大量 (理想价格, 最高价格, 购买数量) 组合，不用在游戏里花钱试参数。
+决策规则和 backend/strategy.py 的 decide() 相同；假设价格序列不受自己购买的影响。
+
+正常模式下每轮的决策只取决于当轮价格和阈值，所以把价格排序后用累加和与二分查找，
+每个参数组合的统计是 O(log n)，上万个组合也只需要几秒。
+
+用法：
+    python backend/backtest.py logs/price_history.bin --ideal 480:560:2 --unacceptable 520:640:4 --buy-number 200
+'''
+
+import argparse
+import sys
+import numpy as np
+
+if __name__ == '__main__':
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.price_history import read_records, item_id
+from backend.strategy import BUY_NUMBER, REFRESH_NUMBER
+
+
+def backtest(prices, ideal, unacceptable, buy_number = BUY_NUMBER,
+             refresh_number = REFRESH_NUMBER) -> dict:
+    '''
+    正常模式回测，参数可以是标量或数组，按NumPy规则广播成同一形状
+
+    返回各参数组合的：
+        buys / refreshes / freerefreshes：三种决策的次数
+        units：买到的总数量
+        spend：总花费
+        average_price：平均单价，没有买到时为nan
+    '''
+    prices = np.sort(np.asarray(prices, dtype=np.float64))
+    cumulative = np.concatenate(([0.0], np.cumsum(prices)))
+    ideal, unacceptable, buy_number, refresh_number = np.broadcast_arrays(
+        np.asarray(ideal, dtype=np.float64), np.asarray(unacceptable, dtype=np.float64),
+        np.asarray(buy_number, dtype=np.int64), np.asarray(refresh_number, dtype=np.int64))
+
+    # 和 decide() 一样先比较 unacceptable：价格 > unacceptable 时免费刷新，
+    # 否则价格 > ideal 时刷新，其余购买，所以购买的上界是 min(ideal, unacceptable)
+    buy_end = np.searchsorted(prices, np.minimum(ideal, unacceptable), side='right')
+    refresh_end = np.searchsorted(prices, unacceptable, side='right')
+    buys = buy_end
+    refreshes = refresh_end - buy_end
+    freerefreshes = prices.size - refresh_end
+
+    units = buys * buy_number + refreshes * refresh_number
+    spend = cumulative[buy_end] * buy_number + (cumulative[refresh_end] - cumulative[buy_end]) * refresh_number
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average_price = np.where(units > 0, spend / units, np.nan)
+    return {
+        'ideal': ideal,
+        'unacceptable': unacceptable,
+        'buy_number': buy_number,
+        'refresh_number': refresh_number,
+        'buys': buys,
+        'refreshes': refreshes,
+        'freerefreshes': freerefreshes,
+        'units': units,
+        'spend': spend,
+        'average_price': average_price,
+    }
+
+def backtest_key_mode(prices, ideal) -> dict:
+    '''
+    钥匙卡模式回测：第一次价格 <= ideal 时买一张并停止
+
+    返回各理想价格的等待轮数（没有买到时为价格序列长度）和成交价（没有买到时为nan）
+    '''
+    prices = np.asarray(prices, dtype=np.float64)
+    ideal = np.asarray(ideal, dtype=np.float64)
+    # 前缀最小值单调不增，第一次 <= ideal 的位置可以二分查找
+    running_min = np.minimum.accumulate(prices)
+    first = np.searchsorted(-running_min, -ideal, side='left')
+    bought = first < prices.size
+    paid = np.where(bought, prices[np.minimum(first, prices.size - 1)], np.nan)
+    return {'ideal': ideal, 'iterations': first, 'price': paid}
+
+def parameter_grid(ideal, unacceptable, buy_number = (BUY_NUMBER,)) -> tuple:
+    '''
+    三组取值的笛卡尔积，展开为三个一维数组
+    '''
+    grids = np.meshgrid(np.asarray(ideal), np.asarray(unacceptable), np.asarray(buy_number), indexing='ij')
+    return tuple(grid.ravel() for grid in grids)
+
+def load_prices(path: str, item = None) -> np.ndarray:
+    '''
+    从价格历史文件读取价格序列，item 为商品标识（例如鼠标位置 "1200,560"），None表示全部
+    '''
+    records = read_records(path)
+    if records is None:
+        return np.zeros(0)
+    if item is not None:
+        records = records[records['item'] == item_id(item)]
+    return np.array(records['price'])
+
+def parse_values(text: str) -> np.ndarray:
+    '''
+    "start:stop:step" 或逗号分隔的数值列表，start:stop:step 包含 stop
+    '''
+    if ':' in text:
+        start, stop, step = (float(v) for v in text.split(':'))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(v) for v in text.split(',')])
+
+def main():
+    parser = argparse.ArgumentParser(description='用记录的价格回测购买参数')
+    parser.add_argument('path', help='价格历史文件')
+    parser.add_argument('--item', help='只使用该商品的记录（鼠标位置，例如 1200,560）')
+    parser.add_argument('--ideal', required=True, help='理想价格，start:stop:step 或 a,b,c')
+    parser.add_argument('--unacceptable', required=True, help='最高价格，start:stop:step 或 a,b,c')
+    parser.add_argument('--buy-number', default=str(BUY_NUMBER), help='每次购买数量')
+    parser.add_argument('--min-units', type=int, default=1, help='至少买到的数量')
+    parser.add_argument('--top', type=int, default=10, help='显示平均单价最低的组合数')
+    args = parser.parse_args()
+
+    prices = load_prices(args.path, args.item)
+    if prices.size == 0:
+        print('没有价格记录')
+        return 1
+    result = backtest(prices, *parameter_grid(parse_values(args.ideal), parse_values(args.unacceptable),
+                                               parse_values(args.buy_number).astype(np.int64)))
+    candidates = np.flatnonzero(result['units'] >= args.min_units)
+    order = candidates[np.argsort(result['average_price'][candidates], kind='stable')][:args.top]
+    print(f'价格记录 {prices.size} 条，参数组合 {result["units"].size} 个')
+    print(f"{'理想价格':>8}{'最高价格':>8}{'数量':>6}{'购买':>6}{'刷新':>6}{'免费刷新':>8}{'买到':>8}{'平均单价':>10}")
+    for i in order:
+        print(f"{result['ideal'][i]:>10.0f}{result['unacceptable'][i]:>12.0f}{result['buy_number'][i]:>8}"
+              f"{result['buys'][i]:>8}{result['refreshes'][i]:>8}{result['freerefreshes'][i]:>12}"
+              f"{result['units'][i]:>10}{result['average_price'][i]:>14.1f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
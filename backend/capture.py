@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+'''
+截图后端
+
+所有后端返回 (高, 宽, 3) 的 RGB uint8 numpy 数组；
+范围可以是相对坐标 [0.85, 0.74, 0.90, 0.76] 或像素坐标 [2179, 1078, 2308, 1102]，
+屏幕尺寸只在第一次用到时查询一次
+'''
+
+import os
+import time
+import threading
+import numpy as np
+
+# 变化检测用的缩略图采样步长
+THUMBNAIL_STEP = 4
+
+# wait_until_changed 的返回值
+REDRAWN = 'redrawn' # 画面变化后已经稳定
+UNCHANGED = 'unchanged' # 画面保持不变达到 unchanged_ms
+TIMEOUT = 'timeout' # 超时
+
+
+class CaptureBackend:
+    def __init__(self):
+        self._screen_size = None
+
+    def screen_size(self) -> tuple:
+        '''
+        返回 (宽, 高)，只查询一次
+        '''
+        if self._screen_size is None:
+            self._screen_size = self._query_screen_size()
+        return self._screen_size
+
+    def invalidate(self):
+        '''
+        显示器分辨率变化后调用，下次截图时重新查询屏幕尺寸
+        '''
+        self._screen_size = None
+
+    def resolve(self, range: list) -> tuple:
+        '''
+        把相对坐标转换为像素坐标 (left, top, right, bottom)
+        '''
+        if range[0] < 1:
+            width, height = self.screen_size()
+            return (int(width * range[0]), int(height * range[1]),
+                    int(width * range[2]), int(height * range[3]))
+        return tuple(int(v) for v in range)
+
+    def grab(self, range: list) -> np.ndarray:
+        return self._grab(*self.resolve(range))
+
+    def grab_regions(self, ranges: dict) -> dict:
+        '''
+        只截取所有范围的并集一次，返回 {名称: 切片视图}，视图不复制像素
+
+        ranges：{名称: [left, top, right, bottom]}
+        '''
+        rects = {name: self.resolve(range) for name, range in ranges.items()}
+        left = min(rect[0] for rect in rects.values())
+        top = min(rect[1] for rect in rects.values())
+        right = max(rect[2] for rect in rects.values())
+        bottom = max(rect[3] for rect in rects.values())
+        frame = self._grab(left, top, right, bottom)
+        return {name: frame[rect[1] - top:rect[3] - top, rect[0] - left:rect[2] - left]
+                for name, rect in rects.items()}
+
+    def thumbnail(self, range: list, step: int = THUMBNAIL_STEP) -> np.ndarray:
+        '''
+        按步长降采样的绿色通道，用于快速比较画面是否变化
+        '''
+        return self.grab(range)[::step, ::step, 1].astype(np.int16)
+
+    def wait_until_changed(self, range: list, reference: np.ndarray = None, timeout_ms: int = 500,
+                           settle_ms: int = 30, poll_ms: int = 5, threshold: float = 4.0,
+                           unchanged_ms: int = None) -> str:
+        '''
+        高频轮询范围内的缩略图，画面与 reference 不同并且稳定 settle_ms 后立即返回
+
+        reference：点击前的缩略图（thumbnail() 的返回值），为None时只等待画面稳定
+
+        threshold：平均像素差超过该值视为变化
+
+        unchanged_ms：画面一直与 reference 相同达到该时长时提前返回 UNCHANGED，为None时一直等到变化或超时
+
+        返回 REDRAWN（变化后稳定）、UNCHANGED 或 TIMEOUT；只有 REDRAWN 说明画面确实已经重绘
+        '''
+        start = time.perf_counter()
+        deadline = start + timeout_ms / 1000
+        last = None
+        stable_since = None
+        while True:
+            current = self.thumbnail(range)
+            now = time.perf_counter()
+            if now >= deadline:
+                return TIMEOUT
+            if last is None:
+                if reference is None or _frame_diff(current, reference) > threshold:
+                    last = current
+                    stable_since = now
+                elif unchanged_ms is not None and now - start >= unchanged_ms / 1000:
+                    return UNCHANGED
+            elif _frame_diff(current, last) > threshold:
+                last = current
+                stable_since = now
+            elif now - stable_since >= settle_ms / 1000:
+                return REDRAWN
+            time.sleep(poll_ms / 1000)
+
+    def _query_screen_size(self) -> tuple:
+        raise NotImplementedError
+
+    def _grab(self, left: int, top: int, right: int, bottom: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _frame_diff(a: np.ndarray, b: np.ndarray) -> float:
+    if a.shape != b.shape:
+        return float('inf')
+    return float(np.abs(a - b).mean())
+
+
+class MssCapture(CaptureBackend):
+    '''
+    基于mss的常驻截图后端，每个线程复用同一个mss实例（mss实例不能跨线程使用）
+    '''
+    def __init__(self):
+        super().__init__()
+        import mss
+        self._mss = mss
+        self._local = threading.local()
+
+    def _grabber(self):
+        grabber = getattr(self._local, 'grabber', None)
+        if grabber is None:
+            grabber = self._local.grabber = self._mss.mss()
+        return grabber
+
+    def _query_screen_size(self) -> tuple:
+        monitor = self._grabber().monitors[1]
+        return monitor['width'], monitor['height']
+
+    def _grab(self, left, top, right, bottom):
+        shot = self._grabber().grab({'left': left, 'top': top, 'width': right - left, 'height': bottom - top})
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        # BGRA -> RGB 视图
+        return bgra[..., 2::-1]
+
+
+class PyAutoGuiCapture(CaptureBackend):
+    '''
+    pyautogui截图后端，没有安装mss时使用
+    '''
+    def _query_screen_size(self) -> tuple:
+        import pyautogui
+        size = pyautogui.size()
+        return size.width, size.height
+
+    def _grab(self, left, top, right, bottom):
+        import pyautogui
+        return np.asarray(pyautogui.screenshot(region=(left, top, right - left, bottom - top)).convert('RGB'))
+
+
+class ReplayCapture(CaptureBackend):
+    '''
+    回放录制好的全屏截图，用于在没有游戏的环境下测试
+
+    frames：截图文件目录（.png/.npy，按文件名排序）或 numpy 数组列表
+
+    loop：播放完后是否从头开始
+
+    每调用一次 next_frame() 切换到下一帧；auto_advance 为True时每次截图后自动切换
+    '''
+    def __init__(self, frames, loop: bool = True, auto_advance: bool = False):
+        super().__init__()
+        if isinstance(frames, str):
+            self.names, frames = self._load_dir(frames)
+        else:
+            self.names = [str(i) for i in range(len(frames))]
+        if not frames:
+            raise ValueError('没有可回放的截图')
+        self.frames = frames
+        self.loop = loop
+        self.auto_advance = auto_advance
+        self.index = 0
+
+    @staticmethod
+    def _load_dir(directory: str) -> tuple:
+        '''
+        返回 (文件名列表, 截图列表)
+        '''
+        from PIL import Image
+        names = []
+        frames = []
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if name.endswith('.npy'):
+                frames.append(np.load(path))
+            elif name.lower().endswith(('.png', '.bmp', '.jpg')):
+                frames.append(np.asarray(Image.open(path).convert('RGB')))
+            else:
+                continue
+            names.append(name)
+        return names, frames
+
+    @property
+    def current(self) -> np.ndarray:
+        return self.frames[self.index]
+
+    @property
+    def current_name(self) -> str:
+        return self.names[self.index]
+
+    def next_frame(self) -> bool:
+        '''
+        切换到下一帧，已经是最后一帧且不循环时返回False
+        '''
+        if self.index + 1 < len(self.frames):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+        else:
+            return False
+        return True
+
+    def _query_screen_size(self) -> tuple:
+        height, width = self.frames[0].shape[:2]
+        return width, height
+
+    def _grab(self, left, top, right, bottom):
+        frame = self.current[top:bottom, left:right]
+        if self.auto_advance:
+            self.next_frame()
+        return frame
+
+
+def create_capture_backend(name: str = 'mss') -> CaptureBackend:
+    '''
+    name：'mss'、'pyautogui' 或 'replay:<截图目录>'
+    '''
+    if name.startswith('replay:'):
+        return ReplayCapture(name[len('replay:'):])
+    if name == 'mss':
+        try:
+            return MssCapture()
+        except ImportError:
+            print('未安装mss，使用pyautogui截图')
+    return PyAutoGuiCapture()
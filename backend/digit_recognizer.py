@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+'''
+基于模板匹配的数字识别器
+
+价格和哈夫币余额使用固定的游戏字体，只包含数字和逗号，
+按列投影切分字符后与模板逐个比对，比神经网络快几个数量级。
+
+生成模板：
+    python backend/digit_recognizer.py <标注截图目录> <输出.npz>
+
+截图文件名中第一个"_"之前的部分是标注内容，例如 "1,234,567_01.png"
+'''
+
+import os
+import sys
+import numpy as np
+
+if __name__ == '__main__':
+    from utils import preprocess_number_crop
+else:
+    from backend.utils import preprocess_number_crop
+
+# 归一化后的单个字符尺寸 (高, 宽)
+GLYPH_SIZE = (24, 12)
+# 字符格子高度与数字高度之比，多出的部分用来容纳逗号的下沿
+CELL_HEIGHT_RATIO = 1.3
+
+
+def _ink_mask(img):
+    '''
+    返回裁剪到字迹包围盒的布尔掩码，没有字迹时返回None
+    '''
+    binary = preprocess_number_crop(img, padding=0)
+    if binary is None:
+        return None
+    return binary == 0
+
+def segment_glyphs(ink: np.ndarray) -> list:
+    '''
+    按列投影把一行字迹切分成单个字符
+
+    每个字符的格子从行顶开始、高度为数字高度的 CELL_HEIGHT_RATIO 倍，
+    这样逗号总是落在格子底部，而且有没有逗号都不影响数字的缩放比例
+    '''
+    columns = np.concatenate(([False], ink.any(axis=0), [False]))
+    edges = np.flatnonzero(np.diff(columns.astype(np.int8)))
+    spans = list(zip(edges[::2], edges[1::2]))
+    if not spans:
+        return []
+    # 数字都顶格，取顶格字符中最高的作为数字高度
+    digit_height = 0
+    for start, end in spans:
+        rows = np.flatnonzero(ink[:, start:end].any(axis=1))
+        if rows[0] == 0:
+            digit_height = max(digit_height, rows[-1] + 1)
+    cell_height = int(np.ceil(digit_height * CELL_HEIGHT_RATIO))
+    if ink.shape[0] < cell_height:
+        ink = np.pad(ink, ((0, cell_height - ink.shape[0]), (0, 0)))
+    return [ink[:cell_height, start:end] for start, end in spans]
+
+def normalize_glyph(glyph: np.ndarray) -> np.ndarray:
+    '''
+    最近邻缩放到 GLYPH_SIZE 并做零均值、单位方差归一化，返回一维向量
+    '''
+    height, width = GLYPH_SIZE
+    rows = (np.arange(height) * glyph.shape[0] // height)
+    cols = (np.arange(width) * glyph.shape[1] // width)
+    cell = glyph[rows[:, None], cols].astype(np.float32).ravel()
+    cell -= cell.mean()
+    norm = np.linalg.norm(cell)
+    return cell / norm if norm > 0 else cell
+
+
+class DigitTemplateRecognizer:
+    def __init__(self, labels, templates: np.ndarray):
+        self.labels = np.asarray(labels)
+        self.templates = np.asarray(templates, dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str):
+        '''
+        从 .npz 文件加载模板，文件不存在时返回None
+        '''
+        if not path or not os.path.exists(path):
+            return None
+        data = np.load(path)
+        return cls(data['labels'], data['templates'])
+
+    def save(self, path: str):
+        np.savez(path, labels=self.labels, templates=self.templates)
+
+    def recognize(self, img):
+        '''
+        识别截图中的数字
+
+        返回 (数字字符串, 匹配分数)，分数为所有字符中最差的相关系数 (-1~1)；
+        无法切分或没有数字时返回 (None, 0.0)
+        '''
+        ink = _ink_mask(img)
+        if ink is None:
+            return None, 0.0
+        glyphs = segment_glyphs(ink)
+        if not glyphs:
+            return None, 0.0
+        vectors = np.stack([normalize_glyph(glyph) for glyph in glyphs])
+        scores = vectors @ self.templates.T
+        best = scores.argmax(axis=1)
+        score = float(scores[np.arange(len(glyphs)), best].min())
+        text = ''.join(self.labels[best]).replace(',', '')
+        if not text.isdigit():
+            return None, 0.0
+        return text, score
+
+
+def build_templates(samples) -> DigitTemplateRecognizer:
+    '''
+    从标注截图生成模板
+
+    samples：[(截图, 标注文本), ...]，标注文本要和截图中的字符一一对应（包括逗号）
+
+    切分出的字符数和标注长度不一致的样本会被跳过
+    '''
+    collected = {}
+    for img, label in samples:
+        ink = _ink_mask(img)
+        glyphs = segment_glyphs(ink) if ink is not None else []
+        if len(glyphs) != len(label):
+            print(f'跳过样本 {label}：切分出 {len(glyphs)} 个字符')
+            continue
+        for char, glyph in zip(label, glyphs):
+            collected.setdefault(char, []).append(normalize_glyph(glyph))
+    if not collected:
+        raise ValueError('没有可用的标注样本')
+
+    labels = sorted(collected)
+    templates = []
+    for char in labels:
+        mean = np.mean(collected[char], axis=0)
+        mean -= mean.mean()
+        templates.append(mean / np.linalg.norm(mean))
+    return DigitTemplateRecognizer(labels, np.stack(templates))
+
+def load_labelled_dir(directory: str) -> list:
+    '''
+    读取目录中的标注截图，文件名中第一个"_"之前的部分是标注内容
+    '''
+    from PIL import Image
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in ('.png', '.bmp', '.jpg'):
+            continue
+        label = stem.split('_')[0]
+        samples.append((Image.open(os.path.join(directory, name)).convert('RGB'), label))
+    return samples
+
+def main():
+    if len(sys.argv) != 3:
+        print('用法: python backend/digit_recognizer.py <标注截图目录> <输出.npz>')
+        return 1
+    recognizer = build_templates(load_labelled_dir(sys.argv[1]))
+    recognizer.save(sys.argv[2])
+    print(f'已生成模板: {"".join(recognizer.labels)} -> {sys.argv[2]}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
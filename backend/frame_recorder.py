@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+'''
+调试截图记录
+
+最近 capacity 张识别用的截图连同识别结果和耗时保存在预分配的环形缓冲区中，循环里只做一次内存复制。
+识别失败或按热键时把缓冲区的副本交给后台线程写成PNG，不影响循环速度。
+
+    seq = recorder.record(img, 'price')
+    ...
+    recorder.annotate(seq, value)
+    recorder.flush('recognition_failed')
+'''
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import numpy as np
+
+_STOP = object()
+
+
+class FrameRecorder:
+    '''
+    capacity：保存的截图数量
+
+    max_size：单张截图的最大 (高, 宽)，超出部分不保存
+
+    directory：写入目录，每次写入生成一个子目录
+
+    min_interval_s：识别失败触发的写入之间的最小间隔，避免连续失败时频繁写盘；热键触发不受限制
+
+    enabled：为False时 record() 直接返回
+    '''
+    def __init__(self, capacity: int = 64, max_size: tuple = (64, 768), directory: str = 'debug_frames',
+                 min_interval_s: float = 10, enabled: bool = True):
+        self.capacity = capacity
+        self.max_size = max_size
+        self.directory = directory
+        self.min_interval_s = min_interval_s
+        self.enabled = enabled
+        self._frames = np.zeros((capacity,) + tuple(max_size) + (3,), dtype=np.uint8)
+        self._shapes = np.zeros((capacity, 2), dtype=np.int32)
+        self._seqs = np.full(capacity, -1, dtype=np.int64)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._values = [None] * capacity
+        self._regions = [None] * capacity
+        self._latencies = np.full(capacity, np.nan, dtype=np.float64)
+        self._count = 0
+        self._last_auto_flush = 0.0
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def record(self, img, region: str) -> int:
+        '''
+        复制截图到环形缓冲区，返回用于 annotate() 的编号；未启用时返回-1
+        '''
+        if not self.enabled:
+            return -1
+        img = np.asarray(img)
+        h = min(img.shape[0], self.max_size[0])
+        w = min(img.shape[1], self.max_size[1])
+        with self._lock:
+            seq = self._count
+            i = seq % self.capacity
+            self._frames[i, :h, :w] = img[:h, :w, :3] if img.ndim == 3 else img[:h, :w, None]
+            self._shapes[i] = (h, w)
+            self._seqs[i] = seq
+            self._timestamps[i] = time.time()
+            self._values[i] = None
+            self._regions[i] = region
+            self._latencies[i] = np.nan
+            self._count += 1
+        return seq
+
+    def annotate(self, seq: int, value):
+        '''
+        记录识别结果和从截图到拿到结果的耗时；该截图已经被覆盖时忽略
+        '''
+        if seq < 0:
+            return
+        with self._lock:
+            i = seq % self.capacity
+            if self._seqs[i] == seq:
+                self._values[i] = value
+                self._latencies[i] = (time.time() - self._timestamps[i]) * 1000
+
+    def flush(self, reason: str, force: bool = True) -> bool:
+        '''
+        把当前缓冲区的副本交给后台线程写入；force 为False时受 min_interval_s 限制
+
+        返回是否提交了写入
+        '''
+        if not self.enabled:
+            return False
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_auto_flush < self.min_interval_s:
+                return False
+            n = min(self._count, self.capacity)
+            if n == 0:
+                return False
+            if not force:
+                self._last_auto_flush = now
+            order = (np.arange(n) + self._count - n) % self.capacity
+            snapshot = [{
+                'seq': int(self._seqs[i]),
+                'ts': float(self._timestamps[i]),
+                'region': self._regions[i],
+                'value': self._values[i],
+                'latency_ms': None if np.isnan(self._latencies[i]) else float(self._latencies[i]),
+                'image': self._frames[i, :self._shapes[i][0], :self._shapes[i][1]].copy(),
+            } for i in order]
+        self._ensure_started()
+        self._queue.put((reason, now, snapshot))
+        return True
+
+    def close(self, timeout: float = 5):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='FrameRecorder', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            try:
+                self._write(*job)
+            except Exception as e:
+                sys.stderr.write(f'写入调试截图失败: {e}\n')
+
+    def _write(self, reason: str, ts: float, snapshot: list):
+        from PIL import Image
+        name = time.strftime('%Y%m%d_%H%M%S', time.localtime(ts)) + f'_{int(ts * 1000) % 1000:03d}_{reason}'
+        path = os.path.join(self.directory, name)
+        os.makedirs(path, exist_ok=True)
+        index = []
+        for frame in snapshot:
+            filename = f"{frame['seq']:06d}_{frame['region']}_{frame['value']}.png"
+            Image.fromarray(frame.pop('image')).save(os.path.join(path, filename))
+            frame['file'] = filename
+            index.append(frame)
+        with open(os.path.join(path, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump({'reason': reason, 'ts': ts, 'frames': index}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+'''
+键鼠输入引擎
+
+pyautogui每个调用之后都会固定sleep pyautogui.PAUSE（默认0.1秒），
+一次点击 moveTo + mouseDown + mouseUp 就要0.3秒。
+这里把一串操作作为一个组合动作执行，步骤之间的间隔由配置显式控制。
+
+组合动作是步骤列表，例如：
+    [click(max_number), click(buy_button)]
+
+与pyautogui的FAILSAFE相同，执行每一步之前检查鼠标，鼠标在屏幕任一角时抛出 InputFailSafe，
+原生后端也可以通过把鼠标甩到角落紧急停止。
+'''
+
+import sys
+import time
+
+
+class InputFailSafe(Exception):
+    '''
+    鼠标被移到屏幕角落，停止输入
+    '''
+
+
+def click(position: list, num: int = 1):
+    return ('click', position, num)
+
+def move(position: list):
+    return ('move', position)
+
+def press(key: str):
+    return ('press', key)
+
+def wait(ms: int):
+    return ('wait', ms)
+
+
+class InputBackend:
+    def screen_size(self) -> tuple:
+        raise NotImplementedError
+
+    def cursor_position(self):
+        '''
+        当前鼠标位置，无法获取时返回None
+        '''
+        return None
+
+    def move(self, x: int, y: int):
+        raise NotImplementedError
+
+    def mouse_down(self):
+        raise NotImplementedError
+
+    def mouse_up(self):
+        raise NotImplementedError
+
+    def press(self, key: str):
+        raise NotImplementedError
+
+
+class PyAutoGuiInput(InputBackend):
+    '''
+    pyautogui后端，关闭每次调用后的固定暂停
+    '''
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def screen_size(self):
+        size = self._pyautogui.size()
+        return size.width, size.height
+
+    def cursor_position(self):
+        position = self._pyautogui.position()
+        return position.x, position.y
+
+    def move(self, x, y):
+        self._pyautogui.moveTo(x, y, _pause=False)
+
+    def mouse_down(self):
+        self._pyautogui.mouseDown(_pause=False)
+
+    def mouse_up(self):
+        self._pyautogui.mouseUp(_pause=False)
+
+    def press(self, key):
+        self._pyautogui.press(key, _pause=False)
+
+
+class Win32Input(InputBackend):
+    '''
+    直接调用user32的原生后端
+    '''
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    KEYEVENTF_KEYUP = 0x0002
+    VIRTUAL_KEYS = {'esc': 0x1B, 'enter': 0x0D, 'space': 0x20}
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._user32 = ctypes.windll.user32
+        self._point = wintypes.POINT()
+        self._point_ref = ctypes.byref(self._point)
+
+    def screen_size(self):
+        return self._user32.GetSystemMetrics(0), self._user32.GetSystemMetrics(1)
+
+    def cursor_position(self):
+        if not self._user32.GetCursorPos(self._point_ref):
+            return None
+        return self._point.x, self._point.y
+
+    def move(self, x, y):
+        self._user32.SetCursorPos(x, y)
+
+    def mouse_down(self):
+        self._user32.mouse_event(self.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
+
+    def mouse_up(self):
+        self._user32.mouse_event(self.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+
+    def press(self, key):
+        vk = self.VIRTUAL_KEYS[key]
+        self._user32.keybd_event(vk, 0, 0, 0)
+        self._user32.keybd_event(vk, 0, self.KEYEVENTF_KEYUP, 0)
+
+
+class RecordingInput(InputBackend):
+    '''
+    不发送任何输入，只记录动作，用于测试和回放
+    '''
+    def __init__(self, screen_size: tuple = (2560, 1440)):
+        self._screen_size = screen_size
+        self.actions = []
+
+    def screen_size(self):
+        return self._screen_size
+
+    def move(self, x, y):
+        self.actions.append((time.perf_counter(), 'move', (x, y)))
+
+    def mouse_down(self):
+        self.actions.append((time.perf_counter(), 'down', None))
+
+    def mouse_up(self):
+        self.actions.append((time.perf_counter(), 'up', None))
+
+    def press(self, key):
+        self.actions.append((time.perf_counter(), 'press', key))
+
+
+class InputEngine:
+    '''
+    backend：输入后端
+
+    step_delay_ms：组合动作中相邻两步之间的间隔
+
+    click_hold_ms：按下和抬起鼠标之间的间隔
+
+    failsafe：为True时鼠标在屏幕任一角就抛出 InputFailSafe
+    '''
+    def __init__(self, backend: InputBackend, step_delay_ms: int = 0, click_hold_ms: int = 0,
+                 failsafe: bool = True):
+        self.backend = backend
+        self.step_delay_ms = step_delay_ms
+        self.click_hold_ms = click_hold_ms
+        self.failsafe = failsafe
+        self._screen_size = None
+
+    def resolve(self, position: list) -> tuple:
+        '''
+        相对坐标转换为像素坐标，屏幕尺寸只查询一次
+        '''
+        x, y = position[0], position[1]
+        if x < 1:
+            if self._screen_size is None:
+                self._screen_size = self.backend.screen_size()
+            width, height = self._screen_size
+            x = int(width * x)
+            y = int(height * y)
+        return int(x), int(y)
+
+    def invalidate(self):
+        self._screen_size = None
+
+    def check_failsafe(self):
+        '''
+        鼠标在屏幕任一角时抛出 InputFailSafe
+        '''
+        if not self.failsafe:
+            return
+        cursor = self.backend.cursor_position()
+        if cursor is None:
+            return
+        if self._screen_size is None:
+            self._screen_size = self.backend.screen_size()
+        width, height = self._screen_size
+        if cursor[0] in (0, width - 1) and cursor[1] in (0, height - 1):
+            raise InputFailSafe(f'鼠标在屏幕角落 {tuple(cursor)}，已停止')
+
+    def run(self, sequence: list):
+        '''
+        执行组合动作，每一步之前检查 failsafe
+        '''
+        for i, step in enumerate(sequence):
+            if i > 0 and self.step_delay_ms > 0:
+                time.sleep(self.step_delay_ms / 1000)
+            self.check_failsafe()
+            self._run_step(step)
+
+    def _run_step(self, step):
+        kind = step[0]
+        if kind == 'click':
+            x, y = self.resolve(step[1])
+            for i in range(step[2]):
+                self.backend.move(x, y)
+                self.backend.mouse_down()
+                if self.click_hold_ms > 0:
+                    time.sleep(self.click_hold_ms / 1000)
+                self.backend.mouse_up()
+        elif kind == 'move':
+            self.backend.move(*self.resolve(step[1]))
+        elif kind == 'press':
+            self.backend.press(step[1])
+        elif kind == 'wait':
+            time.sleep(step[1] / 1000)
+        else:
+            raise ValueError(f'未知的输入动作: {kind}')
+
+    def click(self, position: list, num: int = 1):
+        self.run([click(position, num)])
+
+    def move(self, position: list):
+        self.run([move(position)])
+
+    def press(self, key: str):
+        self.run([press(key)])
+
+
+def create_input_backend(name: str = 'win32') -> InputBackend:
+    '''
+    name：'win32'、'pyautogui' 或 'null'
+    '''
+    if name == 'null':
+        return RecordingInput()
+    if name == 'win32' and sys.platform == 'win32':
+        return Win32Input()
+    return PyAutoGuiInput()
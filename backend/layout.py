@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+'''
+界面布局
+
+各分辨率下按钮和识别区域的坐标保存在 layouts/<宽>x<高>.json 中：
+
+    {
+      "resolution": [2560, 1440],
+      "points": {"postion_balance": [2200, 70], ...},
+      "rects": {"postion_balance_half_coin": [1930, 363, 2324, 387], ...}
+    }
+
+坐标以该分辨率的像素为单位，可以是小数。启动时按游戏所在显示器的分辨率选择布局，
+没有完全一致的分辨率时按宽高比最接近的布局缩放，一次性换算成带显示器偏移的整数像素坐标。
+之后截图和点击不再查询屏幕尺寸，也不再做坐标换算；显示器变化时调用 invalidate() 重新换算。
+'''
+
+import json
+import os
+import threading
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LayoutProfile:
+    '''
+    一个分辨率下的坐标集合
+    '''
+    def __init__(self, name: str, resolution: tuple, points: dict, rects: dict):
+        self.name = name
+        self.resolution = tuple(resolution)
+        self.points = points
+        self.rects = rects
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(os.path.splitext(os.path.basename(path))[0], data['resolution'],
+                   data.get('points', {}), data.get('rects', {}))
+
+    def resolve(self, monitor: tuple) -> dict:
+        '''
+        monitor：显示器 (left, top, right, bottom)
+
+        返回 {名称: 整数像素坐标}，点为 (x, y)，区域为 (left, top, right, bottom)
+        '''
+        left, top, right, bottom = monitor
+        scale_x = (right - left) / self.resolution[0]
+        scale_y = (bottom - top) / self.resolution[1]
+        resolved = {}
+        for name, (x, y) in self.points.items():
+            resolved[name] = (left + round(x * scale_x), top + round(y * scale_y))
+        for name, (x1, y1, x2, y2) in self.rects.items():
+            resolved[name] = (left + round(x1 * scale_x), top + round(y1 * scale_y),
+                              left + round(x2 * scale_x), top + round(y2 * scale_y))
+        return resolved
+
+
+def load_profiles(directory: str) -> list:
+    '''
+    读取目录中的所有布局，相对路径以项目目录为准
+    '''
+    if not os.path.isabs(directory):
+        directory = os.path.join(PROJECT_DIR, directory)
+    return [LayoutProfile.load(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory)) if name.endswith('.json')]
+
+def select_profile(profiles: list, width: int, height: int) -> LayoutProfile:
+    '''
+    优先选择分辨率完全一致的布局，否则选择宽高比最接近、分辨率最高的布局
+    '''
+    if not profiles:
+        raise ValueError('没有可用的布局文件')
+    for profile in profiles:
+        if profile.resolution == (width, height):
+            return profile
+    aspect = width / height
+    return min(profiles, key=lambda p: (abs(p.resolution[0] / p.resolution[1] - aspect), -p.resolution[0]))
+
+def monitor_rect(number: int, fallback_size) -> tuple:
+    '''
+    第 number 块显示器（从1开始）的 (left, top, right, bottom)；
+    无法枚举显示器（非Windows）时使用 fallback_size() 返回的 (宽, 高)
+    '''
+    try:
+        from monitors import enumerate_monitors
+        monitors = enumerate_monitors()
+    except (AttributeError, OSError, ImportError):
+        monitors = []
+    if not monitors:
+        width, height = fallback_size()
+        return (0, 0, width, height)
+    if number > len(monitors):
+        raise ValueError(f"目标显示器{number}不存在，只有{len(monitors)}块显示器")
+    return tuple(monitors[number - 1])
+
+
+class LayoutResolver:
+    '''
+    directory：布局文件目录
+
+    geometry：返回游戏所在显示器 (left, top, right, bottom) 的函数
+    '''
+    def __init__(self, directory: str, geometry):
+        self.profiles = load_profiles(directory)
+        self.geometry = geometry
+        self.profile = None
+        self.monitor = None
+        self._resolved = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> dict:
+        '''
+        返回换算好的坐标，只在第一次调用或 invalidate() 之后换算
+        '''
+        with self._lock:
+            if self._resolved is None:
+                self.monitor = tuple(self.geometry())
+                left, top, right, bottom = self.monitor
+                self.profile = select_profile(self.profiles, right - left, bottom - top)
+                self._resolved = self.profile.resolve(self.monitor)
+            return self._resolved
+
+    def invalidate(self):
+        with self._lock:
+            self._resolved = None
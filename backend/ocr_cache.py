@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# 感知哈希的采样网格 (行, 列)
+PERCEPTUAL_GRID = (12, 48)
+# 感知哈希命中后，与缓存截图逐像素比较的最大允许差值；噪点在该范围内，6/8/9/0 等数字笔画的差别远大于它
+PERCEPTUAL_TOLERANCE = 24
+
+
+class RecognitionCache:
+    '''
+    以截图像素哈希为键的识别结果LRU缓存
+
+    max_size：最多缓存的条目数
+
+    perceptual：为True时使用容忍轻微噪点的感知哈希，否则对原始像素做精确哈希。
+    感知哈希会把相近的数字（6/8/9/0）算成同一个键，所以同时保存截图，命中时逐像素核对，
+    差值超过 PERCEPTUAL_TOLERANCE 的视为未命中
+
+    get/put/clear 加锁，可以在多个线程中使用
+    '''
+    def __init__(self, max_size: int = 256, perceptual: bool = False):
+        self.max_size = max_size
+        self.perceptual = perceptual
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, img) -> bytes:
+        arr = np.ascontiguousarray(np.asarray(img))
+        if self.perceptual:
+            return self._perceptual_hash(arr)
+        digest = hashlib.blake2b(arr.data, digest_size=16)
+        digest.update(repr(arr.shape).encode())
+        return digest.digest()
+
+    @staticmethod
+    def _perceptual_hash(arr: np.ndarray) -> bytes:
+        '''
+        灰度图按网格取块均值，再以整体均值二值化（average hash）
+        '''
+        gray = arr[..., :3].mean(axis=2) if arr.ndim == 3 else arr.astype(np.float32)
+        grid_rows, grid_cols = PERCEPTUAL_GRID
+        row_starts = np.linspace(0, gray.shape[0], grid_rows, endpoint=False).astype(int)
+        col_starts = np.linspace(0, gray.shape[1], grid_cols, endpoint=False).astype(int)
+        blocks = np.add.reduceat(np.add.reduceat(gray, row_starts, axis=0), col_starts, axis=1)
+        bits = blocks > blocks.mean()
+        return np.packbits(bits).tobytes() + repr(arr.shape[:2]).encode()
+
+    def get(self, key: bytes, img = None):
+        '''
+        返回 (是否命中, 缓存的值)
+
+        img：生成 key 的截图，感知哈希模式下用于核对，不传时感知哈希模式总是未命中
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, crop = entry
+                if not self.perceptual or self._same_crop(crop, img):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+            self.misses += 1
+            return False, None
+
+    def put(self, key: bytes, value, img = None):
+        '''
+        img：生成 key 的截图，感知哈希模式下必须传入
+        '''
+        crop = np.array(img, dtype=np.int16) if self.perceptual and img is not None else None
+        with self._lock:
+            self._entries[key] = (value, crop)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _same_crop(crop, img) -> bool:
+        if crop is None or img is None:
+            return False
+        arr = np.asarray(img)
+        if arr.shape != crop.shape:
+            return False
+        return int(np.abs(arr.astype(np.int16) - crop).max()) <= PERCEPTUAL_TOLERANCE
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f'RecognitionCache(size={len(self)}/{self.max_size}, hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate:.1%})'
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import numpy as np
+
+if __name__ == '__main__':
+    from utils import preprocess_number_crop
+else:
+    from backend.utils import preprocess_number_crop
+
+NUMBER_ALLOWLIST = '0123456789,'
+
+
+def clean_number_text(text: str) -> str:
+    text = text.replace(',', '')
+    text = text.replace('.', '')
+    text = text.replace(' ', '')
+    return text
+
+def recognize_number(reader, img, min_confidence: float = 0.8):
+    '''
+    用EasyOCR识别截图中的数字
+
+    价格和余额区域的位置是固定的，先跳过CRAFT文字检测，只运行识别模型；
+    置信度低于 min_confidence 时回退到完整的检测+识别
+
+    返回 (数字, 置信度)，识别失败时返回 (None, 0.0)
+    '''
+    binary = preprocess_number_crop(img)
+    if binary is not None:
+        try:
+            _, text, confidence = reader.recognize(binary, allowlist=NUMBER_ALLOWLIST, detail=1)[0]
+            text = clean_number_text(text)
+            if confidence >= min_confidence and text.isdigit():
+                return int(text), float(confidence)
+        except:
+            pass
+    try:
+        _, text, confidence = reader.readtext(np.array(img))[-1]
+        text = clean_number_text(text)
+    except:
+        return None, 0.0
+    return (int(text), float(confidence)) if text.isdigit() else (None, 0.0)
+
+def recognize_numbers(reader, imgs: list, min_confidence: float = 0.8) -> list:
+    '''
+    一次识别多块截图中的数字
+
+    二值化后的截图上下拼成一张图，每块作为一个文字框，只调用一次识别模型；
+    置信度不足或没有识别出来的截图再单独用 recognize_number 识别
+
+    返回每块截图的 (数字, 置信度)
+    '''
+    results = [None] * len(imgs)
+    binaries = [preprocess_number_crop(img) for img in imgs]
+    slots = [i for i, binary in enumerate(binaries) if binary is not None]
+    if slots:
+        # 每块之间留出空白，识别结果按文字框的纵坐标对应回原来的截图
+        gap = 8
+        width = max(binaries[i].shape[1] for i in slots)
+        height = sum(binaries[i].shape[0] for i in slots) + gap * (len(slots) - 1)
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+        boxes = []
+        tops = []
+        y = 0
+        for i in slots:
+            h, w = binaries[i].shape
+            canvas[y:y + h, :w] = binaries[i]
+            boxes.append([0, w, y, y + h])
+            tops.append(y)
+            y += h + gap
+        try:
+            for box, text, confidence in reader.recognize(canvas, horizontal_list=boxes, free_list=[],
+                                                          allowlist=NUMBER_ALLOWLIST, detail=1):
+                top = min(point[1] for point in box)
+                slot = int(np.searchsorted(tops, top + gap / 2, side='right')) - 1
+                text = clean_number_text(text)
+                if 0 <= slot < len(slots) and confidence >= min_confidence and text.isdigit():
+                    results[slots[slot]] = (int(text), float(confidence))
+        except:
+            pass
+    return [result if result is not None else recognize_number(reader, img, min_confidence)
+            for img, result in zip(imgs, results)]
+
+
+class OcrEngine:
+    '''
+    在后台线程中导入并加载EasyOCR，避免阻塞界面启动
+
+    use_gpu：是否使用GPU，没有显卡时设为False
+
+    torch_threads：CPU推理使用的线程数，0表示使用torch的默认值
+
+    min_confidence：免检测识别的置信度下限
+
+    quantize：CPU推理时对识别模型做int8动态量化，与EasyOCR的默认值相同
+
+    on_ready：加载结束后在后台线程中调用，参数为是否加载成功
+    '''
+    def __init__(self, use_gpu: bool = False, torch_threads: int = 0, min_confidence: float = 0.8,
+                 quantize: bool = True, on_ready = None):
+        self.use_gpu = use_gpu
+        self.quantize = quantize
+        self.torch_threads = torch_threads
+        self.min_confidence = min_confidence
+        self.on_ready = on_ready
+        self.error = None
+        self._reader = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name='OcrEngineLoader', daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        start_time = time.perf_counter()
+        try:
+            import torch
+            use_gpu = self.use_gpu
+            if use_gpu and not torch.cuda.is_available():
+                # easyocr会静默地改用全精度CPU推理，这里明确改用CPU模式
+                print('未检测到可用的CUDA，OCR使用CPU推理')
+                use_gpu = False
+            if not use_gpu and self.torch_threads > 0:
+                torch.set_num_threads(self.torch_threads)
+            import easyocr
+            reader = easyocr.Reader(['en'], gpu=use_gpu, quantize=self.quantize)
+            # 预热：第一次推理会分配内存并初始化算子
+            dummy = np.full((24, 96), 255, dtype=np.uint8)
+            dummy[6:18, 8:88:10] = 0
+            reader.recognize(dummy, allowlist=NUMBER_ALLOWLIST)
+            self._reader = reader
+            print(f'OCR引擎加载完成，耗时 {time.perf_counter() - start_time:.1f}s')
+        except Exception as e:
+            self.error = e
+            print(f'OCR引擎加载失败: {e}')
+        finally:
+            self._ready.set()
+            if self.on_ready is not None:
+                self.on_ready(self._reader is not None)
+
+    def is_ready(self) -> bool:
+        return self._reader is not None
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        '''
+        等待加载结束，返回是否加载成功
+        '''
+        self.start()
+        self._ready.wait(timeout)
+        return self.is_ready()
+
+    @property
+    def reader(self):
+        '''
+        EasyOCR Reader，未加载完成时阻塞等待，加载失败时抛出异常
+        '''
+        if not self.wait_ready():
+            raise RuntimeError(f'OCR引擎不可用: {self.error}')
+        return self._reader
+
+    def recognize_number(self, img):
+        '''
+        返回 (数字, 置信度)，识别失败时返回 (None, 0.0)
+        '''
+        return recognize_number(self.reader, img, self.min_confidence)
+
+    def recognize_numbers(self, imgs: list) -> list:
+        '''
+        一次识别多块截图，返回每块的 (数字, 置信度)
+        '''
+        return recognize_numbers(self.reader, imgs, self.min_confidence)
+
+
+def create_ocr_engine(model: str = 'int8', use_gpu: bool = False, torch_threads: int = 0,
+                      min_confidence: float = 0.8, onnx_path: str = None, on_ready = None):
+    '''
+    model：'int8'（EasyOCR的默认设置，CPU推理时本来就做int8动态量化）、'fp32'（关闭量化，EasyOCR全精度）
+    或 'onnx'（导出的ONNX数字识别模型，置信度不足时回退到EasyOCR）
+    '''
+    if model == 'onnx':
+        if __name__ == '__main__':
+            from onnx_recognizer import OnnxOcrEngine
+        else:
+            from backend.onnx_recognizer import OnnxOcrEngine
+        fallback = OcrEngine(use_gpu=use_gpu, torch_threads=torch_threads, min_confidence=min_confidence)
+        return OnnxOcrEngine(onnx_path, threads=torch_threads, min_confidence=min_confidence, on_ready=on_ready,
+                             fallback=fallback)
+    if model not in ('int8', 'fp32'):
+        raise ValueError(f'未知的OCR模型: {model}')
+    return OcrEngine(use_gpu=use_gpu, torch_threads=torch_threads, min_confidence=min_confidence,
+                     quantize=model == 'int8', on_ready=on_ready)
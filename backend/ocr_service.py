@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+'''
+进程外OCR服务
+
+EasyOCR/torch推理在独立的工作进程中运行，不和Qt事件循环、键盘钩子线程争抢GIL。
+截图通过 multiprocessing.shared_memory 传递，管道里只传形状和识别结果。
+工作进程崩溃或超时无响应时会被自动重启。
+'''
+
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+# 单个截图的最大字节数，价格和余额截图远小于这个值
+MAX_CROP_BYTES = 512 * 2048 * 3
+
+
+def _serve(conn, shm_name: str, use_gpu: bool, torch_threads: int, min_confidence: float,
+           model: str, onnx_path: str):
+    '''
+    工作进程入口
+    '''
+    from backend.ocr_engine import create_ocr_engine
+    shm = shared_memory.SharedMemory(name=shm_name)
+    engine = create_ocr_engine(model, use_gpu=use_gpu, torch_threads=torch_threads,
+                               min_confidence=min_confidence, onnx_path=onnx_path)
+    ok = engine.wait_ready()
+    conn.send(('ready', ok))
+    try:
+        while ok:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == 'ping':
+                conn.send(('pong',))
+            elif message[0] == 'recognize':
+                shape = message[1]
+                img = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf).copy()
+                number, confidence = engine.recognize_number(img)
+                conn.send(('result', number, confidence))
+            elif message[0] == 'recognize_batch':
+                # 多块截图在共享内存中依次存放
+                imgs = []
+                offset = 0
+                for shape in message[1]:
+                    size = int(np.prod(shape))
+                    imgs.append(np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset).copy())
+                    offset += size
+                conn.send(('result_batch', engine.recognize_numbers(imgs)))
+            elif message[0] == 'stop':
+                break
+    finally:
+        shm.close()
+
+
+class _WorkerProcess:
+    def __init__(self, index: int, options: tuple):
+        self.index = index
+        self.options = options
+        self.process = None
+        self.conn = None
+        self.shm = None
+
+    def spawn(self, timeout_s: float) -> bool:
+        '''
+        启动工作进程并等待模型加载完成
+        '''
+        context = multiprocessing.get_context('spawn')
+        self.shm = shared_memory.SharedMemory(create=True, size=MAX_CROP_BYTES)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn, self.shm.name) + self.options,
+                                       name=f'OcrWorker-{self.index}', daemon=True)
+        self.process.start()
+        child_conn.close()
+        if not self.conn.poll(timeout_s):
+            return False
+        try:
+            return self.conn.recv() == ('ready', True)
+        except EOFError:
+            return False
+
+    def request(self, message: tuple, timeout_s: float):
+        self.conn.send(message)
+        if not self.conn.poll(timeout_s):
+            raise TimeoutError(f'OCR工作进程{self.index}无响应')
+        return self.conn.recv()
+
+    def recognize(self, img: np.ndarray, timeout_s: float):
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        if img.nbytes > MAX_CROP_BYTES:
+            raise ValueError(f'截图过大: {img.shape}')
+        np.ndarray(img.shape, dtype=np.uint8, buffer=self.shm.buf)[...] = img
+        reply = self.request(('recognize', img.shape), timeout_s)
+        return reply[1], reply[2]
+
+    def recognize_batch(self, imgs: list, timeout_s: float) -> list:
+        imgs = [np.ascontiguousarray(img, dtype=np.uint8) for img in imgs]
+        if sum(img.nbytes for img in imgs) > MAX_CROP_BYTES:
+            raise ValueError(f'截图过大: {[img.shape for img in imgs]}')
+        offset = 0
+        for img in imgs:
+            np.ndarray(img.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)[...] = img
+            offset += img.nbytes
+        reply = self.request(('recognize_batch', [img.shape for img in imgs]), timeout_s)
+        return reply[1]
+
+    def ping(self, timeout_s: float) -> bool:
+        try:
+            return self.is_alive() and self.request(('ping',), timeout_s) == ('pong',)
+        except (OSError, EOFError, TimeoutError):
+            return False
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def terminate(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+        if self.conn is not None:
+            self.conn.close()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+        self.process = self.conn = self.shm = None
+
+
+class OcrService:
+    '''
+    OCR工作进程池，接口与 OcrEngine 相同（start / is_ready / wait_ready / recognize_number / recognize_numbers）
+
+    pool_size：工作进程数量，多于1个时某个进程重启期间其他进程继续识别
+
+    timeout_s：单次识别的超时时间，超时的工作进程会被重启
+
+    health_interval_s：空闲时检查工作进程是否存活的间隔
+
+    model / onnx_path：工作进程中使用的识别模型，见 create_ocr_engine
+    '''
+    def __init__(self, pool_size: int = 1, use_gpu: bool = False, torch_threads: int = 0,
+                 min_confidence: float = 0.8, timeout_s: float = 5, health_interval_s: float = 5,
+                 model: str = 'int8', onnx_path: str = None, on_ready = None):
+        self.timeout_s = timeout_s
+        self.health_interval_s = health_interval_s
+        self.on_ready = on_ready
+        self.restarts = 0
+        options = (use_gpu, torch_threads, min_confidence, model, onnx_path)
+        self._workers = [_WorkerProcess(i, options) for i in range(pool_size)]
+        self._idle = queue.Queue()
+        self._ready = threading.Event()
+        self._ok = False
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='OcrService', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        start_time = time.perf_counter()
+        # 模型加载耗时较长，给启动留足时间
+        for worker in self._workers:
+            if worker.spawn(timeout_s=max(self.timeout_s, 120)):
+                self._idle.put(worker)
+            else:
+                print(f'OCR工作进程{worker.index}启动失败')
+                worker.terminate()
+        self._ok = not self._idle.empty()
+        if self._ok:
+            print(f'OCR服务启动完成，{self._idle.qsize()}个工作进程，耗时 {time.perf_counter() - start_time:.1f}s')
+        self._ready.set()
+        if self.on_ready is not None:
+            self.on_ready(self._ok)
+        while self._ok and not self._closed:
+            time.sleep(self.health_interval_s)
+            self.check_health()
+
+    def is_ready(self) -> bool:
+        return self._ok
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        self.start()
+        self._ready.wait(timeout)
+        return self._ok
+
+    def recognize_number(self, img):
+        '''
+        返回 (数字, 置信度)，识别失败或工作进程异常时返回 (None, 0.0)
+        '''
+        if not self.wait_ready():
+            raise RuntimeError('OCR服务不可用')
+        try:
+            worker = self._idle.get(timeout=self.timeout_s)
+        except queue.Empty:
+            return None, 0.0
+        try:
+            result = worker.recognize(img, self.timeout_s)
+        except (OSError, EOFError, TimeoutError) as e:
+            print(f'OCR工作进程{worker.index}异常: {e}，正在重启')
+            self._restart(worker)
+            return None, 0.0
+        self._idle.put(worker)
+        return result
+
+    def recognize_numbers(self, imgs: list) -> list:
+        '''
+        一次识别多块截图，返回每块的 (数字, 置信度)
+        '''
+        if not self.wait_ready():
+            raise RuntimeError('OCR服务不可用')
+        failed = [(None, 0.0)] * len(imgs)
+        try:
+            worker = self._idle.get(timeout=self.timeout_s)
+        except queue.Empty:
+            return failed
+        try:
+            result = worker.recognize_batch(imgs, self.timeout_s)
+        except (OSError, EOFError, TimeoutError) as e:
+            print(f'OCR工作进程{worker.index}异常: {e}，正在重启')
+            self._restart(worker)
+            return failed
+        self._idle.put(worker)
+        return result
+
+    def check_health(self):
+        '''
+        检查空闲的工作进程，重启已经退出或无响应的进程
+        '''
+        for i in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker.ping(self.timeout_s):
+                self._idle.put(worker)
+            else:
+                print(f'OCR工作进程{worker.index}无响应，正在重启')
+                self._restart(worker)
+
+    def _restart(self, worker: _WorkerProcess):
+        '''
+        在后台线程中重启工作进程，重启完成后放回空闲队列
+        '''
+        def restart():
+            worker.terminate()
+            self.restarts += 1
+            if worker.spawn(timeout_s=max(self.timeout_s, 120)):
+                self._idle.put(worker)
+            else:
+                print(f'OCR工作进程{worker.index}重启失败')
+                worker.terminate()
+        threading.Thread(target=restart, name=f'OcrWorkerRestart-{worker.index}', daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.conn.send(('stop',))
+            except (AttributeError, OSError):
+                pass
+            worker.terminate()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+'''
+ONNX数字识别模型
+
+把EasyOCR的识别模型导出为固定输入尺寸的ONNX图，用onnxruntime在CPU上推理，
+解码时只保留数字和逗号。不需要加载torch和文字检测模型，启动和推理都比原模型快。
+
+导出（需要torch、easyocr和onnx，--int8 还需要onnxruntime）：
+    python backend/onnx_recognizer.py <输出.onnx> [--width 512] [--int8]
+
+导出时在同一目录生成 <输出.onnx>.json，保存字符表和输入尺寸。
+'''
+
+import json
+import math
+import sys
+import threading
+import time
+import numpy as np
+
+if __name__ == '__main__':
+    from utils import preprocess_number_crop
+else:
+    from backend.utils import preprocess_number_crop
+
+NUMBER_CHARACTERS = '0123456789,'
+# EasyOCR识别模型的输入高度
+INPUT_HEIGHT = 64
+INPUT_WIDTH = 512
+
+
+def export_onnx(path: str, width: int = INPUT_WIDTH, int8: bool = False):
+    '''
+    导出EasyOCR英文识别模型，输入为 (批量, 1, 64, width)，输出为每个时间步的字符得分
+    '''
+    import torch
+    import easyocr
+
+    # 动态量化后的LSTM无法导出，先加载全精度模型
+    reader = easyocr.Reader(['en'], gpu=False, detector=False, quantize=False)
+    model = reader.recognizer
+    model = getattr(model, 'module', model)
+    model.eval()
+
+    class _Recognizer(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            # 第二代识别模型不使用 text 参数
+            return self.model(image, None)
+
+    dummy = torch.zeros(1, 1, INPUT_HEIGHT, width)
+    float_path = path + '.fp32.onnx' if int8 else path
+    torch.onnx.export(_Recognizer(model), dummy, float_path, input_names=['image'], output_names=['logits'],
+                      dynamic_axes={'image': {0: 'batch'}, 'logits': {0: 'batch'}}, opset_version=13)
+    if int8:
+        import os
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(float_path, path, weight_type=QuantType.QInt8)
+        os.remove(float_path)
+    with open(path + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'characters': reader.character, 'height': INPUT_HEIGHT, 'width': width}, f, ensure_ascii=False)
+
+def _confidence(probabilities: np.ndarray) -> float:
+    '''
+    与EasyOCR相同的置信度计算方式
+    '''
+    if probabilities.size == 0:
+        return 0.0
+    return float(probabilities.prod() ** (2.0 / math.sqrt(probabilities.size)))
+
+
+class OnnxNumberRecognizer:
+    '''
+    path：export_onnx 导出的模型文件
+
+    threads：onnxruntime推理线程数，0表示使用默认值
+    '''
+    def __init__(self, path: str, threads: int = 0):
+        import onnxruntime
+        with open(path + '.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.height = meta['height']
+        self.width = meta['width']
+        # 第0类是CTC空白
+        classes = ['[blank]'] + list(meta['characters'])
+        self.allowed = np.array([0] + [i for i, c in enumerate(classes) if c in NUMBER_CHARACTERS])
+        self.labels = [classes[i] for i in self.allowed]
+        options = onnxruntime.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def prepare(self, img) -> np.ndarray:
+        '''
+        二值化、等比缩放到模型高度，右侧用最后一列填充到固定宽度，归一化到 [-1, 1]
+        '''
+        from PIL import Image
+        binary = preprocess_number_crop(img)
+        if binary is None:
+            return None
+        h, w = binary.shape
+        resized_w = min(math.ceil(self.height * w / h), self.width)
+        resized = np.asarray(Image.fromarray(binary).resize((resized_w, self.height), Image.BICUBIC), dtype=np.float32)
+        padded = np.empty((self.height, self.width), dtype=np.float32)
+        padded[:, :resized_w] = resized
+        padded[:, resized_w:] = resized[:, -1:]
+        return (padded / 255 - 0.5) / 0.5
+
+    def recognize_batch(self, imgs: list) -> list:
+        '''
+        返回每块截图的 (文本, 置信度)，无法识别时为 (None, 0.0)
+        '''
+        results = [(None, 0.0)] * len(imgs)
+        prepared = [self.prepare(img) for img in imgs]
+        slots = [i for i, x in enumerate(prepared) if x is not None]
+        if not slots:
+            return results
+        batch = np.stack([prepared[i] for i in slots])[:, None]
+        logits = self.session.run(None, {'image': batch})[0][:, :, self.allowed]
+        logits = logits - logits.max(axis=2, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=2, keepdims=True)
+        best = probabilities.argmax(axis=2)
+        for slot, indices, probs in zip(slots, best, probabilities):
+            # CTC贪心解码：合并相邻的重复字符并去掉空白
+            keep = (indices != 0) & np.concatenate(([True], indices[1:] != indices[:-1]))
+            text = ''.join(self.labels[i] for i in indices[keep])
+            results[slot] = (text, _confidence(probs.max(axis=1)[indices != 0]))
+        return results
+
+
+class OnnxOcrEngine:
+    '''
+    接口与 OcrEngine 相同，使用ONNX数字识别模型
+
+    fallback：置信度低于 min_confidence 的截图改用该引擎识别（通常是 OcrEngine，先免检测识别再回退到完整的readtext），
+    与ONNX模型一起在后台加载，加载完成前或为None时视为识别失败
+    '''
+    def __init__(self, path: str, threads: int = 0, min_confidence: float = 0.8, on_ready = None,
+                 fallback = None):
+        self.path = path
+        self.threads = threads
+        self.min_confidence = min_confidence
+        self.on_ready = on_ready
+        self.fallback = fallback
+        self.error = None
+        self._recognizer = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name='OnnxOcrLoader', daemon=True)
+            self._thread.start()
+            if self.fallback is not None:
+                self.fallback.start()
+
+    def _load(self):
+        start_time = time.perf_counter()
+        try:
+            recognizer = OnnxNumberRecognizer(self.path, self.threads)
+            # 预热
+            dummy = np.full((24, 96), 255, dtype=np.uint8)
+            dummy[6:18, 8:88:10] = 0
+            recognizer.recognize_batch([dummy])
+            self._recognizer = recognizer
+            print(f'ONNX识别模型加载完成，耗时 {time.perf_counter() - start_time:.1f}s')
+        except Exception as e:
+            self.error = e
+            print(f'ONNX识别模型加载失败: {e}')
+        finally:
+            self._ready.set()
+            if self.on_ready is not None:
+                self.on_ready(self._recognizer is not None)
+
+    def is_ready(self) -> bool:
+        return self._recognizer is not None
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        self.start()
+        self._ready.wait(timeout)
+        return self.is_ready()
+
+    def recognize_numbers(self, imgs: list) -> list:
+        '''
+        返回每块截图的 (数字, 置信度)，识别失败时为 (None, 0.0)
+        '''
+        if not self.wait_ready():
+            raise RuntimeError(f'ONNX识别模型不可用: {self.error}')
+        results = []
+        for img, (text, confidence) in zip(imgs, self._recognizer.recognize_batch(imgs)):
+            text = (text or '').replace(',', '')
+            if text.isdigit() and confidence >= self.min_confidence:
+                results.append((int(text), confidence))
+            elif self.fallback is not None and self.fallback.is_ready():
+                results.append(tuple(self.fallback.recognize_number(img)))
+            else:
+                results.append((None, 0.0))
+        return results
+
+    def recognize_number(self, img):
+        return self.recognize_numbers([img])[0]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='导出ONNX数字识别模型')
+    parser.add_argument('path', help='输出的 .onnx 文件')
+    parser.add_argument('--width', type=int, default=INPUT_WIDTH, help='固定输入宽度')
+    parser.add_argument('--int8', action='store_true', help='导出后做int8动态量化')
+    args = parser.parse_args()
+    export_onnx(args.path, args.width, args.int8)
+    print(f'已导出: {args.path}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
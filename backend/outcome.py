@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+'''
+购买结果检测
+
+点击购买后，游戏会在固定位置显示购买成功、购买失败或哈夫币不足的提示。这里把该区域的缩略图和
+事先录制的各结果缩略图逐一比较，平均像素差最小且低于阈值的即为本次结果。不需要OCR，也不需要等到
+下一轮读取余额。
+
+录制（先在游戏里做出对应结果，提示还在屏幕上时运行，默认倒数3秒后截图）：
+    python backend/outcome.py success|failed|insufficient [--delay 3]
+
+区域为布局中的 range_purchase_result，布局文件默认没有这一项，需要先按自己的屏幕量好提示所在的矩形并加到
+layouts/ 中对应布局的 rects 里；没有该区域时不检测购买结果。结果保存在 config.py 中的 OUTCOME_SIGNATURE_PATH。
+
+提示会在屏幕上停留一段时间，上一次的提示可能还没消失，所以只有区域相对点击前发生变化后才匹配。
+'''
+
+import os
+import sys
+import numpy as np
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.strategy import SUCCESS, FAILED, INSUFFICIENT
+
+OUTCOMES = (SUCCESS, FAILED, INSUFFICIENT)
+
+
+class OutcomeDetector:
+    '''
+    signatures：{结果: 缩略图}，缩略图为 capture.thumbnail() 的返回值
+
+    threshold：平均像素差低于该值时认为匹配；与点击前的缩略图相差不超过该值时认为区域没有变化
+    '''
+    def __init__(self, signatures: dict, threshold: float = 12.0):
+        self.signatures = {name: np.asarray(thumbnail, dtype=np.int16) for name, thumbnail in signatures.items()}
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 12.0):
+        '''
+        从 .npz 文件加载，文件不存在时返回None
+        '''
+        if not path or not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files}, threshold)
+
+    def save(self, path: str):
+        np.savez(path, **{name: thumbnail.astype(np.uint8) for name, thumbnail in self.signatures.items()})
+
+    def classify(self, thumbnail, reference = None) -> str:
+        '''
+        返回最接近的结果，都不匹配（提示还没出现或区域内是其他画面）时返回None
+
+        reference：点击前的缩略图，区域与它基本相同时（提示还没出现，或是上一次留下的）返回None
+        '''
+        if reference is not None and _mean_diff(thumbnail, reference) <= self.threshold:
+            return None
+        best, best_diff = None, self.threshold
+        for name, signature in self.signatures.items():
+            diff = _mean_diff(thumbnail, signature)
+            if diff < best_diff:
+                best, best_diff = name, diff
+        return best
+
+
+def _mean_diff(a, b) -> float:
+    if a.shape != b.shape:
+        return float('inf')
+    return float(np.abs(np.asarray(a, dtype=np.int16) - b).mean())
+
+
+def main():
+    import argparse
+    import time
+    from config import DefaultConfig
+    from backend.capture import create_capture_backend
+    from backend.layout import LayoutResolver, monitor_rect
+
+    parser = argparse.ArgumentParser(description='录制购买结果提示的缩略图')
+    parser.add_argument('outcome', choices=OUTCOMES, help='当前屏幕上显示的结果')
+    parser.add_argument('--delay', type=float, default=3, help='截图前等待的秒数')
+    args = parser.parse_args()
+
+    capture = create_capture_backend(DefaultConfig.CAPTURE_BACKEND)
+    layout = LayoutResolver(DefaultConfig.LAYOUT_DIR, lambda: monitor_rect(DefaultConfig.GAME_MONITOR, capture.screen_size))
+    region = layout.resolve().get('range_purchase_result')
+    if region is None:
+        print(f'布局 {layout.profile.name} 中没有 range_purchase_result，请先把提示所在的矩形加到该布局的 rects 中')
+        return 2
+    time.sleep(args.delay)
+    detector = OutcomeDetector.load(DefaultConfig.OUTCOME_SIGNATURE_PATH) or OutcomeDetector({})
+    detector.signatures[args.outcome] = capture.thumbnail(region)
+    detector.save(DefaultConfig.OUTCOME_SIGNATURE_PATH)
+    print(f'已保存 {args.outcome} 到 {DefaultConfig.OUTCOME_SIGNATURE_PATH}，已录制: {", ".join(detector.signatures)}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+'''
+循环间隔自适应
+
+识别成功并且价格区域在间隔内完成重绘时把间隔减小 step_ms，出现识别失败、余额差值异常或间隔内
+没有重绘完成时把间隔乘以 backoff，间隔限制在 [min_ms, max_ms] 内。每台机器会停在自己能稳定运行的最小间隔附近。
+'''
+
+import threading
+
+
+class PacingController:
+    '''
+    initial_ms：初始间隔，界面修改循环间隔时用 reset() 重新开始
+
+    min_ms/max_ms：间隔范围
+
+    step_ms：每次成功后减小的毫秒数
+
+    backoff：每次失败后间隔乘以的倍数
+
+    enabled：为False时间隔固定为 initial_ms
+    '''
+    def __init__(self, initial_ms: int, min_ms: int = 30, max_ms: int = 1000, step_ms: int = 5,
+                 backoff: float = 1.5, enabled: bool = True):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.step_ms = step_ms
+        self.backoff = backoff
+        self.enabled = enabled
+        self.failures = {}
+        self._lock = threading.Lock()
+        self.reset(initial_ms)
+
+    @property
+    def gap_ms(self) -> int:
+        return int(round(self._gap))
+
+    def reset(self, initial_ms: int):
+        with self._lock:
+            self._gap = float(initial_ms) if not self.enabled else self._clamp(initial_ms)
+
+    def success(self):
+        if self.enabled:
+            with self._lock:
+                self._gap = self._clamp(self._gap - self.step_ms)
+
+    def failure(self, reason: str):
+        '''
+        reason：失败原因，按原因计数
+        '''
+        with self._lock:
+            self.failures[reason] = self.failures.get(reason, 0) + 1
+            if self.enabled:
+                self._gap = self._clamp(max(self._gap, self.min_ms) * self.backoff)
+
+    def _clamp(self, gap: float) -> float:
+        return float(min(max(gap, self.min_ms), self.max_ms))
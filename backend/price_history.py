@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+'''
+价格历史
+
+每次观察到的价格以定长二进制记录追加到文件，读取时用 np.memmap 映射，
+几百万条记录也不会占用大量内存。
+
+每个商品在内存中维护按时间窗口滚动的统计（最小值、均值、分位数），
+更新和查询的开销与窗口内记录数无关。
+'''
+
+import math
+import os
+import threading
+import time
+import zlib
+from collections import deque
+import numpy as np
+
+RECORD_DTYPE = np.dtype([
+    ('ts', '<f8'),        # 时间戳（秒）
+    ('item', '<u4'),      # 商品编号，见 item_id()
+    ('price', '<f8'),     # 观察到的价格
+    ('decision', 'u1'),   # 决策，见 DECISIONS
+    ('quantity', '<u2'),  # 购买数量
+])
+
+DECISIONS = {'none': 0, 'freerefresh': 1, 'refresh': 2, 'buy': 3, 'buy_one_stop': 4}
+
+# 分位数直方图：按1%的相对精度对价格分桶，覆盖 1 ~ 10^10
+BUCKET_RATIO = 1.01
+BUCKET_COUNT = int(math.log(1e10) / math.log(BUCKET_RATIO)) + 1
+
+
+def item_id(key) -> int:
+    '''
+    把商品的标识（名称或鼠标位置）转换为稳定的32位编号
+    '''
+    return zlib.crc32(str(key).encode('utf-8'))
+
+def read_records(path: str):
+    '''
+    只读映射记录文件，文件不存在或没有记录时返回None
+    '''
+    if not path or not os.path.exists(path):
+        return None
+    count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return None
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+
+def _bucket(price: float) -> int:
+    if price < 1:
+        return 0
+    return min(int(math.log(price) / math.log(BUCKET_RATIO)), BUCKET_COUNT - 1)
+
+def _bucket_price(bucket: int) -> float:
+    # 取桶的几何中点
+    return BUCKET_RATIO ** (bucket + 0.5)
+
+
+class RollingWindow:
+    '''
+    一个商品在最近 window_s 秒内的滚动统计
+
+    最小值和最大值用单调队列，均值用滑动和，分位数用固定桶数的对数直方图
+    '''
+    def __init__(self, window_s: float):
+        self.window_s = window_s
+        self._entries = deque()
+        self._minimums = deque()
+        self._maximums = deque()
+        self._sum = 0.0
+        self._histogram = np.zeros(BUCKET_COUNT, dtype=np.int64)
+
+    def add(self, ts: float, price: float):
+        bucket = _bucket(price)
+        self._entries.append((ts, price, bucket))
+        self._sum += price
+        self._histogram[bucket] += 1
+        while self._minimums and self._minimums[-1][1] >= price:
+            self._minimums.pop()
+        self._minimums.append((ts, price))
+        while self._maximums and self._maximums[-1][1] <= price:
+            self._maximums.pop()
+        self._maximums.append((ts, price))
+        self.expire(ts)
+
+    def expire(self, now: float):
+        limit = now - self.window_s
+        while self._entries and self._entries[0][0] < limit:
+            ts, price, bucket = self._entries.popleft()
+            self._sum -= price
+            self._histogram[bucket] -= 1
+        while self._minimums and self._minimums[0][0] < limit:
+            self._minimums.popleft()
+        while self._maximums and self._maximums[0][0] < limit:
+            self._maximums.popleft()
+
+    @property
+    def count(self) -> int:
+        return len(self._entries)
+
+    @property
+    def minimum(self):
+        return self._minimums[0][1] if self._minimums else None
+
+    @property
+    def maximum(self):
+        return self._maximums[0][1] if self._maximums else None
+
+    @property
+    def mean(self):
+        return self._sum / len(self._entries) if self._entries else None
+
+    def percentile(self, q: float):
+        '''
+        q：0~100，返回值的相对误差在1%以内
+
+        桶的几何中点可能超出实际价格（例如所有价格相同），结果限制在窗口内的最小值和最大值之间
+        '''
+        if not self._entries:
+            return None
+        cumulative = np.cumsum(self._histogram)
+        bucket = int(np.searchsorted(cumulative, math.ceil(cumulative[-1] * q / 100) or 1))
+        return min(max(_bucket_price(bucket), self.minimum), self.maximum)
+
+
+class PriceHistory:
+    '''
+    path：记录文件路径，为None时只在内存中统计
+
+    windows_s：需要维护的滚动窗口长度（秒）
+    '''
+    def __init__(self, path: str = None, windows_s = (300, 3600), flush_every: int = 64):
+        self.path = path
+        self.windows_s = tuple(windows_s)
+        self.flush_every = flush_every
+        self.last_item = None
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._file = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._load_recent()
+            self._file = open(path, 'ab')
+
+    def _load_recent(self):
+        '''
+        启动时把最长窗口内的历史记录放回滚动统计
+        '''
+        records = self.records()
+        if records is None or len(records) == 0:
+            return
+        recent = records[records['ts'] >= time.time() - max(self.windows_s)]
+        for record in recent:
+            self._add_to_windows(int(record['item']), float(record['ts']), float(record['price']))
+        self.last_item = int(records['item'][-1])
+
+    def _add_to_windows(self, item: int, ts: float, price: float):
+        windows = self._windows.get(item)
+        if windows is None:
+            windows = self._windows[item] = {window_s: RollingWindow(window_s) for window_s in self.windows_s}
+        for window in windows.values():
+            window.add(ts, price)
+
+    def append(self, item, price: float, decision: str = 'none', quantity: int = 0, ts: float = None):
+        '''
+        item：商品标识，会被转换为 item_id(item)
+        '''
+        ts = time.time() if ts is None else ts
+        item = item_id(item)
+        record = np.array([(ts, item, price, DECISIONS.get(decision, 0), quantity)], dtype=RECORD_DTYPE)
+        with self._lock:
+            self._add_to_windows(item, ts, float(price))
+            self.last_item = item
+            if self._file is not None:
+                self._file.write(record.tobytes())
+                self._pending += 1
+                if self._pending >= self.flush_every:
+                    self.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def records(self):
+        '''
+        只读映射整个记录文件，没有记录时返回None
+        '''
+        with self._lock:
+            self.flush()
+        return read_records(self.path)
+
+    def stats(self, item = None, window_s: float = None) -> dict:
+        '''
+        item：商品标识，为None时使用最近一次记录的商品
+
+        window_s：窗口长度，必须是 windows_s 中的一个，默认使用最短的窗口
+        '''
+        item = self.last_item if item is None else item_id(item)
+        window_s = self.windows_s[0] if window_s is None else window_s
+        with self._lock:
+            windows = self._windows.get(item)
+            if windows is None:
+                return {'count': 0}
+            window = windows[window_s]
+            window.expire(time.time())
+            return {
+                'count': window.count,
+                'min': window.minimum,
+                'mean': window.mean,
+                'p10': window.percentile(10),
+                'p50': window.percentile(50),
+                'p75': window.percentile(75),
+            }
+
+    def suggest_prices(self, item = None, window_s: float = None,
+                       ideal_percentile: float = 10, unacceptable_percentile: float = 75):
+        '''
+        根据最近的价格分布建议 (理想价格, 最高价格)，没有记录时返回None
+        '''
+        item = self.last_item if item is None else item_id(item)
+        window_s = self.windows_s[0] if window_s is None else window_s
+        with self._lock:
+            windows = self._windows.get(item)
+            if windows is None:
+                return None
+            window = windows[window_s]
+            window.expire(time.time())
+            if window.count == 0:
+                return None
+            return (int(window.percentile(ideal_percentile)),
+                    int(window.percentile(unacceptable_percentile)))
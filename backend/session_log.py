@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+'''
+异步会话日志
+
+循环线程只把结构化记录放进队列，后台线程批量格式化后写到控制台和滚动日志文件，
+控制台输出不再阻塞每一轮的价格检查。
+
+日志文件每行是一条JSON记录，便于会话结束后分析。
+'''
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+# 价格来源
+SOURCE_TEXT = {
+    'market': '直接看市场底价',
+    'balance': '哈夫币余额差值计算价格',
+    'balance_failed': '上一次购买失败，直接看市场底价',
+    'balance_error': '余额计算出现异常，直接看市场底价',
+}
+
+# 决策
+DECISION_TEXT = {
+    'freerefresh': '免费刷新价格',
+    'refresh': '刷新价格',
+    'buy': '开始购买',
+    'buy_one_stop': '购买一张后循环结束',
+}
+
+# 购买结果
+RESULT_TEXT = {
+    'success': '购买成功',
+    'failed': '购买失败',
+    'insufficient': '哈夫币不足',
+}
+
+_STOP = object()
+
+
+def format_record(record: dict) -> str:
+    '''
+    控制台显示格式
+    '''
+    timestamp = time.strftime('%H:%M:%S', time.localtime(record['ts'])) + f".{int(record['ts'] * 1000) % 1000:03d}"
+    event = record['event']
+    if event == 'decision':
+        text = (f"{SOURCE_TEXT.get(record.get('source'), record.get('source'))}: {record.get('price')} "
+                f"-> {DECISION_TEXT.get(record.get('decision'), record.get('decision'))} "
+                f"(理想价格 {record.get('ideal')}，最高价格 {record.get('unacceptable')})")
+        if record.get('balance') is not None:
+            text += f" 余额 {record['balance']}"
+        if record.get('result') is not None:
+            text += f" {RESULT_TEXT.get(record['result'], record['result'])}"
+    elif event == 'recognition_failed':
+        text = '识别失败, 建议检查物品是否可兑换'
+    elif event == 'balance_failed':
+        text = '哈夫币余额检测识别失败或不稳定，建议关闭余额识别相关功能'
+    elif event == 'purchase_result':
+        text = f"{DECISION_TEXT.get(record.get('decision'), record.get('decision'))}: {RESULT_TEXT.get(record.get('result'), record.get('result'))}"
+    elif event == 'purchase_price':
+        text = (f"上一次{DECISION_TEXT.get(record.get('decision'), record.get('decision'))}"
+                f"（{record.get('quantity')}个）的实际均价: {record.get('price')}")
+    elif event == 'verification_failed':
+        text = f"多帧识别结果不一致，跳过本轮: {[number for number, confidence in record.get('readings', [])]}"
+    elif event == 'verification_corrected':
+        text = f"多帧校验修正识别结果: {record.get('first')} -> {record.get('price')}"
+    elif event == 'error':
+        text = f"操作失败: {record.get('message')}"
+    else:
+        fields = ' '.join(f'{k}={v}' for k, v in record.items() if k not in ('ts', 'event'))
+        text = f'{event} {fields}'
+    return f'{timestamp} {text}'
+
+
+def _json_default(value):
+    '''
+    numpy 标量和数组转换为Python对象，其他无法序列化的值写为字符串，避免整批记录写入失败
+    '''
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class SessionLogger:
+    '''
+    directory：日志目录，为None时不写文件
+
+    max_bytes：单个日志文件的最大字节数，超过后滚动
+
+    backup_count：保留的历史日志文件数
+
+    console：是否输出到控制台
+
+    batch_size：后台线程一次最多处理的记录数
+    '''
+    def __init__(self, directory: str = 'logs', max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5,
+                 console: bool = True, batch_size: int = 256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.console = console
+        self.batch_size = batch_size
+        self.path = os.path.join(directory, 'session.log') if directory else None
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name='SessionLogger', daemon=True)
+        self._thread.start()
+
+    def log(self, event: str, **fields):
+        '''
+        在调用线程中只做入队
+        '''
+        fields['ts'] = time.time()
+        fields['event'] = event
+        self._queue.put(fields)
+
+    def close(self, timeout: float = 2):
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                running = False
+                batch = [record for record in batch if record is not _STOP]
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    sys.stderr.write(f'写入日志失败: {e}\n')
+        if self._file is not None:
+            self._file.close()
+
+    def _write(self, batch: list):
+        if self.console:
+            sys.stdout.write(''.join(format_record(record) + '\n' for record in batch))
+            sys.stdout.flush()
+        if self.path is None:
+            return
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(''.join(json.dumps(record, ensure_ascii=False, default=_json_default) + '\n' for record in batch))
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{i}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{i + 1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+'''
+购买策略
+
+根据识别到的价格和参数决定下一步动作，不截图、不点击，也不修改任何外部状态。
+Worker 每轮把当前状态和价格交给 decide()，按返回的决策执行点击，并保存新的状态。
+
+    state = StrategyState()
+    decision, state = decide(state, price, params)
+'''
+
+from typing import NamedTuple
+
+# 决策
+FREEREFRESH = 'freerefresh'    # 免费刷新价格
+REFRESH = 'refresh'            # 以最小数量购买来刷新价格
+BUY = 'buy'                    # 以最大数量购买
+BUY_ONE_STOP = 'buy_one_stop'  # 购买一张后循环结束（钥匙卡模式）
+
+# 购买结果，见 backend/outcome.py
+SUCCESS = 'success'            # 购买成功
+FAILED = 'failed'              # 购买失败（最低价已被买走等）
+INSUFFICIENT = 'insufficient'  # 哈夫币不足
+
+BUY_NUMBER = 200     # 以最大数量购买时的数量
+REFRESH_NUMBER = 31  # 以最小数量刷新价格时的数量，原始值为1，按子弹最小购买数量改为31
+
+
+class StrategyParams(NamedTuple):
+    ideal: int
+    unacceptable: int
+    key_mode: bool = False
+    half_coin_mode: bool = False
+    buy_number: int = BUY_NUMBER
+    refresh_number: int = REFRESH_NUMBER
+
+
+class StrategyState(NamedTuple):
+    first_loop: bool = True
+    buy_number: int = 0  # 上一轮购买的数量，用于哈夫币余额差值计算单价
+
+
+def use_balance(state: StrategyState, params: StrategyParams) -> bool:
+    '''
+    本轮是否可以用哈夫币余额差值计算价格
+    '''
+    return params.half_coin_mode and (not state.first_loop) and state.buy_number != 0
+
+def balance_price(state: StrategyState, previous_balance, current_balance):
+    '''
+    上一轮购买的单价，余额未知时返回None，余额没有变化（购买失败）时返回0
+    '''
+    if previous_balance is None or current_balance is None or state.buy_number == 0:
+        return None
+    return (previous_balance - current_balance) / state.buy_number
+
+def decide(state: StrategyState, price, params: StrategyParams) -> tuple:
+    '''
+    返回 (决策, 新状态)
+    '''
+    if params.key_mode:
+        # 钥匙卡模式
+        if price > params.ideal:
+            return FREEREFRESH, state._replace(first_loop=False)
+        return BUY_ONE_STOP, state._replace(first_loop=False)
+    # 正常模式
+    if price > params.unacceptable:
+        return FREEREFRESH, StrategyState(first_loop=False, buy_number=0)
+    if price > params.ideal:
+        return REFRESH, StrategyState(first_loop=False, buy_number=params.refresh_number)
+    return BUY, StrategyState(first_loop=False, buy_number=params.buy_number)
+
+def apply_outcome(state: StrategyState, outcome) -> StrategyState:
+    '''
+    点击后检测到购买结果时修正状态：没有买到时下一轮不用余额差值计算价格，outcome 为None（未知）时不修改
+    '''
+    if outcome in (FAILED, INSUFFICIENT):
+        return state._replace(buy_number=0)
+    return state
+
+def purchased_quantity(decision: str, state: StrategyState, outcome = None) -> int:
+    '''
+    执行决策后买到的数量，state 为 decide() 返回的新状态，outcome 为检测到的购买结果
+    '''
+    if decision == FREEREFRESH or outcome in (FAILED, INSUFFICIENT):
+        return 0
+    if decision == BUY_ONE_STOP:
+        return 1
+    return state.buy_number
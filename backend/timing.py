@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+'''
+热路径计时
+
+各阶段耗时写入预分配的环形缓冲区，关闭时 span() 返回同一个空上下文，几乎没有开销。
+
+    with recorder.span('ocr'):
+        ...
+'''
+
+import csv
+import json
+import threading
+import time
+import numpy as np
+
+# 阶段名称，按编号存储
+STAGES = ('iteration', 'click', 'capture', 'wait', 'cache', 'ocr', 'verify', 'decision')
+STAGE_NAMES = {
+    'iteration': '整轮',
+    'click': '点击',
+    'capture': '截图',
+    'wait': '等待重绘',
+    'cache': '缓存查询',
+    'ocr': '识别',
+    'verify': '多帧校验',
+    'decision': '决策',
+}
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('recorder', 'stage', 'start')
+
+    def __init__(self, recorder, stage: int):
+        self.recorder = recorder
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder._record(self.stage, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class SpanRecorder:
+    '''
+    capacity：环形缓冲区长度，写满后覆盖最早的记录
+
+    enabled：是否记录
+    '''
+    def __init__(self, capacity: int = 4096, enabled: bool = True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._stages = np.zeros(capacity, dtype=np.int8)
+        self._starts = np.zeros(capacity, dtype=np.float64)
+        self._durations = np.zeros(capacity, dtype=np.float64)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stage_index = {stage: i for i, stage in enumerate(STAGES)}
+
+    def span(self, stage: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, self._stage_index[stage])
+
+    def record(self, stage: str, duration: float):
+        '''
+        记录一段已经测量好的耗时（秒）
+        '''
+        if self.enabled:
+            self._record(self._stage_index[stage], time.perf_counter() - duration, duration)
+
+    def _record(self, stage: int, start: float, duration: float):
+        with self._lock:
+            i = self._count % self.capacity
+            self._stages[i] = stage
+            self._starts[i] = start
+            self._durations[i] = duration
+            self._count += 1
+
+    def snapshot(self) -> tuple:
+        '''
+        按时间顺序返回 (阶段编号, 开始时间, 耗时) 三个数组的副本
+        '''
+        with self._lock:
+            n = min(self._count, self.capacity)
+            order = (np.arange(n) + self._count - n) % self.capacity
+            return self._stages[order], self._starts[order], self._durations[order]
+
+    def summary(self, window_s: float = 60) -> dict:
+        '''
+        最近 window_s 秒内各阶段的 p50/p95（毫秒）和每分钟循环次数
+        '''
+        stages, starts, durations = self.snapshot()
+        now = time.perf_counter()
+        recent = starts >= now - window_s
+        result = {}
+        for i, stage in enumerate(STAGES):
+            values = durations[recent & (stages == i)] * 1000
+            if values.size:
+                p50, p95 = np.percentile(values, [50, 95])
+                result[stage] = {'count': int(values.size), 'p50': float(p50), 'p95': float(p95)}
+        iterations = starts[recent & (stages == self._stage_index['iteration'])]
+        if iterations.size >= 2:
+            span_s = now - iterations[0]
+            result['iterations_per_minute'] = float(iterations.size / span_s * 60)
+        else:
+            result['iterations_per_minute'] = 0.0
+        return result
+
+    def export_csv(self, path: str):
+        stages, starts, durations = self.snapshot()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'start_s', 'duration_ms'])
+            for stage, start, duration in zip(stages, starts, durations):
+                writer.writerow([STAGES[stage], f'{start:.6f}', f'{duration * 1000:.3f}'])
+
+    def export_json(self, path: str):
+        stages, starts, durations = self.snapshot()
+        records = [{'stage': STAGES[stage], 'start_s': float(start), 'duration_ms': float(duration * 1000)}
+                   for stage, start, duration in zip(stages, starts, durations)]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(), 'records': records}, f, ensure_ascii=False, indent=2)
+
+    def format_summary(self, window_s: float = 60) -> str:
+        '''
+        界面显示用的多行文本
+        '''
+        summary = self.summary(window_s)
+        lines = [f"每分钟循环: {summary['iterations_per_minute']:.1f}"]
+        for stage in STAGES:
+            if stage in summary:
+                stats = summary[stage]
+                lines.append(f"{STAGE_NAMES[stage]}: p50 {stats['p50']:.1f}ms  p95 {stats['p95']:.1f}ms")
+        return '\n'.join(lines)
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import time
-import pyautogui
+import numpy as np
 
 def is_windowized(window_title:str):
     '''
     判断目标是否窗口化
     '''
+    # 延迟导入，没有图形界面的环境（回放、基准测试）也能导入本模块
+    import pyautogui
     # 获取当前所有窗口的标题
     window_titles = [window.title for window in pyautogui.getAllWindows()]
     
@@ -20,6 +22,7 @@ def get_window_postion(target_app:str):
     '''
     获取目标窗口的坐标
     '''
+    import pyautogui
     window_info = pyautogui.getWindowsWithTitle(target_app)[0]
     return [window_info.left, window_info.top, window_info.right, window_info.bottom]
 
@@ -27,6 +30,7 @@ def get_screenshot(debug_mode = False):
     '''
     全屏截图函数
     '''
+    import pyautogui
     # 对整个屏幕进行截图
     screenshot = pyautogui.screenshot()
     if debug_mode:
@@ -39,6 +43,7 @@ def get_windowshot(range:list, debug_mode = False):
 
     range：截图范围，[left, top, right, bottom]
     '''
+    import pyautogui
     # 对范围内截图
     if range[0] < 1:
         screen_size = pyautogui.size()
@@ -52,10 +57,64 @@ def get_windowshot(range:list, debug_mode = False):
         screenshot.save('screenshot.png')
     return screenshot
 
+def save_screenshot(img, path:str = 'screenshot.png'):
+    '''
+    保存截图，img可以是PIL图片或numpy数组
+    '''
+    if isinstance(img, np.ndarray):
+        from PIL import Image
+        img = Image.fromarray(np.ascontiguousarray(img))
+    img.save(path)
+
+def preprocess_number_crop(img, padding:int = 4):
+    '''
+    数字区域预处理：灰度化、二值化（Otsu阈值），并裁剪到字迹的包围盒
+
+    img：截图，PIL图片或numpy数组
+
+    padding：裁剪后四周保留的留白像素
+
+    返回白底黑字的uint8灰度图，没有字迹时返回None
+    '''
+    arr = np.asarray(img)
+    if arr.ndim == 3:
+        # 整数近似的 0.299R + 0.587G + 0.114B
+        rgb = arr[..., :3].astype(np.uint16)
+        gray = ((rgb[..., 0] * 77 + rgb[..., 1] * 150 + rgb[..., 2] * 29) >> 8).astype(np.uint8)
+    else:
+        gray = arr.astype(np.uint8, copy=False)
+    if gray.size == 0:
+        return None
+
+    # Otsu 阈值
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    omega = np.cumsum(hist)
+    mu = np.cumsum(hist * np.arange(256))
+    total = omega[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma_b = (mu[-1] * omega - mu * total) ** 2 / (omega * (total - omega))
+    threshold = int(np.argmax(np.nan_to_num(sigma_b)))
+    ink = gray > threshold
+    # 字迹总是占少数像素，据此判断是亮字暗底还是暗字亮底
+    if ink.sum() * 2 > ink.size:
+        ink = ~ink
+
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return None
+    ink = ink[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+    binary = np.where(ink, 0, 255).astype(np.uint8)
+    if padding > 0:
+        binary = np.pad(binary, padding, constant_values=255)
+    return binary
+
 def mouse_move(positon:list):
     '''
     postion：鼠标移动位置，[x, y]
     '''
+    import pyautogui
     x = positon[0]
     y = positon[1]
     if x < 1:
@@ -70,6 +129,7 @@ def mouse_click(positon:list, num:int = 1):
 
     num：点击次数，默认点击一次
     '''
+    import pyautogui
     x = positon[0]
     y = positon[1]
     if x < 1:
@@ -85,6 +145,7 @@ def get_mouse_position():
     '''
     获取鼠标当前位置
     '''
+    import pyautogui
     return list(pyautogui.position())
 
 def main():
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+'''
+识别结果校验
+
+置信度足够并且和最近价格相差不大的读数直接采用；否则再截几帧，
+多帧读数一致时才采用，避免按误识别的价格购买。
+'''
+
+from collections import defaultdict
+
+
+def plausible(number, reference = None, max_jump: float = 0.5) -> bool:
+    '''
+    reference：最近价格的中位数，为None时只检查是否为正数
+
+    max_jump：允许相对 reference 变化的比例
+    '''
+    if number is None or number <= 0:
+        return False
+    if reference is None:
+        return True
+    return abs(number - reference) <= max_jump * reference
+
+def vote(readings: list) -> tuple:
+    '''
+    readings：[(数字, 置信度), ...]，识别失败的读数不参与投票
+
+    返回 (票数最多的数字, 票数, 置信度之和)，票数相同时比较置信度之和；没有有效读数时返回 (None, 0, 0.0)
+    '''
+    votes = defaultdict(lambda: [0, 0.0])
+    for number, confidence in readings:
+        if number is not None:
+            votes[number][0] += 1
+            votes[number][1] += confidence
+    if not votes:
+        return None, 0, 0.0
+    number, (count, total) = max(votes.items(), key=lambda item: (item[1][0], item[1][1]))
+    return number, count, total
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+'''
+多商品监视列表
+
+每个商品有自己的位置、价格阈值和模式，调度器每轮挑选最值得检查的商品：
+距离上次检查越久、价格波动越大、上次价格越接近理想价格，优先级越高。
+
+按F8时鼠标所在的商品是列表中的主商品，参数跟随界面；只有主商品时和原来的单商品循环相同。
+'''
+
+import json
+import math
+import os
+import threading
+import time
+
+
+class WatchItem:
+    '''
+    position：商店页面中商品的位置，像素坐标或相对坐标
+
+    ideal / unacceptable / convertible / key_mode / half_coin_mode：为None时跟随界面参数
+    '''
+    def __init__(self, position, name: str = None, ideal: int = None, unacceptable: int = None,
+                 convertible: bool = None, key_mode: bool = None, half_coin_mode: bool = None):
+        self.position = list(position)
+        self.name = name
+        self.overrides = {
+            'ideal': ideal,
+            'unacceptable': unacceptable,
+            'convertible': convertible,
+            'key_mode': key_mode,
+            'half_coin_mode': half_coin_mode,
+        }
+        self.enabled = True
+        self.checks = 0
+        self.last_checked = None
+        self.last_price = None
+        self.volatility = None
+
+    @property
+    def key(self) -> str:
+        '''
+        价格历史中的商品标识
+        '''
+        if self.name:
+            return self.name
+        return ','.join(str(v) if isinstance(v, float) and v < 1 else str(int(v)) for v in self.position)
+
+    def params(self, defaults: dict) -> dict:
+        '''
+        用商品自己的设置覆盖界面参数
+        '''
+        return {k: (defaults[k] if v is None else v) for k, v in self.overrides.items()}
+
+    def observe(self, price, alpha: float, now: float = None):
+        '''
+        记录一次检查结果，波动为相邻两次价格变化绝对值的指数移动平均
+        '''
+        now = time.monotonic() if now is None else now
+        if price is not None and self.last_price is not None:
+            change = abs(price - self.last_price)
+            self.volatility = change if self.volatility is None else alpha * change + (1 - alpha) * self.volatility
+        if price is not None:
+            self.last_price = price
+        self.last_checked = now
+        self.checks += 1
+
+    def priority(self, ideal, now: float, floor: float) -> float:
+        '''
+        从未检查过的商品优先；否则为 距上次检查的秒数 ×（floor + 价格在一次检查内降到理想价格的可能性）
+        '''
+        if self.last_checked is None:
+            return math.inf
+        age = now - self.last_checked
+        if self.last_price is None:
+            return age
+        distance = max(self.last_price - ideal, 0)
+        sigma = max(self.volatility or 0.0, 0.01 * ideal, 1.0)
+        return age * (floor + math.exp(-distance / sigma))
+
+    def to_dict(self) -> dict:
+        result = {'position': self.position}
+        if self.name:
+            result['name'] = self.name
+        result.update({k: v for k, v in self.overrides.items() if v is not None})
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**data)
+
+
+class Watchlist:
+    '''
+    floor：离理想价格很远的商品的最低优先级系数，避免长时间不检查
+
+    alpha：波动指数移动平均的系数
+    '''
+    def __init__(self, items: list = None, floor: float = 0.1, alpha: float = 0.3):
+        self.floor = floor
+        self.alpha = alpha
+        self.primary = None
+        self._items = list(items or [])
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self.items())
+
+    def items(self) -> list:
+        '''
+        主商品在前，不加锁，调用方需要持有锁或只读使用
+        '''
+        return ([self.primary] if self.primary is not None else []) + self._items
+
+    def set_primary(self, position):
+        '''
+        按F8时调用：记录鼠标所在商品，同时重新启用所有商品
+        '''
+        with self._lock:
+            self.primary = WatchItem(position)
+            for item in self._items:
+                item.enabled = True
+
+    def add(self, item: WatchItem):
+        with self._lock:
+            self._items.append(item)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def has_enabled(self) -> bool:
+        with self._lock:
+            return any(item.enabled for item in self.items())
+
+    def next_item(self, defaults: dict, now: float = None):
+        '''
+        返回优先级最高的已启用商品，没有时返回None
+        '''
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            candidates = [item for item in self.items() if item.enabled]
+            if not candidates:
+                return None
+            return max(candidates, key=lambda item: item.priority(item.params(defaults)['ideal'], now, self.floor))
+
+    def observe(self, item: WatchItem, price, now: float = None):
+        with self._lock:
+            item.observe(price, self.alpha, now)
+
+    def save(self, path: str):
+        with self._lock:
+            data = [item.to_dict() for item in self._items]
+        # 先写临时文件再替换，写到一半退出也不会损坏原来的列表
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, floor: float = 0.1, alpha: float = 0.3):
+        '''
+        从JSON文件读取商品列表，文件不存在时返回空列表
+        '''
+        items = []
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                items = [WatchItem.from_dict(data) for data in json.load(f)]
+        return cls(items, floor=floor, alpha=alpha)
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+
+import queue
+import time
+from typing import NamedTuple
+from backend.BuyBot import BuyBot
+from backend.strategy import (StrategyParams, StrategyState, decide, use_balance, balance_price,
+                              apply_outcome, purchased_quantity, FREEREFRESH, REFRESH, BUY,
+                              FAILED, INSUFFICIENT)
+from backend.watchlist import Watchlist, WatchItem
+from backend.pacing import PacingController
+from backend.input_engine import InputFailSafe
+from backend.capture import REDRAWN, TIMEOUT
+from config import DefaultConfig
+
+# 控制命令
+START = 'start'
+STOP = 'stop'
+PARAMS = 'params'
+LAYOUT = 'layout'
+
+
+class WorkerParams(NamedTuple):
+    """界面参数快照，更新时整体替换，循环中不加锁读取"""
+    ideal: int = 0
+    unacceptable: int = 0
+    convertible: bool = True
+    key_mode: bool = False
+    half_coin_mode: bool = False
+    loop_gap: int = 0
+
+
+class Worker:
+    """
+    购买循环，不依赖Qt：界面用 DFMarketBot.WorkerThread 在QThread中调用 run()，
+    无界面运行时在主线程中用 poll()/step() 驱动
+    """
+    def __init__(self, buybot: BuyBot):
+        self.buybot: BuyBot = buybot
+        # 运行状态只在工作线程中修改，其他线程通过命令队列通知
+        self._is_running = False
+        self._commands = queue.SimpleQueue()
+        self._params = WorkerParams()
+        self.mouse_position = []
+        self.strategy_state = StrategyState()
+        # 监视的商品，F8记录的商品为主商品
+        self.watchlist = Watchlist.load(DefaultConfig.WATCHLIST_PATH,
+                                        floor=DefaultConfig.WATCHLIST_PRIORITY_FLOOR,
+                                        alpha=DefaultConfig.WATCHLIST_VOLATILITY_ALPHA)
+        self.current_item = None
+        # 上一次买到东西的 (决策, 数量)，下一轮用余额差值算出的均价记到这次购买上
+        self.last_purchase = None
+        # 实际使用的循环间隔，界面上的循环间隔作为初始值
+        self.pacing = PacingController(self._params.loop_gap,
+                                       min_ms=DefaultConfig.PACING_MIN_MS,
+                                       max_ms=DefaultConfig.PACING_MAX_MS,
+                                       step_ms=DefaultConfig.PACING_STEP_MS,
+                                       backoff=DefaultConfig.PACING_BACKOFF,
+                                       enabled=DefaultConfig.PACING_ENABLED)
+
+    def record_mouse_position(self):
+        """记录鼠标位置"""
+        from backend.utils import get_mouse_position
+        self.set_item_position(get_mouse_position())
+
+    def set_item_position(self, position):
+        """设置主商品位置；该位置可能换了物品，之前的价格不再用于检查读数"""
+        self.mouse_position = list(position)
+        self.watchlist.set_primary(position)
+        self.buybot.forget_prices(WatchItem(list(position)).key)
+
+    def pin_mouse_position(self):
+        """把鼠标所在商品以当前界面参数加入监视列表，并保存到 WATCHLIST_PATH，下次启动时仍然有效"""
+        from backend.utils import get_mouse_position
+        params = self.current_params()
+        item = WatchItem(list(get_mouse_position()), ideal=params['ideal'], unacceptable=params['unacceptable'],
+                         convertible=params['convertible'], key_mode=params['key_mode'],
+                         half_coin_mode=params['half_coin_mode'])
+        self.watchlist.add(item)
+        if DefaultConfig.WATCHLIST_PATH:
+            try:
+                self.watchlist.save(DefaultConfig.WATCHLIST_PATH)
+            except OSError as e:
+                self.buybot.session_log.log('error', message=f'保存监视列表失败: {e}')
+        return item
+
+    @property
+    def loop_gap(self) -> int:
+        """当前实际使用的循环间隔"""
+        return self.pacing.gap_ms
+
+    def current_params(self) -> dict:
+        """界面参数，商品没有单独设置时使用"""
+        params = self._params._asdict()
+        del params['loop_gap']
+        return params
+
+    def msleep(self, ms: int):
+        time.sleep(ms / 1000)
+
+    def run(self):
+        """一直运行，空闲时阻塞等待命令；在独立线程中调用"""
+        self.strategy_state = StrategyState()
+        while True:
+            if self._is_running:
+                self._handle_commands()
+            else:
+                # 停止后重新开始时标记为第一次循环
+                self.strategy_state = StrategyState()
+                self.current_item = None
+                # 空闲时阻塞等待命令，不再定时唤醒
+                self._handle_command(self._commands.get())
+                continue
+            if self._is_running:
+                self.step()
+
+    def _handle_command(self, command):
+        if command == START:
+            self._is_running = True
+        elif command == STOP:
+            self._is_running = False
+        elif command == LAYOUT:
+            # 在工作线程中换算，循环不会读到换算了一半的坐标
+            self.buybot.invalidate_layout()
+            self.buybot.session_log.log('layout', profile=self.buybot.layout.profile.name)
+
+    def _handle_commands(self):
+        """处理队列中的所有命令，不等待"""
+        while True:
+            try:
+                self._handle_command(self._commands.get_nowait())
+            except queue.Empty:
+                return
+
+    def poll(self) -> bool:
+        """处理队列中的命令并返回是否在运行，不启动线程、直接调用 step() 时使用"""
+        self._handle_commands()
+        return self._is_running
+
+    def pause(self, ms: int) -> bool:
+        """等待 ms 毫秒，期间收到停止或参数更新命令立即返回；返回是否仍在运行"""
+        deadline = time.monotonic() + ms / 1000
+        self._handle_commands()
+        while self._is_running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                command = self._commands.get(timeout=remaining)
+            except queue.Empty:
+                break
+            self._handle_command(command)
+            if command == PARAMS:
+                break
+        return self._is_running
+
+    def step(self):
+        """执行一轮：进入商品页面、识别价格、购买或刷新，最后等待循环间隔"""
+        try:
+            with self.buybot.timing.span('iteration'):
+                self._step()
+        except InputFailSafe as e:
+            # 鼠标被甩到屏幕角落，立即停止
+            self._is_running = False
+            self.buybot.session_log.log('error', message=str(e))
+
+    def _step(self):
+        # 整轮使用同一份参数快照和循环间隔
+        defaults = self.current_params()
+        loop_gap = self.pacing.gap_ms
+        # 挑选本轮检查的商品
+        item = self.watchlist.next_item(defaults)
+        if item is None:
+            self.pause(100)
+            return
+        # 获取当前参数值
+        item_params = item.params(defaults)
+        params = StrategyParams(ideal=item_params['ideal'],
+                                unacceptable=item_params['unacceptable'],
+                                key_mode=item_params['key_mode'],
+                                half_coin_mode=item_params['half_coin_mode'])
+        current_convertible = item_params['convertible']
+        if item is not self.current_item:
+            # 换商品时先回到商店页面，余额差值只在连续检查同一商品时有效
+            if self.current_item is not None:
+                self.buybot.back_to_shop()
+            self.current_item = item
+            self.strategy_state = StrategyState()
+            self.last_purchase = None
+        state = self.strategy_state
+        lowest_price = None
+        # 本轮结果，用于调整循环间隔：None 表示不调整
+        outcome = None
+
+        action_reference = None
+        outcome_wait_ms = 0
+        try:
+            # 进入商品页面，截图前等价格区域重绘完成
+            price_reference = self.buybot.price_thumbnail(current_convertible)
+            self.buybot.open_item(item.position)
+            # self.msleep(375)
+
+            # 获取商品价格
+            # 能检测购买结果时，上一轮没有买到东西余额就不会变，不必再读余额
+            read_balance = params.half_coin_mode and (not self.buybot.detects_outcome()
+                                                      or self.buybot.balance_half_coin is None
+                                                      or use_balance(state, params))
+            if read_balance:
+                # 价格和哈夫币余额在同一帧中截取，一次识别；余额作为下一轮计算差值的基准
+                previous_balance_half_coin = self.buybot.balance_half_coin
+                market_price, current_balance_half_coin = self.buybot.detect_price_and_balance(
+                    is_convertible=current_convertible, reference=price_reference, item=item.key)
+                # 使用哈夫币余额差值计算价格
+                unit_price = balance_price(state, previous_balance_half_coin, current_balance_half_coin)
+                if not use_balance(state, params):
+                    # 第一轮或上一轮没有购买，直接看市场底价
+                    lowest_price = self.buybot.check_price(market_price)
+                    source = 'market'
+                elif unit_price is None:
+                    # 直接看市场底价
+                    lowest_price = self.buybot.check_price(market_price)
+                    source = 'balance_error'
+                elif unit_price == 0:
+                    # 直接看市场底价
+                    lowest_price = self.buybot.check_price(market_price)
+                    source = 'balance_failed'
+                else:
+                    lowest_price = unit_price
+                    source = 'balance'
+                    # 余额差值是上一次购买的均价
+                    if self.last_purchase is not None:
+                        self.buybot.session_log.log('purchase_price', item=item.key, price=unit_price,
+                                                    decision=self.last_purchase[0], quantity=self.last_purchase[1])
+            else:
+                # 直接看市场底价
+                lowest_price = self.buybot.detect_price(is_convertible=current_convertible, debug_mode=False, reference=price_reference,
+                                                       item=item.key)
+                source = 'market'
+
+            # 点击前记录价格区域，循环间隔内画面重绘完成就进入下一轮
+            action_reference = self.buybot.price_thumbnail(current_convertible)
+            # 点击前记录购买结果区域，之后只接受新出现的提示
+            outcome_reference = self.buybot.outcome_reference()
+
+            # 决策耗时包含其中的点击，点击本身另外记为 click
+            with self.buybot.timing.span('decision'):
+                decision, state = decide(state, lowest_price, params)
+                if decision == FREEREFRESH:
+                    self.buybot.freerefresh(good_postion=item.position)
+                elif decision == REFRESH:
+                    self.buybot.refresh(is_convertible=current_convertible)
+                    # self.msleep(2500)
+                elif decision == BUY:
+                    self.buybot.buy(is_convertible=current_convertible)
+                else:
+                    self.buybot.refresh(is_convertible=False)
+            # 点击后立即检测购买结果，不检测或没有看到新提示时为None；等待的时间计入循环间隔
+            outcome_start = time.perf_counter()
+            result = self.buybot.purchase_outcome(outcome_reference) if decision != FREEREFRESH else None
+            outcome_wait_ms = (time.perf_counter() - outcome_start) * 1000
+            state = apply_outcome(state, result)
+            if result in (FAILED, INSUFFICIENT):
+                self.buybot.session_log.log('purchase_result', result=result, decision=decision)
+            if result == INSUFFICIENT:
+                # 哈夫币不足时继续点击没有意义
+                self._is_running = False
+            elif decision not in (FREEREFRESH, REFRESH, BUY) and result != FAILED:
+                # 钥匙卡模式买到一张后不再检查该商品，所有商品都买到后停止
+                item.enabled = False
+                if not self.watchlist.has_enabled():
+                    self._is_running = False
+            quantity = purchased_quantity(decision, state, result)
+            self.last_purchase = (decision, quantity) if quantity > 0 else None
+            self.strategy_state = state
+            self.buybot.session_log.log('decision',
+                                        mode='key' if params.key_mode else ('half_coin' if params.half_coin_mode else 'normal'),
+                                        source=source, price=lowest_price, decision=decision,
+                                        ideal=params.ideal, unacceptable=params.unacceptable,
+                                        balance=self.buybot.balance_half_coin, result=result)
+            # 价格历史只记录画面上的市场底价；余额差值算出的是上一次购买的均价，不能混进回测用的价格序列
+            observed_price = market_price if source == 'balance' else lowest_price
+            if observed_price is not None:
+                self.buybot.price_history.append(item=item.key, price=observed_price, decision=decision,
+                                                 quantity=quantity)
+            # 余额差值异常说明上一轮的点击可能没有生效
+            outcome = source if source in ('balance_error', 'balance_failed') else 'ok'
+        except InputFailSafe:
+            raise
+        except Exception as e:
+            if str(e) == '识别失败':  # 识别失败, 建议检查物品是否可兑换
+                outcome = 'recognition_failed'
+                if self.pause(loop_gap):
+                    self.buybot.freerefresh(good_postion=item.position)
+            else:
+                self.buybot.session_log.log('error', message=str(e))
+        self.watchlist.observe(item, lowest_price)
+        # 只有识别前和间隔内价格区域都确实重绘过，才算画面跟上了当前间隔
+        redraw = self.buybot.redraw_state
+        gap_redraw = None
+        # 检测购买结果已经等待的时间从循环间隔中扣除
+        remaining_gap = int(loop_gap - outcome_wait_ms)
+        if remaining_gap > 0:
+            if action_reference is not None:
+                # 价格没变时画面不会变化，保持不变 WAIT_UNCHANGED_MS 后提前进入下一轮
+                gap_redraw = self.buybot.wait_price_redraw(current_convertible, action_reference, timeout_ms=remaining_gap,
+                                                           unchanged_ms=DefaultConfig.WAIT_UNCHANGED_MS)
+            else:
+                self.pause(remaining_gap)
+        if outcome == 'ok':
+            if gap_redraw == TIMEOUT:
+                # 间隔内价格区域没有重绘完成，说明间隔太短
+                self.pacing.failure('redraw_timeout')
+            elif redraw == REDRAWN and gap_redraw in (None, REDRAWN):
+                # 画面没变的轮次不能说明画面跟得上，保持当前间隔
+                self.pacing.success()
+        elif outcome is not None:
+            self.pacing.failure(outcome)
+
+    def update_params(self, ideal, unacceptable, convertible, key_mode, half_coin_mode, loop_gap):
+        """发布新的参数快照，下一轮生效；修改循环间隔时从新的值重新调整"""
+        if loop_gap != self._params.loop_gap:
+            self.pacing.reset(loop_gap)
+        self._params = WorkerParams(ideal, unacceptable, convertible, key_mode, half_coin_mode, loop_gap)
+        self._commands.put(PARAMS)
+
+    def set_running(self, state):
+        """通知工作线程开始或停止，可以在任意线程调用"""
+        self._commands.put(START if state else STOP)
+
+    def refresh_layout(self):
+        """显示器变化后通知工作线程在两轮之间重新换算坐标，可以在任意线程调用"""
+        self._commands.put(LAYOUT)
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+'''
+模拟交易行窗口
+
+用全屏窗口代替游戏：按 layouts/ 中的布局在 BuyBot 使用的坐标上绘制商店页面、商品页面的最低价格、
+数量按钮、购买按钮、购买结果提示和哈夫币余额提示框，响应注入的点击、鼠标移动和Esc。价格按均值回复的随机过程变化，
+画面在操作后延迟 redraw_ms 才重绘，余额提示框延迟 tooltip_ms 出现。
+
+配合虚拟显示器可以在没有游戏客户端的Linux上跑完整循环，统计吞吐和误点击：
+    xvfb-run -s "-screen 0 2560x1440x24" sh -c \\
+        "python benchmarks/market_sim.py --stats sim.json & sleep 2; \\
+         python headless.py --set INPUT_BACKEND='\"pyautogui\"' --position 400 400 --duration 600"
+
+商店页面左侧是商品格子，点击任意格子进入该商品页面；按Esc回到商店页面。
+和游戏一样，商品页面上点击商品格子所在位置不起作用（Worker 每轮都会点击一次商品位置），不算误点击。
+退出（关闭窗口或Ctrl+C）时输出统计，--stats 同时保存为JSON。
+'''
+
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.layout import load_profiles, select_profile
+from backend.strategy import BUY_NUMBER, REFRESH_NUMBER
+from config import DefaultConfig
+
+SHOP = 'shop'
+ITEM = 'item'
+# 鼠标与余额位置的距离小于该值时显示提示框
+HOVER_RADIUS = 24
+
+
+class PriceProcess:
+    '''
+    均值回复的价格随机过程，每次调用 next() 生成下一个最低价格
+
+    mean：长期均值
+
+    volatility：每一步的相对波动
+
+    reversion：每一步向均值回复的比例
+    '''
+    def __init__(self, mean: float, volatility: float = 0.05, reversion: float = 0.2, rng: random.Random = None):
+        self.mean = mean
+        self.volatility = volatility
+        self.reversion = reversion
+        self.rng = rng if rng is not None else random.Random()
+        self.price = mean
+
+    def next(self) -> int:
+        self.price += self.reversion * (self.mean - self.price) + self.rng.gauss(0, self.volatility * self.mean)
+        self.price = max(self.price, 1.0)
+        return int(round(self.price))
+
+
+class MarketModel:
+    '''
+    交易行状态，只处理逻辑，不涉及绘制
+
+    points/rects：换算好的按钮坐标和识别区域，见 LayoutProfile.resolve
+
+    tiles：商店页面的商品格子 [(left, top, right, bottom), ...]
+
+    convertible：商品页面使用可兑换物品的布局
+
+    fail_rate：购买时最低价已被别人买走的概率，此时不扣款但价格变化
+    '''
+    def __init__(self, points: dict, rects: dict, tiles: list, prices: list, balance: int,
+                 convertible: bool = True, min_quantity: int = REFRESH_NUMBER, max_quantity: int = BUY_NUMBER,
+                 fail_rate: float = 0.0, rng: random.Random = None):
+        self.points = points
+        self.rects = rects
+        self.tiles = tiles
+        self.prices = prices
+        self.balance = balance
+        self.convertible = convertible
+        self.min_quantity = min_quantity
+        self.max_quantity = max_quantity
+        self.fail_rate = fail_rate
+        self.rng = rng if rng is not None else random.Random()
+        self.page = SHOP
+        self.item = None
+        self.price = None
+        self.quantity = 1
+        self.hovering = False
+        self.message = ''
+        self.stats = {'clicks': 0, 'misclicks': 0, 'opens': 0, 'reopens': 0, 'escapes': 0, 'purchases': 0,
+                      'purchased_quantity': 0, 'spent': 0, 'sold_out': 0, 'insufficient': 0}
+        prefix = 'isconvertible' if convertible else 'notconvertiable'
+        self.buttons = {
+            'min': points[f'postion_{prefix}_min_shopping_number'],
+            'max': points[f'postion_{prefix}_max_shopping_number'],
+            'buy': points[f'postion_{prefix}_buy_button'],
+        }
+        self.price_rect = rects['range_isconvertible_lowest_price' if convertible else 'range_notconvertible_lowest_price']
+
+    def view(self) -> tuple:
+        '''
+        当前应显示的画面，窗口延迟一段时间后按它重绘
+        '''
+        return (self.page, self.price, self.quantity, self.balance, self.hovering, self.message)
+
+    def click(self, x: int, y: int) -> str:
+        '''
+        返回点击的目标，没有点中任何按钮时为None并记为误点击
+        '''
+        self.stats['clicks'] += 1
+        target = self._target(x, y)
+        if target is None:
+            self.stats['misclicks'] += 1
+        elif target == 'tile':
+            self.open(self._tile_at(x, y))
+        elif target == 'reopen':
+            # 已经在商品页面，画面不变
+            self.stats['reopens'] += 1
+        elif target == 'min':
+            self.quantity = self.min_quantity
+        elif target == 'max':
+            self.quantity = self.max_quantity
+        elif target == 'buy':
+            self.buy()
+        return target
+
+    def _target(self, x: int, y: int):
+        if self.page == SHOP:
+            return 'tile' if self._tile_at(x, y) is not None else None
+        for name, (bx, by) in self.buttons.items():
+            if abs(x - bx) <= HOVER_RADIUS and abs(y - by) <= HOVER_RADIUS:
+                return name
+        return 'reopen' if self._tile_at(x, y) is not None else None
+
+    def _tile_at(self, x: int, y: int):
+        for i, (left, top, right, bottom) in enumerate(self.tiles):
+            if left <= x < right and top <= y < bottom:
+                return i
+        return None
+
+    def open(self, item: int):
+        self.stats['opens'] += 1
+        self.page = ITEM
+        self.item = item
+        self.price = self.prices[item].next()
+        self.quantity = 1
+        self.message = ''
+
+    def escape(self):
+        self.stats['escapes'] += 1
+        self.page = SHOP
+        self.message = ''
+
+    def buy(self):
+        cost = self.price * self.quantity
+        if self.rng.random() < self.fail_rate:
+            self.stats['sold_out'] += 1
+            self.message = '已售出'
+        elif cost > self.balance:
+            self.stats['insufficient'] += 1
+            self.message = '哈夫币不足'
+            return
+        else:
+            self.balance -= cost
+            self.stats['purchases'] += 1
+            self.stats['purchased_quantity'] += self.quantity
+            self.stats['spent'] += cost
+            self.message = '购买成功'
+        # 买完或被抢先后最低价格变化
+        self.price = self.prices[self.item].next()
+        self.quantity = 1
+
+    def hover(self, x: int, y: int) -> bool:
+        '''
+        返回提示框是否从无到有或从有到无
+        '''
+        bx, by = self.points['postion_balance']
+        hovering = math.hypot(x - bx, y - by) <= HOVER_RADIUS
+        changed = hovering != self.hovering
+        self.hovering = hovering
+        return changed
+
+
+def make_tiles(width: int, height: int, columns: int = 4, rows: int = 3) -> list:
+    '''
+    商店页面左侧的商品格子，从 5% 宽度、15% 高度开始，共占 55% 宽度、70% 高度
+    '''
+    left, top = int(width * 0.05), int(height * 0.15)
+    tile_w, tile_h = int(width * 0.55) // columns, int(height * 0.7) // rows
+    return [(left + c * tile_w, top + r * tile_h, left + (c + 1) * tile_w - 8, top + (r + 1) * tile_h - 8)
+            for r in range(rows) for c in range(columns)]
+
+
+def create_window(model: MarketModel, redraw_ms: int, tooltip_ms: int, font_family: str = 'Arial'):
+    '''
+    创建显示 model 的全屏窗口，需要先创建 QApplication
+    '''
+    from PyQt5 import QtCore, QtGui, QtWidgets
+
+    class MarketWindow(QtWidgets.QWidget):
+        def __init__(self):
+            super().__init__()
+            self.setWindowFlags(QtCore.Qt.FramelessWindowHint)
+            self.setMouseTracking(True)
+            self.setFocusPolicy(QtCore.Qt.StrongFocus)
+            self.shown = model.view()
+
+        def schedule(self, delay_ms: int):
+            # 逻辑立即生效，画面延迟重绘
+            view = model.view()
+            QtCore.QTimer.singleShot(delay_ms, lambda: self.show_view(view))
+
+        def show_view(self, view: tuple):
+            self.shown = view
+            self.update()
+
+        def mousePressEvent(self, event):
+            if event.button() == QtCore.Qt.LeftButton:
+                model.click(event.globalX(), event.globalY())
+                self.schedule(redraw_ms)
+
+        def mouseMoveEvent(self, event):
+            if model.hover(event.globalX(), event.globalY()):
+                self.schedule(tooltip_ms if model.hovering else 0)
+
+        def keyPressEvent(self, event):
+            if event.key() == QtCore.Qt.Key_Escape:
+                model.escape()
+                self.schedule(redraw_ms)
+
+        def paintEvent(self, event):
+            page, price, quantity, balance, hovering, message = self.shown
+            painter = QtGui.QPainter(self)
+            painter.fillRect(self.rect(), QtGui.QColor(24, 28, 32))
+            painter.setPen(QtGui.QColor(230, 230, 230))
+            origin = self.mapToGlobal(QtCore.QPoint(0, 0))
+            painter.translate(-origin.x(), -origin.y())
+            if page == SHOP:
+                for i, (left, top, right, bottom) in enumerate(model.tiles):
+                    painter.fillRect(left, top, right - left, bottom - top, QtGui.QColor(48, 54, 60))
+                    painter.drawText(left + 12, top + 28, f'商品{i + 1}')
+            else:
+                self.draw_number(painter, model.price_rect, f'{price:,}')
+                for name, (x, y) in model.buttons.items():
+                    painter.fillRect(x - HOVER_RADIUS, y - HOVER_RADIUS // 2, HOVER_RADIUS * 2, HOVER_RADIUS,
+                                     QtGui.QColor(70, 110, 70) if name == 'buy' else QtGui.QColor(60, 66, 72))
+                painter.drawText(model.buttons['buy'][0] - 160, model.buttons['buy'][1] + 6, f'x{quantity}')
+                if message:
+                    # 购买结果提示，布局中有 range_purchase_result 时画在该区域（与 BuyBot.purchase_outcome 检测的区域相同）
+                    left, top, right, bottom = model.rects.get('range_purchase_result', (0, 0, 0, 0))
+                    painter.fillRect(left, top, right - left, bottom - top, QtGui.QColor(40, 40, 40))
+                    painter.drawText(QtCore.QRect(left, top, right - left, bottom - top), QtCore.Qt.AlignCenter, message)
+            bx, by = model.points['postion_balance']
+            painter.drawText(bx - 20, by + 6, '哈夫币')
+            if hovering:
+                left, top, right, bottom = model.rects['postion_balance_half_coin']
+                painter.fillRect(left, top, right - left, bottom - top, QtGui.QColor(12, 12, 12))
+                self.draw_number(painter, (left, top, right, bottom), f'{balance:,}')
+            painter.end()
+
+        def draw_number(self, painter, rect, text):
+            left, top, right, bottom = rect
+            font = QtGui.QFont(font_family)
+            font.setBold(True)
+            font.setPixelSize(max(int((bottom - top) * 0.8), 6))
+            painter.setFont(font)
+            painter.drawText(QtCore.QRect(left, top, right - left, bottom - top),
+                             QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter, text)
+
+    window = MarketWindow()
+    window.setGeometry(QtWidgets.QApplication.primaryScreen().geometry())
+    return window
+
+def run_window(app, model: MarketModel, redraw_ms: int, tooltip_ms: int, font_family: str, stats_path: str = None):
+    from PyQt5 import QtCore
+    window = create_window(model, redraw_ms, tooltip_ms, font_family)
+    window.show()
+    window.activateWindow()
+    # Ctrl+C 时正常退出并输出统计
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
+    keepalive = QtCore.QTimer()
+    keepalive.timeout.connect(lambda: None)
+    keepalive.start(200)
+    start = time.perf_counter()
+    app.exec_()
+    report(model, time.perf_counter() - start, stats_path)
+
+def report(model: MarketModel, elapsed_s: float, path: str = None):
+    stats = dict(model.stats, elapsed_s=elapsed_s, balance=model.balance)
+    stats['clicks_per_s'] = stats['clicks'] / elapsed_s if elapsed_s > 0 else 0.0
+    stats['misclick_rate'] = stats['misclicks'] / stats['clicks'] if stats['clicks'] else 0.0
+    print(f"运行 {elapsed_s:.1f}s  点击 {stats['clicks']} 次（误点击 {stats['misclick_rate']:.2%}）  "
+          f"进入商品页面 {stats['opens']} 次（已在商品页面时点击 {stats['reopens']} 次）  购买 {stats['purchases']} 次共 {stats['purchased_quantity']} 个  "
+          f"花费 {stats['spent']}  余额不足 {stats['insufficient']} 次  被抢先 {stats['sold_out']} 次")
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟交易行窗口')
+    parser.add_argument('--resolution', type=int, nargs=2, metavar=('W', 'H'),
+                        help='布局使用的分辨率，默认为主屏幕分辨率')
+    parser.add_argument('--price-mean', type=float, default=DefaultConfig.IDEAL_PRICE, help='价格均值')
+    parser.add_argument('--price-volatility', type=float, default=0.05, help='每次变化的相对波动')
+    parser.add_argument('--price-reversion', type=float, default=0.2, help='每次变化向均值回复的比例')
+    parser.add_argument('--balance', type=int, default=10_000_000, help='初始哈夫币余额')
+    parser.add_argument('--not-convertible', action='store_true', help='使用不可兑换物品的布局')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='购买时被抢先的概率')
+    parser.add_argument('--redraw-ms', type=int, default=80, help='操作后画面重绘的延迟')
+    parser.add_argument('--tooltip-ms', type=int, default=120, help='余额提示框出现的延迟')
+    parser.add_argument('--font', default='Arial', help='数字字体')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--stats', help='退出时把统计保存为JSON')
+    args = parser.parse_args()
+
+    from PyQt5 import QtWidgets
+    app = QtWidgets.QApplication([])
+    if args.resolution is None:
+        size = app.primaryScreen().geometry()
+        width, height = size.width(), size.height()
+    else:
+        width, height = args.resolution
+    profile = select_profile(load_profiles(DefaultConfig.LAYOUT_DIR), width, height)
+    resolved = profile.resolve((0, 0, width, height))
+    points = {name: value for name, value in resolved.items() if name in profile.points}
+    rects = {name: value for name, value in resolved.items() if name in profile.rects}
+    rng = random.Random(args.seed)
+    tiles = make_tiles(width, height)
+    prices = [PriceProcess(args.price_mean, args.price_volatility, args.price_reversion, rng) for _ in tiles]
+    model = MarketModel(points, rects, tiles, prices, args.balance, convertible=not args.not_convertible,
+                        fail_rate=args.fail_rate, rng=rng)
+    print(f'使用布局 {profile.name}，商品格子中心: '
+          + ' '.join(f'({(l + r) // 2},{(t + b) // 2})' for l, t, r, b in tiles[:4]) + ' ...')
+    run_window(app, model, args.redraw_ms, args.tooltip_ms, args.font, args.stats)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+'''
+识别模型基准测试
+
+在录制的标注截图上比较各识别模型（见 config.py 中的 OCR_MODEL）的加载耗时、单张识别耗时、
+批量识别耗时和准确率。
+
+截图目录与 backend/digit_recognizer.py 相同：文件名中第一个"_"之前的部分是标注内容，
+例如 "1,234,567_01.png"。
+
+用法：
+    python benchmarks/ocr_bench.py <截图目录> [--models fp32,int8,onnx] [--onnx digit_recognizer.onnx]
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.digit_recognizer import load_labelled_dir
+from backend.ocr_engine import create_ocr_engine
+from config import DefaultConfig
+
+
+def run_model(model: str, crops: list, labels: list, repeat: int = 3, batch_size: int = 2,
+              onnx_path: str = DefaultConfig.OCR_ONNX_PATH, threads: int = DefaultConfig.OCR_TORCH_THREADS) -> dict:
+    start = time.perf_counter()
+    engine = create_ocr_engine(model, use_gpu=False, torch_threads=threads,
+                               min_confidence=DefaultConfig.OCR_MIN_CONFIDENCE, onnx_path=onnx_path)
+    if not engine.wait_ready():
+        return {'model': model, 'error': str(engine.error)}
+    load_s = time.perf_counter() - start
+
+    single = []
+    correct = 0
+    for _ in range(repeat):
+        correct = 0
+        for crop, label in zip(crops, labels):
+            start = time.perf_counter()
+            number, confidence = engine.recognize_number(crop)
+            single.append(time.perf_counter() - start)
+            correct += number == label
+
+    batched = []
+    for _ in range(repeat):
+        for i in range(0, len(crops), batch_size):
+            start = time.perf_counter()
+            engine.recognize_numbers(crops[i:i + batch_size])
+            batched.append(time.perf_counter() - start)
+
+    single = np.array(single) * 1000
+    batched = np.array(batched) * 1000
+    return {
+        'model': model,
+        'load_s': load_s,
+        'accuracy': correct / len(crops),
+        'single_p50_ms': float(np.percentile(single, 50)),
+        'single_p95_ms': float(np.percentile(single, 95)),
+        'batch_size': batch_size,
+        'batch_p50_ms': float(np.percentile(batched, 50)),
+        'batch_p95_ms': float(np.percentile(batched, 95)),
+    }
+
+def print_report(results: list):
+    print(f"{'模型':<8}{'加载(s)':>10}{'准确率':>10}{'单张p50':>10}{'单张p95':>10}{'批量p50':>10}{'批量p95':>10}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['model']:<8}加载失败: {result['error']}")
+            continue
+        print(f"{result['model']:<8}{result['load_s']:>10.1f}{result['accuracy']:>10.2%}"
+              f"{result['single_p50_ms']:>10.1f}{result['single_p95_ms']:>10.1f}"
+              f"{result['batch_p50_ms']:>10.1f}{result['batch_p95_ms']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='识别模型基准测试')
+    parser.add_argument('directory', help='标注截图目录')
+    parser.add_argument('--models', default='fp32,int8,onnx', help='逗号分隔的模型列表')
+    parser.add_argument('--onnx', default=DefaultConfig.OCR_ONNX_PATH, help='ONNX模型文件')
+    parser.add_argument('--threads', type=int, default=DefaultConfig.OCR_TORCH_THREADS, help='CPU推理线程数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    parser.add_argument('--batch-size', type=int, default=2, help='批量识别时每批的截图数')
+    parser.add_argument('--json', help='把结果保存为JSON')
+    args = parser.parse_args()
+
+    samples = load_labelled_dir(args.directory)
+    if not samples:
+        print('没有标注截图')
+        return 1
+    crops = [np.asarray(img) for img, label in samples]
+    labels = [int(label.replace(',', '')) for img, label in samples]
+    results = [run_model(model, crops, labels, args.repeat, args.batch_size, args.onnx, args.threads)
+               for model in args.models.split(',')]
+    print(f'标注截图 {len(crops)} 张')
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+'''
+离线回放基准测试
+
+把录制好的全屏截图序列通过回放截图后端、只记录不点击的输入后端，
+交给真实的 Worker / BuyBot 逻辑运行，统计各阶段耗时、每秒循环次数和识别准确率。
+不需要游戏，也不需要图形界面，可以在Linux上运行。
+
+截图目录结构：
+    <截图目录>/0001.png, 0002.png, ...   全屏截图（.png/.npy），按文件名顺序回放
+    <截图目录>/labels.json               可选，{"0001.png": 518, ...} 每帧价格区域的正确数值
+
+每次点击商品位置（进入商品页面）时切换到下一帧。
+
+用法：
+    python benchmarks/replay_bench.py <截图目录> [--iterations N] [--json 结果.json]
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.capture import ReplayCapture
+from backend.input_engine import RecordingInput
+from backend.BuyBot import BuyBot
+from backend.session_log import SessionLogger
+from backend.price_history import PriceHistory
+from backend.frame_recorder import FrameRecorder
+from backend.worker import Worker
+from config import DefaultConfig
+
+# 回放时商品在商店页面中的位置（像素坐标）
+ITEM_POSITION = [40, 40]
+STAGES = ['capture', 'wait', 'ocr', 'input', 'decision', 'iteration']
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+        self._iteration_sum = 0.0
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+            if stage not in ('decision', 'iteration'):
+                self._iteration_sum += seconds
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+    def iteration(self, seconds: float):
+        '''
+        记录一轮的总耗时，扣除其他阶段后的剩余部分计为决策耗时
+        '''
+        with self._lock:
+            stage_sum = self._iteration_sum
+            self._iteration_sum = 0.0
+        self.add('decision', max(seconds - stage_sum, 0.0))
+        self.add('iteration', seconds)
+
+    def summary(self) -> dict:
+        result = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            ms = np.array(values) * 1000
+            result[stage] = {
+                'count': len(values),
+                'p50': float(np.percentile(ms, 50)),
+                'p95': float(np.percentile(ms, 95)),
+                'p99': float(np.percentile(ms, 99)),
+                'max': float(ms.max()),
+            }
+        return result
+
+
+class BenchCapture(ReplayCapture):
+    '''
+    只统计真正的截图耗时，变化检测用的缩略图不计入
+    '''
+    def __init__(self, frames, timer: StageTimer):
+        super().__init__(frames, loop=False)
+        self.timer = timer
+        self._local = threading.local()
+
+    def thumbnail(self, range, step=4):
+        self._local.in_thumbnail = True
+        try:
+            return super().thumbnail(range, step)
+        finally:
+            self._local.in_thumbnail = False
+
+    def grab(self, range):
+        if getattr(self._local, 'in_thumbnail', False):
+            return super().grab(range)
+        return self.timer.wrap('capture', super().grab)(range)
+
+
+class BenchInput(RecordingInput):
+    '''
+    点击商品位置时切换到下一帧，模拟重新进入商品页面
+    '''
+    def __init__(self, capture: BenchCapture):
+        super().__init__(screen_size=capture.screen_size())
+        self.capture = capture
+        self.finished = False
+        self._position = None
+
+    def move(self, x, y):
+        super().move(x, y)
+        self._position = (x, y)
+
+    def mouse_up(self):
+        super().mouse_up()
+        if self._position == tuple(ITEM_POSITION) and not self.capture.next_frame():
+            self.finished = True
+
+
+class NullOcr:
+    '''
+    只使用数字模板时代替OCR引擎
+    '''
+    def start(self):
+        pass
+
+    def is_ready(self):
+        return True
+
+    def wait_ready(self, timeout = None):
+        return True
+
+    def recognize_number(self, img):
+        return None, 0.0
+
+    def recognize_numbers(self, imgs):
+        return [(None, 0.0)] * len(imgs)
+
+
+def load_labels(directory: str) -> dict:
+    path = os.path.join(directory, 'labels.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return {name: int(value) for name, value in json.load(f).items()}
+
+def run_benchmark(directory: str, iterations: int = 0, templates_only: bool = False,
+                  ideal: int = DefaultConfig.IDEAL_PRICE, unacceptable: int = DefaultConfig.UNACCEPTABLE_PRICE,
+                  convertible: bool = DefaultConfig.IS_CONVERTIBLE, verbose: bool = False) -> dict:
+    '''
+    运行回放基准测试，返回统计结果
+
+    iterations：最多运行的轮数，0表示回放完所有截图
+    '''
+    timer = StageTimer()
+    capture = BenchCapture(directory, timer)
+    labels = load_labels(directory)
+    input_backend = BenchInput(capture)
+
+    # 日志、价格历史和调试截图写到临时目录，不影响真实运行的记录
+    scratch = tempfile.TemporaryDirectory()
+    bot = BuyBot(capture=capture, input_backend=input_backend,
+                 ocr=NullOcr() if templates_only else None,
+                 session_log=SessionLogger(directory=os.path.join(scratch.name, 'logs'), console=DefaultConfig.LOG_CONSOLE),
+                 price_history=PriceHistory(path=os.path.join(scratch.name, 'price_history.bin'),
+                                            windows_s=DefaultConfig.HISTORY_WINDOWS_S),
+                 frames=FrameRecorder(capacity=DefaultConfig.FRAME_RECORDER_CAPACITY,
+                                      directory=os.path.join(scratch.name, 'debug_frames'),
+                                      min_interval_s=DefaultConfig.FRAME_RECORDER_MIN_INTERVAL_S,
+                                      enabled=DefaultConfig.FRAME_RECORDER_ENABLED))
+    if not bot.ocr.wait_ready():
+        raise RuntimeError('OCR引擎不可用，可以用 --templates-only 只测试数字模板')
+
+    # 记录每帧的识别结果，用于计算准确率
+    recognized = []
+    identify_reading, identify_readings = bot.identify_reading, bot.identify_readings
+    def recognize(img):
+        name = capture.current_name
+        reading = identify_reading(img)
+        recognized.append((name, reading[0]))
+        return reading
+    def recognize_batch(imgs):
+        # 同一帧的价格和余额，只有价格有标注
+        name = capture.current_name
+        readings = identify_readings(imgs)
+        recognized.append((name, readings[0][0]))
+        return readings
+    bot.identify_reading = timer.wrap('ocr', recognize)
+    bot.identify_readings = timer.wrap('ocr', recognize_batch)
+    bot.input.run = timer.wrap('input', bot.input.run)
+    bot.wait_price_redraw = timer.wrap('wait', bot.wait_price_redraw)
+
+    worker = Worker(bot)
+    bot.set_worker(worker)
+    worker.watchlist.clear()
+    worker.set_item_position(ITEM_POSITION)
+    worker.update_params(ideal, unacceptable, convertible, False, False, 0)
+    # 回放不需要等待画面，固定不留循环间隔
+    worker.pacing.enabled = False
+    worker.pacing.reset(0)
+    worker.set_running(True)
+
+    count = 0
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with output:
+        while not input_backend.finished and (iterations <= 0 or count < iterations):
+            iteration_start = time.perf_counter()
+            worker.step()
+            timer.iteration(time.perf_counter() - iteration_start)
+            count += 1
+        elapsed = time.perf_counter() - start
+        # 等日志线程写完，避免和报告混在一起
+        bot.session_log.close()
+        bot.price_history.close()
+        bot.frames.close()
+    scratch.cleanup()
+
+    labelled = [(name, number) for name, number in recognized if name in labels]
+    correct = sum(1 for name, number in labelled if labels[name] == number)
+    return {
+        'iterations': count,
+        'elapsed_s': elapsed,
+        'iterations_per_s': count / elapsed if elapsed > 0 else 0.0,
+        'stages_ms': timer.summary(),
+        'recognitions': len(recognized),
+        'labelled': len(labelled),
+        'accuracy': correct / len(labelled) if labelled else None,
+        'cache': {'hits': bot.ocr_cache.hits, 'misses': bot.ocr_cache.misses},
+    }
+
+def print_report(result: dict):
+    print(f"{'阶段':<10}{'次数':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+    for stage in STAGES:
+        stats = result['stages_ms'].get(stage)
+        if stats is None:
+            continue
+        print(f"{stage:<10}{stats['count']:>8}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}{stats['max']:>10.2f}")
+    print(f"循环次数: {result['iterations']}  耗时: {result['elapsed_s']:.2f}s  每秒循环: {result['iterations_per_s']:.2f}")
+    if result['accuracy'] is not None:
+        print(f"识别准确率: {result['accuracy']:.2%} ({result['labelled']}帧有标注)")
+    print(f"识别缓存: 命中{result['cache']['hits']}次，未命中{result['cache']['misses']}次")
+
+def main():
+    parser = argparse.ArgumentParser(description='离线回放基准测试')
+    parser.add_argument('directory', help='录制的截图目录')
+    parser.add_argument('--iterations', type=int, default=0, help='最多运行的轮数，默认回放完所有截图')
+    parser.add_argument('--ideal', type=int, default=DefaultConfig.IDEAL_PRICE)
+    parser.add_argument('--unacceptable', type=int, default=DefaultConfig.UNACCEPTABLE_PRICE)
+    parser.add_argument('--not-convertible', action='store_true', help='物品不可兑换')
+    parser.add_argument('--templates-only', action='store_true', help='只使用数字模板，不加载OCR模型')
+    parser.add_argument('--json', help='把结果保存为JSON，便于比较不同版本')
+    parser.add_argument('--verbose', action='store_true', help='显示循环中的输出')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.directory, args.iterations, args.templates_only,
+                           args.ideal, args.unacceptable, not args.not_convertible, args.verbose)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
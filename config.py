@@ -8,3 +8,59 @@ class DefaultConfig:
     IS_KEY_MODE = False
     IS_HALF_COIN_MODE = False
     SCREENSHOT_DELAY_MS = 0
+    OCR_MIN_CONFIDENCE = 0.8 # 免检测识别的置信度下限，低于该值时回退到完整的readtext
+    DIGIT_TEMPLATE_PATH = 'digit_templates.npz' # 数字模板文件，由 backend/digit_recognizer.py 生成
+    DIGIT_TEMPLATE_MIN_SCORE = 0.85 # 模板匹配分数下限，低于该值时使用OCR
+    OCR_USE_GPU = False # 没有显卡时保持False，使用CPU推理
+    OCR_TORCH_THREADS = 4 # CPU推理线程数，0表示使用torch默认值
+    OCR_CACHE_SIZE = 256 # 识别结果缓存条目数
+    OCR_CACHE_PERCEPTUAL = False # 为True时使用感知哈希，容忍截图中的轻微噪点；命中后仍逐像素核对截图
+    CAPTURE_BACKEND = 'mss' # 截图后端：'mss'、'pyautogui' 或 'replay:<截图目录>'
+    INPUT_BACKEND = 'win32' # 输入后端：'win32'、'pyautogui' 或 'null'（只记录不点击）
+    INPUT_STEP_DELAY_MS = 30 # 组合动作中相邻两次点击/按键之间的间隔
+    INPUT_CLICK_HOLD_MS = 10 # 鼠标按下到抬起的间隔
+    INPUT_FAILSAFE = True # 鼠标移到屏幕任一角时停止循环（与pyautogui的FAILSAFE相同）
+    WAIT_CHANGE_TIMEOUT_MS = 500 # 等待画面重绘的最长时间
+    WAIT_SETTLE_MS = 30 # 画面变化后需要保持稳定的时间
+    WAIT_POLL_MS = 5 # 轮询画面变化的间隔
+    WAIT_UNCHANGED_MS = 80 # 循环间隔末尾价格区域保持不变达到该时长时提前进入下一轮（价格相同）；识别前的截图仍等到画面变化或超时
+    OCR_BACKEND = 'thread' # OCR运行位置：'thread'（本进程后台线程）或 'process'（独立工作进程）
+    OCR_SERVICE_POOL_SIZE = 1 # OCR工作进程数量
+    OCR_SERVICE_TIMEOUT_S = 5 # 单次识别超时，超时的工作进程会被重启
+    TIMING_ENABLED = True # 记录各阶段耗时并在界面显示
+    TIMING_CAPACITY = 4096 # 耗时记录环形缓冲区长度
+    LOG_DIR = 'logs' # 会话日志目录，每行一条JSON记录
+    LOG_MAX_BYTES = 5 * 1024 * 1024 # 单个日志文件大小上限，超过后滚动
+    LOG_BACKUP_COUNT = 5 # 保留的历史日志文件数
+    LOG_CONSOLE = True # 是否同时输出到控制台
+    HISTORY_PATH = 'logs/price_history.bin' # 价格历史文件，定长二进制记录，为空时只在内存中统计
+    HISTORY_WINDOWS_S = (300, 3600) # 滚动统计窗口（秒），建议价格使用第一个窗口
+    HISTORY_IDEAL_PERCENTILE = 10 # 建议理想价格取最近价格的分位数
+    HISTORY_UNACCEPTABLE_PERCENTILE = 75 # 建议最高价格取最近价格的分位数
+    WATCHLIST_PATH = 'watchlist.json' # 预先设置的监视商品列表，不存在时只监视按F8时鼠标所在的商品
+    WATCHLIST_PRIORITY_FLOOR = 0.1 # 价格远高于理想价格的商品的最低优先级系数
+    WATCHLIST_VOLATILITY_ALPHA = 0.3 # 价格波动指数移动平均系数
+    LAYOUT_DIR = 'layouts' # 各分辨率的按钮和识别区域坐标，相对路径以项目目录为准
+    GAME_MONITOR = 1 # 游戏所在的显示器编号（从1开始）
+    OCR_MODEL = 'int8' # 识别模型：'int8'（EasyOCR默认设置，CPU推理时本来就做int8动态量化）、'fp32'（关闭量化）或 'onnx'（导出的ONNX数字模型，置信度不足时回退到EasyOCR）
+    OCR_ONNX_PATH = 'digit_recognizer.onnx' # OCR_MODEL 为 'onnx' 时使用，由 backend/onnx_recognizer.py 导出
+    FRAME_RECORDER_ENABLED = True # 在内存中保留最近的识别截图，识别失败或按F10时写入磁盘
+    FRAME_RECORDER_CAPACITY = 64 # 保留的截图数量
+    FRAME_RECORDER_DIR = 'debug_frames' # 调试截图写入目录
+    FRAME_RECORDER_MIN_INTERVAL_S = 10 # 识别失败自动写入的最小间隔
+    VERIFY_ENABLED = True # 价格读数不可靠时补截几帧投票
+    VERIFY_MIN_CONFIDENCE = 0.9 # 识别置信度（模板匹配分数）低于该值时补截
+    VERIFY_MAX_JUMP = 0.5 # 与该物品最近价格中位数的相对偏差超过该值时补截
+    VERIFY_MIN_HISTORY = 5 # 本次运行中该物品采用过的价格少于该数量时不做偏差检查
+    VERIFY_RECENT_COUNT = 20 # 每个物品保留最近采用过的价格数量，取中位数
+    VERIFY_OVERRIDE_VOTES = 3 # 与中位数相差过大的读数有该数量的独立读数一致时仍然采用（价格确实大幅变化）
+    VERIFY_MAX_FRAMES = 3 # 最多补截的帧数
+    VERIFY_INTERVAL_MS = 15 # 补截间隔
+    PACING_ENABLED = True # 根据识别结果自动调整循环间隔，界面上的循环间隔作为初始值
+    PACING_MIN_MS = 30 # 循环间隔下限
+    PACING_MAX_MS = 1000 # 循环间隔上限
+    PACING_STEP_MS = 5 # 每轮成功后减小的间隔
+    PACING_BACKOFF = 1.5 # 识别失败、余额差值异常或间隔内价格区域没有重绘完成时间隔乘以的倍数
+    OUTCOME_SIGNATURE_PATH = 'outcome_signatures.npz' # 购买结果提示的缩略图，由 backend/outcome.py 录制，不存在时不检测
+    OUTCOME_MATCH_THRESHOLD = 12.0 # 与录制的缩略图平均像素差低于该值时认为匹配
+    OUTCOME_TIMEOUT_MS = 300 # 点击购买后等待结果提示的最长时间
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+'''
+无界面运行
+
+不加载PyQt5界面、keyboard 和窗口定位，直接在主线程中运行与界面相同的 Worker/BuyBot 循环。
+配置文件（TOML或JSON）中的键为 config.py 中 DefaultConfig 的属性名，不区分大小写；命令行参数优先于配置文件：
+
+    python headless.py --config bot.toml --position 1200 560 --duration 3600
+
+识别模型等较重的模块只在用到时加载，启动时输出导入和初始化各阶段的耗时。按 Ctrl+C 停止。
+'''
+
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import json
+import sys
+
+
+class StartupTimer:
+    '''
+    记录从进程启动到各阶段完成的耗时
+    '''
+    def __init__(self, start: float = _START):
+        self.start = start
+        self.last = start
+        self.stages = []
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def format(self) -> str:
+        parts = [f'{stage} {seconds * 1000:.0f}ms' for stage, seconds in self.stages]
+        return f"启动耗时 {(self.last - self.start) * 1000:.0f}ms（{'，'.join(parts)}）"
+
+
+def load_config_file(path: str) -> dict:
+    '''
+    读取TOML或JSON配置文件，按扩展名区分
+    '''
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def apply_overrides(config, overrides: dict):
+    '''
+    把 overrides 写入 config 的同名属性，未知的键或类型不符时抛出 ValueError
+
+    必须在导入 backend 之前调用，部分函数的默认参数在导入时读取配置
+    '''
+    for key, value in overrides.items():
+        name = key.upper()
+        if not hasattr(config, name) or name.startswith('_'):
+            raise ValueError(f'未知的配置项: {key}')
+        default = getattr(config, name)
+        if isinstance(default, tuple) and isinstance(value, list):
+            value = tuple(value)
+        elif isinstance(default, float) and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if type(value) is not type(default):
+            raise ValueError(f'配置项 {key} 应为 {type(default).__name__}，实际为 {type(value).__name__}')
+        setattr(config, name, value)
+
+def parse_assignment(text: str) -> tuple:
+    '''
+    解析 --set 的 KEY=VALUE，VALUE按JSON解析，失败时作为字符串
+    '''
+    key, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f'应为 KEY=VALUE: {text}')
+    try:
+        return key, json.loads(value)
+    except json.JSONDecodeError:
+        return key, value
+
+def parse_args(argv = None):
+    parser = argparse.ArgumentParser(description='无界面运行购买循环')
+    parser.add_argument('--config', help='TOML或JSON配置文件')
+    parser.add_argument('--set', dest='assignments', action='append', type=parse_assignment, default=[],
+                        metavar='KEY=VALUE', help='覆盖单个配置项，可以重复')
+    parser.add_argument('--ideal', type=int, help='理想价格')
+    parser.add_argument('--unacceptable', type=int, help='最高价格')
+    parser.add_argument('--loop-gap', type=int, help='循环间隔(ms)')
+    parser.add_argument('--convertible', action=argparse.BooleanOptionalAction, default=None, help='物品是否可兑换')
+    parser.add_argument('--key-mode', action=argparse.BooleanOptionalAction, default=None, help='钥匙卡模式')
+    parser.add_argument('--half-coin-mode', action=argparse.BooleanOptionalAction, default=None, help='使用哈夫币余额计算价格')
+    parser.add_argument('--position', type=int, nargs=2, metavar=('X', 'Y'),
+                        help='主商品的屏幕坐标，不传时只监视 watchlist.json 中的商品')
+    parser.add_argument('--duration', type=float, help='运行秒数，不传时一直运行')
+    parser.add_argument('--hotkeys', action='store_true', help='注册F9停止循环（需要keyboard）')
+    return parser.parse_args(argv)
+
+def collect_overrides(args) -> dict:
+    overrides = load_config_file(args.config) if args.config else {}
+    overrides.update(args.assignments)
+    for name, value in (('IDEAL_PRICE', args.ideal), ('UNACCEPTABLE_PRICE', args.unacceptable),
+                        ('LOOP_GAP', args.loop_gap), ('IS_CONVERTIBLE', args.convertible),
+                        ('IS_KEY_MODE', args.key_mode), ('IS_HALF_COIN_MODE', args.half_coin_mode)):
+        if value is not None:
+            overrides[name] = value
+    return overrides
+
+def main(argv = None):
+    args = parse_args(argv)
+    timer = StartupTimer()
+    from config import DefaultConfig
+    try:
+        apply_overrides(DefaultConfig, collect_overrides(args))
+    except (OSError, ValueError) as e:
+        print(f'配置错误: {e}')
+        return 2
+    timer.mark('配置')
+
+    # 在枚举显示器和换算布局之前声明DPI感知，否则缩放后的显示器会得到逻辑坐标
+    from monitors import set_dpi_awareness
+    set_dpi_awareness()
+
+    from backend.BuyBot import BuyBot
+    from backend.worker import Worker
+    timer.mark('导入')
+
+    bot = None
+    try:
+        bot = BuyBot()
+        worker = Worker(bot)
+        bot.set_worker(worker)
+        timer.mark('初始化')
+        if not bot.ocr.wait_ready():
+            print('OCR引擎不可用')
+            return 1
+        timer.mark('OCR就绪')
+        print(timer.format())
+
+        if args.position is not None:
+            worker.set_item_position(args.position)
+        if not worker.watchlist.has_enabled():
+            print('没有要监视的商品，请传入 --position 或编辑 watchlist.json')
+            return 2
+        worker.update_params(DefaultConfig.IDEAL_PRICE, DefaultConfig.UNACCEPTABLE_PRICE,
+                             DefaultConfig.IS_CONVERTIBLE, DefaultConfig.IS_KEY_MODE,
+                             DefaultConfig.IS_HALF_COIN_MODE, DefaultConfig.LOOP_GAP)
+        if args.hotkeys:
+            import keyboard
+            keyboard.add_hotkey('f9', worker.set_running, args=(False,))
+
+        deadline = None if args.duration is None else time.monotonic() + args.duration
+        worker.set_running(True)
+        print('开始循环')
+        try:
+            while worker.poll() and (deadline is None or time.monotonic() < deadline):
+                worker.step()
+        except KeyboardInterrupt:
+            pass
+        print('停止循环')
+        return 0
+    finally:
+        if bot is not None:
+            bot.session_log.close()
+            bot.price_history.close()
+            bot.frames.close()
+            if hasattr(bot.ocr, 'close'):
+                bot.ocr.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,13 @@
-from PyQt5.QtWidgets import QApplication, QMainWindow
 import ctypes
 from ctypes import wintypes
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    # 只用于类型标注，无界面运行时不加载PyQt5
+    from PyQt5.QtWidgets import QApplication, QMainWindow
 
-def get_monitor_counts(app: QApplication) -> int:
+
+def get_monitor_counts(app: 'QApplication') -> int:
     """
     获取连接的显示器数量
     """
@@ -11,7 +15,7 @@ def get_monitor_counts(app: QApplication) -> int:
 
 
 
-def set_window_position(app: QApplication, window: QMainWindow, target_screen_number: int, x: int, y: int):
+def set_window_position(app: 'QApplication', window: 'QMainWindow', target_screen_number: int, x: int, y: int):
     """
     :param target_screen_number: 目标屏幕的编号 (从1开始)
     :param x: 目标位置的x坐标（最左为0）
@@ -31,32 +35,31 @@ def set_window_position(app: QApplication, window: QMainWindow, target_screen_nu
     # 在目标屏幕上的特定位置显示窗口
     window.move(screen_geometry.left() + x, screen_geometry.top() + y)
     
-def set_console_window_position(target_monitor_number: int, x: int, y: int):
+def set_dpi_awareness() -> bool:
     """
-    :param target_screen_number: 目标屏幕的编号 (从1开始)
-    :param x: 目标位置的x坐标（最左为0）
-    :param y: 目标位置的y坐标（最上为0）
+    声明进程支持按显示器DPI缩放，之后枚举显示器、截图和移动鼠标都使用物理像素坐标。
+    Qt界面创建 QApplication 时会自动设置，无界面运行时必须在枚举显示器和换算布局之前调用
 
-    :raise ValueError: 如果目标屏幕编号超出范围；如果没找到控制台窗口
+    :return: 是否设置成功，非Windows系统返回False
     """
-    # 尝试设置控制台窗口位置
+    try:
+        # 2 = PROCESS_PER_MONITOR_DPI_AWARE，Windows 8.1 及以上
+        return ctypes.windll.shcore.SetProcessDpiAwareness(2) == 0
+    except (AttributeError, OSError):
+        pass
+    try:
+        return bool(ctypes.windll.user32.SetProcessDPIAware())
+    except (AttributeError, OSError):
+        return False
 
+def enumerate_monitors() -> list:
+    """
+    枚举所有显示器，按系统顺序返回 (left, top, right, bottom) 像素坐标列表
 
-    
-    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    :raise AttributeError: 非Windows系统没有 ctypes.WinDLL
+    """
     user32 = ctypes.WinDLL('user32', use_last_error=True)
-    
-    SW_RESTORE = 9
-    
-    # 获取控制台窗口句柄
-    hwnd = kernel32.GetConsoleWindow()
-    
-    # 如果存在控制台窗口
-    if not hwnd:
-        raise ValueError("控制台窗口不存在")
-    
 
-    
     # 枚举显示器的回调函数
     def MonitorEnumProc(hMonitor, hdcMonitor, lprcMonitor, dwData):
         monitors.append((lprcMonitor.contents.left, lprcMonitor.contents.top, 
@@ -76,6 +79,35 @@ def set_console_window_position(target_monitor_number: int, x: int, y: int):
     monitors = []
     callback = MonitorEnumProcType(MonitorEnumProc)
     user32.EnumDisplayMonitors(None, None, callback, 0)
+    return monitors
+
+def set_console_window_position(target_monitor_number: int, x: int, y: int):
+    """
+    :param target_screen_number: 目标屏幕的编号 (从1开始)
+    :param x: 目标位置的x坐标（最左为0）
+    :param y: 目标位置的y坐标（最上为0）
+
+    :raise ValueError: 如果目标屏幕编号超出范围；如果没找到控制台窗口
+    """
+    # 尝试设置控制台窗口位置
+
+
+    
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    user32 = ctypes.WinDLL('user32', use_last_error=True)
+    
+    SW_RESTORE = 9
+    
+    # 获取控制台窗口句柄
+    hwnd = kernel32.GetConsoleWindow()
+    
+    # 如果存在控制台窗口
+    if not hwnd:
+        raise ValueError("控制台窗口不存在")
+    
+
+    
+    monitors = enumerate_monitors()
     print(f"console func: {monitors}")
     
     # 确保目标显示器索引有效
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from backend.backtest import backtest
+from backend.strategy import StrategyParams, StrategyState, decide, purchased_quantity, BUY, REFRESH, FREEREFRESH
+
+
+def simulate(prices, ideal, unacceptable):
+    params = StrategyParams(ideal=ideal, unacceptable=unacceptable)
+    counts = {BUY: 0, REFRESH: 0, FREEREFRESH: 0}
+    units = spend = 0
+    state = StrategyState()
+    for price in prices:
+        decision, state = decide(state, price, params)
+        counts[decision] += 1
+        quantity = purchased_quantity(decision, state)
+        units += quantity
+        spend += quantity * price
+    return counts, units, spend
+
+
+def test_unacceptable_below_ideal():
+    result = backtest([500, 530, 550, 600], ideal=560, unacceptable=520)
+    assert result['buys'] == 1
+    assert result['refreshes'] == 0
+    assert result['freerefreshes'] == 3
+
+def test_matches_decide_on_random_grids():
+    rng = np.random.default_rng(0)
+    prices = rng.integers(400, 700, size=200)
+    ideals, unacceptables = np.meshgrid(np.arange(380, 720, 17), np.arange(380, 720, 13), indexing='ij')
+    result = backtest(prices, ideals, unacceptables)
+    for index in np.ndindex(ideals.shape):
+        counts, units, spend = simulate(prices, int(ideals[index]), int(unacceptables[index]))
+        assert result['buys'][index] == counts[BUY]
+        assert result['refreshes'][index] == counts[REFRESH]
+        assert result['freerefreshes'][index] == counts[FREEREFRESH]
+        assert result['units'][index] == units
+        assert result['spend'][index] == spend
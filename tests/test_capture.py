@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import time
+
+import numpy as np
+
+from backend.capture import CaptureBackend, REDRAWN, UNCHANGED, TIMEOUT
+
+
+class SequenceCapture(CaptureBackend):
+    '''
+    依次返回 frames 中的画面，用完后一直返回最后一帧
+    '''
+    def __init__(self, frames):
+        super().__init__()
+        self.frames = list(frames)
+
+    def _query_screen_size(self):
+        return 100, 100
+
+    def _grab(self, left, top, right, bottom):
+        frame = self.frames.pop(0) if len(self.frames) > 1 else self.frames[0]
+        return np.full((bottom - top, right - left, 3), frame, dtype=np.uint8)
+
+
+def test_unchanged_region_returns_before_timeout():
+    capture = SequenceCapture([100])
+    reference = capture.thumbnail([0, 0, 40, 8])
+    start = time.perf_counter()
+    assert capture.wait_until_changed([0, 0, 40, 8], reference, timeout_ms=1000, poll_ms=1, unchanged_ms=20) == UNCHANGED
+    assert time.perf_counter() - start < 0.5
+
+
+def test_unchanged_region_times_out_without_unchanged_ms():
+    capture = SequenceCapture([100])
+    reference = capture.thumbnail([0, 0, 40, 8])
+    assert capture.wait_until_changed([0, 0, 40, 8], reference, timeout_ms=30, poll_ms=1) == TIMEOUT
+
+
+def test_timeout_wins_over_unchanged_ms():
+    # 超时不长于 unchanged_ms 时不能当作画面没变提前返回
+    capture = SequenceCapture([100])
+    reference = capture.thumbnail([0, 0, 40, 8])
+    assert capture.wait_until_changed([0, 0, 40, 8], reference, timeout_ms=20, poll_ms=1, unchanged_ms=20) == TIMEOUT
+
+
+def test_changed_region_waits_for_settle():
+    capture = SequenceCapture([100, 100, 200])
+    reference = capture.thumbnail([0, 0, 40, 8])
+    assert capture.wait_until_changed([0, 0, 40, 8], reference, timeout_ms=1000, settle_ms=5, poll_ms=1,
+                                      unchanged_ms=500) == REDRAWN
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from backend.BuyBot import BuyBot
+from backend.digit_recognizer import build_templates, segment_glyphs
+from config import DefaultConfig
+
+# 10像素高的简化字体，逗号在数字下沿之下
+GLYPHS = {
+    '0': ['######', '######', '##..##', '##..##', '##..##', '##..##', '##..##', '##..##', '######', '######'],
+    '1': ['..##..'] * 10,
+    '7': ['######', '######'] + ['....##'] * 8,
+    ',': ['##', '##', '.#'],
+}
+
+
+def render(text, glyphs=GLYPHS):
+    '''
+    暗底亮字的截图，字符之间隔2列
+    '''
+    img = np.zeros((24, 8 * len(text) + 8, 3), dtype=np.uint8)
+    x = 4
+    for char in text:
+        rows = glyphs[char]
+        top = 13 if char == ',' else 4
+        for y, row in enumerate(rows):
+            for dx, cell in enumerate(row):
+                if cell == '#':
+                    img[top + y, x + dx] = 230
+        x += len(rows[0]) + 2
+    return img
+
+
+def test_segment_glyphs_splits_columns_and_keeps_comma_at_bottom():
+    ink = np.zeros((13, 12), dtype=bool)
+    ink[:10, 0:3] = True
+    ink[10:13, 5:7] = True
+    ink[:10, 9:12] = True
+    glyphs = segment_glyphs(ink)
+    assert [glyph.shape for glyph in glyphs] == [(13, 3), (13, 2), (13, 3)]
+    # 逗号落在格子底部
+    assert not glyphs[1][:10].any() and glyphs[1][10:].all()
+
+
+def test_segment_glyphs_pads_rows_without_comma():
+    ink = np.ones((10, 4), dtype=bool)
+    assert segment_glyphs(ink)[0].shape == (13, 4)
+    assert segment_glyphs(np.zeros((10, 4), dtype=bool)) == []
+
+
+def test_templates_read_back_rendered_price():
+    recognizer = build_templates([(render('1,070'), '1,070'), (render('710'), '710')])
+    text, score = recognizer.recognize(render('7,101'))
+    assert text == '7101'
+    assert score > 0.99
+
+
+def test_low_score_falls_back_to_ocr():
+    recognizer = build_templates([(render('1,070'), '1,070'), (render('710'), '710')])
+    # 模板里没有的字形仍会匹配到最接近的字符，但分数低于 DIGIT_TEMPLATE_MIN_SCORE
+    glyphs = dict(GLYPHS, **{'4': ['##..##'] * 4 + ['######'] * 2 + ['....##'] * 4})
+    text, score = recognizer.recognize(render('14', glyphs))
+    assert text is not None and score < DefaultConfig.DIGIT_TEMPLATE_MIN_SCORE
+    bot = BuyBot.__new__(BuyBot)
+    bot.digit_recognizer = recognizer
+    assert bot._identify_template(render('14', glyphs)) is None
+    assert bot._identify_template(render('107')) == (107, recognizer.recognize(render('107'))[1])
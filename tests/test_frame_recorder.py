@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import numpy as np
+
+from backend.frame_recorder import FrameRecorder
+
+
+def crop(value, shape=(8, 40)):
+    return np.full(shape + (3,), value, dtype=np.uint8)
+
+
+def test_flush_writes_latest_frames_with_results(tmp_path):
+    recorder = FrameRecorder(capacity=2, max_size=(8, 16), directory=str(tmp_path))
+    first = recorder.record(crop(10), 'price')
+    second = recorder.record(crop(20), 'price')
+    third = recorder.record(crop(30), 'balance')
+    # 第一张已经被覆盖，补上的结果被忽略
+    recorder.annotate(first, 111)
+    recorder.annotate(second, 5180)
+    assert recorder.flush('hotkey')
+    recorder.close()
+
+    [name] = os.listdir(tmp_path)
+    assert name.endswith('_hotkey')
+    with open(tmp_path / name / 'index.json', encoding='utf-8') as f:
+        index = json.load(f)
+    assert [frame['seq'] for frame in index['frames']] == [second, third]
+    assert [frame['value'] for frame in index['frames']] == [5180, None]
+    assert index['frames'][0]['latency_ms'] is not None and index['frames'][1]['latency_ms'] is None
+    assert sorted(os.listdir(tmp_path / name)) == ['000001_price_5180.png', '000002_balance_None.png', 'index.json']
+
+
+def test_saved_frame_is_clipped_to_max_size(tmp_path):
+    from PIL import Image
+    recorder = FrameRecorder(capacity=4, max_size=(8, 16), directory=str(tmp_path))
+    recorder.record(crop(200, (20, 40)), 'price')
+    recorder.flush('hotkey')
+    recorder.close()
+    [name] = os.listdir(tmp_path)
+    image = np.asarray(Image.open(tmp_path / name / '000000_price_None.png'))
+    assert image.shape == (8, 16, 3) and (image == 200).all()
+
+
+def test_automatic_flush_is_rate_limited(tmp_path):
+    recorder = FrameRecorder(capacity=4, directory=str(tmp_path), min_interval_s=60)
+    assert not recorder.flush('recognition_failed', force=False)
+    recorder.record(crop(10), 'price')
+    assert recorder.flush('recognition_failed', force=False)
+    assert not recorder.flush('recognition_failed', force=False)
+    # 热键触发不受限制
+    assert recorder.flush('hotkey')
+    recorder.close()
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_disabled_recorder_keeps_nothing(tmp_path):
+    recorder = FrameRecorder(directory=str(tmp_path), enabled=False)
+    seq = recorder.record(crop(10), 'price')
+    assert seq == -1
+    recorder.annotate(seq, 5180)
+    assert not recorder.flush('hotkey')
+    recorder.close()
+    assert os.listdir(tmp_path) == []
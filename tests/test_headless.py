@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_worker_loop_does_not_import_qt():
+    code = ('import sys, headless, backend.BuyBot, backend.worker, backend.layout; '
+            'sys.exit(any(name.startswith("PyQt5") for name in sys.modules))')
+    assert subprocess.run([sys.executable, '-c', code], cwd=ROOT).returncode == 0
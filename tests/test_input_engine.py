@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pytest
+from backend.input_engine import InputEngine, RecordingInput, InputFailSafe, click
+
+
+class CursorInput(RecordingInput):
+    def __init__(self, cursor):
+        super().__init__((1920, 1080))
+        self.cursor = cursor
+
+    def cursor_position(self):
+        return self.cursor
+
+
+def test_failsafe_stops_before_clicking():
+    backend = CursorInput((1919, 0))
+    engine = InputEngine(backend)
+    with pytest.raises(InputFailSafe):
+        engine.run([click([100, 100]), click([200, 200])])
+    assert backend.actions == []
+
+def test_no_failsafe_away_from_corner():
+    backend = CursorInput((500, 500))
+    InputEngine(backend).run([click([100, 100])])
+    assert [kind for ts, kind, arg in backend.actions] == ['move', 'down', 'up']
+
+def test_failsafe_disabled():
+    backend = CursorInput((0, 0))
+    InputEngine(backend, failsafe=False).run([click([100, 100])])
+    assert len(backend.actions) == 3
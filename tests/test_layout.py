@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from backend.layout import LayoutProfile, LayoutResolver, select_profile
+
+
+def test_profile_scales_and_offsets_to_monitor():
+    profile = LayoutProfile('2560x1440', (2560, 1440), {'button': [1280.4, 720]}, {'price': [100, 200, 300, 400]})
+    # 右侧1920x1080的第二块显示器
+    resolved = profile.resolve((2560, 0, 4480, 1080))
+    assert resolved['button'] == (2560 + 960, 540)
+    assert resolved['price'] == (2560 + 75, 150, 2560 + 225, 300)
+
+
+def test_select_profile_prefers_exact_then_aspect():
+    wide = LayoutProfile('a', (3440, 1440), {}, {})
+    small = LayoutProfile('b', (1920, 1080), {}, {})
+    large = LayoutProfile('c', (2560, 1440), {}, {})
+    assert select_profile([wide, small, large], 1920, 1080) is small
+    # 没有完全一致的分辨率时选宽高比最接近、分辨率最高的
+    assert select_profile([wide, small, large], 3840, 2160) is large
+    with pytest.raises(ValueError):
+        select_profile([], 1920, 1080)
+
+
+def test_resolver_converts_once_until_invalidated(tmp_path):
+    with open(tmp_path / '2560x1440.json', 'w', encoding='utf-8') as f:
+        json.dump({'resolution': [2560, 1440], 'points': {'button': [2560, 1440]}}, f)
+    monitors = [(0, 0, 2560, 1440), (0, 0, 1280, 720)]
+    calls = []
+    def geometry():
+        calls.append(1)
+        return monitors[min(len(calls), len(monitors)) - 1]
+    resolver = LayoutResolver(str(tmp_path), geometry)
+    assert resolver.resolve()['button'] == (2560, 1440)
+    assert resolver.resolve()['button'] == (2560, 1440)
+    assert len(calls) == 1
+    resolver.invalidate()
+    assert resolver.resolve()['button'] == (1280, 720)
+    assert resolver.profile.name == '2560x1440'
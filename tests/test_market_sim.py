@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import random
+
+from benchmarks.market_sim import MarketModel, PriceProcess, ITEM
+
+POINTS = {
+    'postion_isconvertible_min_shopping_number': (1800, 900),
+    'postion_isconvertible_max_shopping_number': (2000, 900),
+    'postion_isconvertible_buy_button': (2100, 1100),
+    'postion_notconvertiable_min_shopping_number': (1800, 950),
+    'postion_notconvertiable_max_shopping_number': (2000, 950),
+    'postion_notconvertiable_buy_button': (2100, 1150),
+    'postion_balance': (2300, 60),
+}
+RECTS = {'range_isconvertible_lowest_price': (1800, 700, 2000, 740),
+         'range_notconvertible_lowest_price': (1800, 760, 2000, 800)}
+
+
+def make_model():
+    rng = random.Random(0)
+    return MarketModel(POINTS, RECTS, [(100, 100, 500, 500)], [PriceProcess(500, rng=rng)], balance=10 ** 6, rng=rng)
+
+
+def test_tile_click_on_item_page_is_not_a_misclick():
+    model = make_model()
+    assert model.click(300, 300) == 'tile'
+    price = model.price
+    assert model.click(300, 300) == 'reopen'
+    assert model.page == ITEM and model.price == price
+    assert model.stats['misclicks'] == 0
+    assert model.stats['opens'] == 1 and model.stats['reopens'] == 1
+
+def test_click_outside_buttons_is_a_misclick():
+    model = make_model()
+    model.click(300, 300)
+    assert model.click(1000, 1300) is None
+    assert model.stats['misclicks'] == 1
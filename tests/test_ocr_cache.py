@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from backend.ocr_cache import RecognitionCache
+
+
+def _crop():
+    img = np.zeros((48, 192), dtype=np.uint8)
+    img[:, ::8] = 200
+    img[:, 1::8] = 200
+    img[:, 2::8] = 200
+    img[:, 3::8] = 200
+    return img
+
+def test_perceptual_collision_is_not_trusted():
+    cache = RecognitionCache(perceptual=True)
+    six = _crop()
+    eight = six.copy()
+    # 只有一个像素不同的"笔画"，感知哈希相同
+    eight[10, 5] = 255
+    assert cache.key(six) == cache.key(eight)
+    cache.put(cache.key(six), (6, 0.99), six)
+    hit, value = cache.get(cache.key(eight), eight)
+    assert not hit and value is None
+
+def test_perceptual_hit_tolerates_noise():
+    cache = RecognitionCache(perceptual=True)
+    img = _crop()
+    noisy = np.clip(img.astype(np.int16) + 3, 0, 255).astype(np.uint8)
+    cache.put(cache.key(img), (6, 0.99), img)
+    assert cache.get(cache.key(noisy), noisy) == (True, (6, 0.99))
+
+def test_exact_mode():
+    cache = RecognitionCache()
+    img = _crop()
+    cache.put(cache.key(img), (8, 0.9))
+    assert cache.get(cache.key(img.copy())) == (True, (8, 0.9))
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import importlib.util
+from multiprocessing import shared_memory
+
+import pytest
+
+from backend import ocr_service
+from backend.ocr_service import OcrService
+
+
+def test_close_without_start_is_safe():
+    service = OcrService()
+    service.close()
+    assert not service.is_ready()
+
+
+@pytest.mark.skipif(importlib.util.find_spec('easyocr') is not None, reason='需要OCR引擎加载失败的环境')
+def test_failed_worker_reports_not_ready_and_frees_shared_memory(monkeypatch):
+    created = []
+    real = shared_memory.SharedMemory
+    def tracking(*args, **kwargs):
+        shm = real(*args, **kwargs)
+        if kwargs.get('create'):
+            created.append(shm.name)
+        return shm
+    monkeypatch.setattr(ocr_service.shared_memory, 'SharedMemory', tracking)
+
+    service = OcrService(timeout_s=5)
+    assert not service.wait_ready(60)
+    with pytest.raises(RuntimeError):
+        service.recognize_number(None)
+    service.close()
+    # 启动失败的工作进程已经释放共享内存
+    assert len(created) == 1
+    with pytest.raises(FileNotFoundError):
+        real(name=created[0])
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from backend.onnx_recognizer import OnnxOcrEngine
+
+
+class FakeRecognizer:
+    def __init__(self, results):
+        self.results = results
+
+    def recognize_batch(self, imgs):
+        return self.results[:len(imgs)]
+
+
+class FakeFallback:
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.calls = []
+
+    def start(self):
+        pass
+
+    def is_ready(self):
+        return self.ready
+
+    def recognize_number(self, img):
+        self.calls.append(img)
+        return 5180, 0.7
+
+
+def make_engine(results, fallback):
+    engine = OnnxOcrEngine(None, fallback=fallback)
+    engine._recognizer = FakeRecognizer(results)
+    engine._thread = threading.current_thread()
+    engine._ready.set()
+    return engine
+
+
+def test_low_confidence_uses_fallback():
+    fallback = FakeFallback()
+    engine = make_engine([('1,234', 0.95), ('518', 0.3)], fallback)
+    assert engine.recognize_numbers(['a', 'b']) == [(1234, 0.95), (5180, 0.7)]
+    assert fallback.calls == ['b']
+
+def test_fallback_not_ready_counts_as_failure():
+    engine = make_engine([('518', 0.3)], FakeFallback(ready=False))
+    assert engine.recognize_number('a') == (None, 0.0)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from backend.outcome import OutcomeDetector
+from backend.strategy import SUCCESS, FAILED
+
+BLANK = np.zeros((15, 100), dtype=np.int16)
+TOAST_SUCCESS = np.full((15, 100), 200, dtype=np.int16)
+TOAST_FAILED = np.full((15, 100), 100, dtype=np.int16)
+
+
+def make_detector():
+    return OutcomeDetector({SUCCESS: TOAST_SUCCESS, FAILED: TOAST_FAILED})
+
+
+def test_new_toast_matches():
+    assert make_detector().classify(TOAST_SUCCESS + 3, reference=BLANK) == SUCCESS
+
+def test_stale_toast_is_ignored():
+    # 上一次的提示还在，点击前后区域没有变化
+    assert make_detector().classify(TOAST_SUCCESS, reference=TOAST_SUCCESS) is None
+
+def test_changed_toast_matches():
+    assert make_detector().classify(TOAST_FAILED, reference=TOAST_SUCCESS) == FAILED
+
+def test_other_content_does_not_match():
+    assert make_detector().classify(np.full((15, 100), 30, dtype=np.int16), reference=BLANK) is None
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from backend.pacing import PacingController
+
+
+def test_success_shrinks_gap_down_to_min():
+    pacing = PacingController(50, min_ms=40, step_ms=5)
+    pacing.success()
+    assert pacing.gap_ms == 45
+    pacing.success()
+    pacing.success()
+    assert pacing.gap_ms == 40
+
+
+def test_failure_backs_off_and_counts_reasons():
+    pacing = PacingController(100, max_ms=300, backoff=2)
+    pacing.failure('redraw_timeout')
+    assert pacing.gap_ms == 200
+    pacing.failure('recognition_failed')
+    pacing.failure('redraw_timeout')
+    assert pacing.gap_ms == 300
+    assert pacing.failures == {'redraw_timeout': 2, 'recognition_failed': 1}
+
+
+def test_failure_from_zero_gap_starts_at_min():
+    pacing = PacingController(0, min_ms=30, backoff=1.5)
+    assert pacing.gap_ms == 30
+    pacing.failure('balance_error')
+    assert pacing.gap_ms == 45
+
+
+def test_disabled_keeps_initial_gap():
+    # 关闭自适应时输入的间隔不受范围限制
+    pacing = PacingController(10, min_ms=30, enabled=False)
+    pacing.success()
+    pacing.failure('recognition_failed')
+    assert pacing.gap_ms == 10
+    assert pacing.failures == {'recognition_failed': 1}
+
+
+def test_reset_restarts_from_new_gap():
+    pacing = PacingController(100, backoff=2)
+    pacing.failure('redraw_timeout')
+    pacing.reset(60)
+    assert pacing.gap_ms == 60
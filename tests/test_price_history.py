@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from backend.price_history import RollingWindow, PriceHistory
+
+
+def test_percentile_stays_within_observed_prices():
+    window = RollingWindow(300)
+    for ts in range(10):
+        window.add(ts, 5180)
+    assert window.percentile(10) == 5180
+    assert window.percentile(75) == 5180
+
+def test_percentile_follows_expired_extremes():
+    window = RollingWindow(10)
+    window.add(0, 9000)
+    for ts in range(5, 10):
+        window.add(ts, 1000 + ts)
+    window.expire(12)
+    assert window.maximum == 1009
+    assert 1005 <= window.percentile(99) <= 1009
+
+def test_suggest_prices_never_exceed_max():
+    history = PriceHistory(None, windows_s=(300,))
+    for price in (500, 510, 520):
+        history.append('item', price)
+    ideal, unacceptable = history.suggest_prices('item')
+    assert 500 <= ideal <= unacceptable <= 520
+
+def test_records_include_unflushed_appends(tmp_path):
+    history = PriceHistory(str(tmp_path / 'history.bin'), windows_s=(300,), flush_every=1000)
+    for price in (500, 510, 520):
+        history.append('item', price, decision='buy', quantity=2)
+    records = history.records()
+    assert list(records['price']) == [500, 510, 520]
+    assert list(records['quantity']) == [2, 2, 2]
+    history.close()
+    # 重新打开时最近的记录放回滚动统计
+    reopened = PriceHistory(str(tmp_path / 'history.bin'), windows_s=(300,))
+    assert reopened.stats('item')['count'] == 3
+    reopened.close()
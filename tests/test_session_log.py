@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+import json
+
+import numpy as np
+from backend.session_log import SessionLogger
+
+
+def test_numpy_values_are_written(tmp_path):
+    logger = SessionLogger(directory=str(tmp_path), console=False)
+    logger.log('decision', price=np.int64(5180), balance=np.float32(1.5), readings=[(np.int64(518), 0.5)])
+    logger.log('recognition_failed')
+    logger.close()
+    records = [json.loads(line) for line in (tmp_path / 'session.log').read_text(encoding='utf-8').splitlines()]
+    assert [record['event'] for record in records] == ['decision', 'recognition_failed']
+    assert records[0]['price'] == 5180
+    assert records[0]['readings'] == [[518, 0.5]]
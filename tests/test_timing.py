@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+
+from backend.timing import SpanRecorder, STAGES
+
+
+def test_ring_buffer_keeps_latest_records_in_order():
+    recorder = SpanRecorder(capacity=3)
+    for ms in (1, 2, 3, 4, 5):
+        recorder.record('ocr', ms / 1000)
+    stages, _, durations = recorder.snapshot()
+    assert list(durations * 1000) == [3, 4, 5]
+    assert list(stages) == [STAGES.index('ocr')] * 3
+
+
+def test_summary_percentiles_and_iteration_rate():
+    recorder = SpanRecorder()
+    for ms in range(1, 101):
+        recorder.record('capture', ms / 1000)
+    summary = recorder.summary()
+    assert summary['capture']['count'] == 100
+    assert 50 <= summary['capture']['p50'] <= 51
+    assert 95 <= summary['capture']['p95'] <= 96
+    assert 'ocr' not in summary
+    # 少于两轮时无法计算循环速度
+    assert summary['iterations_per_minute'] == 0.0
+    with recorder.span('iteration'):
+        pass
+    with recorder.span('iteration'):
+        pass
+    assert recorder.summary()['iterations_per_minute'] > 0
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = SpanRecorder(enabled=False)
+    with recorder.span('ocr'):
+        pass
+    recorder.record('wait', 0.01)
+    assert len(recorder.snapshot()[0]) == 0
+
+
+def test_exports_use_stage_names(tmp_path):
+    recorder = SpanRecorder()
+    recorder.record('wait', 0.0125)
+    recorder.export_csv(str(tmp_path / 'timing.csv'))
+    recorder.export_json(str(tmp_path / 'timing.json'))
+    with open(tmp_path / 'timing.csv', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['stage', 'start_s', 'duration_ms']
+    assert rows[1][0] == 'wait' and rows[1][2] == '12.500'
+    with open(tmp_path / 'timing.json', encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['records'][0]['stage'] == 'wait'
+    assert data['summary']['wait']['count'] == 1
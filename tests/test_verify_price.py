@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import defaultdict, deque
+
+import numpy as np
+from backend.BuyBot import BuyBot
+from backend.ocr_cache import RecognitionCache
+from backend.timing import SpanRecorder
+
+
+class FixedCapture:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def grab(self, range):
+        return self.frames.pop(0) if len(self.frames) > 1 else self.frames[0]
+
+
+class FixedOcr:
+    def __init__(self, reading):
+        self.reading = reading
+        self.calls = 0
+
+    def recognize_number(self, img):
+        self.calls += 1
+        return self.reading
+
+
+class FixedTemplates:
+    def __init__(self, text, score):
+        self.result = (text, score)
+
+    def recognize(self, img):
+        return self.result
+
+
+class NullFrames:
+    def record(self, img, region):
+        return 0
+
+    def annotate(self, seq, value):
+        pass
+
+
+class EventLog:
+    def __init__(self):
+        self.events = []
+
+    def log(self, event, **fields):
+        self.events.append(event)
+
+
+def make_bot(frames, ocr_reading, template=(None, 0.0), p50=5180):
+    bot = BuyBot.__new__(BuyBot)
+    bot.capture = FixedCapture(frames)
+    bot.ocr = FixedOcr(ocr_reading)
+    bot.digit_recognizer = FixedTemplates(*template)
+    bot.ocr_cache = RecognitionCache()
+    bot.timing = SpanRecorder()
+    bot.frames = NullFrames()
+    bot.session_log = EventLog()
+    bot.recent_prices = defaultdict(deque)
+    bot.recent_prices['ammo'].extend([p50] * 10)
+    bot._recognize_lock = threading.RLock()
+    bot._verify_crop = frames[0]
+    bot._verify_range = [0, 0, 40, 8]
+    return bot
+
+def crop(value):
+    return np.full((8, 40, 3), value, dtype=np.uint8)
+
+
+def test_identical_frames_do_not_outvote_implausible_price():
+    bot = make_bot([crop(10)], ocr_reading=(518, 0.95), template=('518', 0.87))
+    assert bot.verify_price((518, 0.87), item='ammo') is None
+    # 同一截图只换用一次OCR，之后的帧不再识别
+    assert bot.ocr.calls == 1
+    assert bot.session_log.events == ['verification_failed']
+
+def test_agreeing_frames_override_stale_median():
+    # 价格确实大幅变化时，三个独立读数一致就采用，并从新价格重新统计
+    bot = make_bot([crop(10), crop(20), crop(30), crop(40)], ocr_reading=(518, 0.95), template=('518', 0.87))
+    assert bot.verify_price((518, 0.87), item='ammo') == 518
+    assert bot.session_log.events == ['verification_override']
+    assert list(bot.recent_prices['ammo']) == [518]
+
+def test_other_recognizer_confirms_plausible_price():
+    bot = make_bot([crop(10)], ocr_reading=(5200, 0.95), template=('5200', 0.87))
+    assert bot.verify_price((5200, 0.87), item='ammo') == 5200
+
+def test_distinct_frames_correct_misread():
+    bot = make_bot([crop(10), crop(20), crop(30)], ocr_reading=(5180, 0.95))
+    assert bot.verify_price((518, 0.5), item='ammo') == 5180
+    assert bot.session_log.events == ['verification_corrected']
+
+def test_accepted_prices_feed_only_the_same_item():
+    bot = make_bot([crop(10)], ocr_reading=(None, 0.0))
+    assert bot.verify_price((5200, 0.95), item='ammo') == 5200
+    assert bot.recent_prices['ammo'][-1] == 5200
+    # 其他物品没有本次运行的价格，不做偏差检查
+    assert bot.recent_price('armor') is None
+    bot.forget_prices('ammo')
+    assert bot.recent_price('ammo') is None
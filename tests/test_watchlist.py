@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from backend.watchlist import Watchlist, WatchItem
+
+
+def test_save_and_load_keep_pinned_items(tmp_path):
+    path = str(tmp_path / 'watchlist.json')
+    watchlist = Watchlist()
+    watchlist.set_primary([100, 200])
+    watchlist.add(WatchItem([300, 400], ideal=500, unacceptable=550))
+    watchlist.save(path)
+    loaded = Watchlist.load(path)
+    assert [item.to_dict() for item in loaded.items()] == [{'position': [300, 400], 'ideal': 500, 'unacceptable': 550}]
+    assert not (tmp_path / 'watchlist.json.tmp').exists()